@@ -12,6 +12,8 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 
 from pathlib import Path
 import os
+import django
+from django.core.exceptions import ImproperlyConfigured
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -57,6 +59,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'trips.metrics.CallerMiddleware',
 ]
 
 ROOT_URLCONF = 'TravelMateProject.urls'
@@ -90,6 +93,48 @@ DATABASES = {
     }
 }
 
+# Production SQLite profile (DATABASE_PROFILE=production): WAL journaling so readers and
+# the writer don't block each other, fewer fsyncs per commit, a memory-mapped and larger
+# page cache, and connections kept open across requests instead of one per request.
+# Transactions take the write lock when they start, so concurrent writers wait for each
+# other (up to SQLITE_BUSY_TIMEOUT seconds) instead of failing with "database is locked".
+# `python manage.py benchmark_sqlite` compares it with the default profile.
+DATABASE_PROFILE = os.getenv('DATABASE_PROFILE', 'default')
+SQLITE_PRODUCTION_PRAGMAS = [
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    f"PRAGMA mmap_size={int(os.getenv('SQLITE_MMAP_SIZE', 256 * 1024 * 1024))}",
+    # Negative sizes are in KiB
+    f"PRAGMA cache_size=-{int(os.getenv('SQLITE_CACHE_SIZE_KB', 64 * 1024))}",
+    'PRAGMA temp_store=MEMORY',
+]
+# init_command and transaction_mode need Django 5.1+
+SQLITE_PRODUCTION_OPTIONS = {
+    'init_command': ';'.join(SQLITE_PRODUCTION_PRAGMAS),
+    'transaction_mode': 'IMMEDIATE',
+    'timeout': int(os.getenv('SQLITE_BUSY_TIMEOUT', 20)),
+}
+SQLITE_PRODUCTION_CONN_MAX_AGE = int(os.getenv('DB_CONN_MAX_AGE', 600))
+
+if DATABASE_PROFILE == 'production':
+    if django.VERSION < (5, 1):
+        raise ImproperlyConfigured("DATABASE_PROFILE=production needs Django 5.1 or later")
+    DATABASES['default']['OPTIONS'] = dict(SQLITE_PRODUCTION_OPTIONS)
+    DATABASES['default']['CONN_MAX_AGE'] = SQLITE_PRODUCTION_CONN_MAX_AGE
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+
+# Cache
+# Set CACHE_BACKEND to a shared backend (e.g. django.core.cache.backends.db.DatabaseCache,
+# then run `python manage.py createcachetable`) so locks and results are shared across workers.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'travelmate_cache'),
+    }
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
@@ -140,9 +185,15 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 LOGIN_REDIRECT_URL = 'core:landing'
 LOGOUT_REDIRECT_URL = 'core:landing'
 
-#cronjob config to run db backup every hour
+#Forecast prefetch job config (interval in minutes)
+FORECAST_PREFETCH_INTERVAL = int(os.getenv('FORECAST_PREFETCH_INTERVAL', 10))
+FORECAST_PREFETCH_BATCH_SIZE = int(os.getenv('FORECAST_PREFETCH_BATCH_SIZE', 50))
+FORECAST_PREFETCH_CONCURRENCY = int(os.getenv('FORECAST_PREFETCH_CONCURRENCY', 4))
+
+#cronjob config to run db backup every hour and warm upcoming trips' forecasts
 CRONJOBS = [
-    ('0 * * * *', 'backup.cron.run_backup')
+    ('0 * * * *', 'backup.cron.run_backup'),
+    (f'*/{FORECAST_PREFETCH_INTERVAL} * * * *', 'trips.cron.prefetch_forecasts'),
 ]
 
 CRONTAB_COMMAND_PREFIX = f'BACKUP_DIR={os.environ["BACKUP_DIR"]}'
@@ -155,4 +206,113 @@ DEFAULT_FROM_EMAIL = os.environ['EMAIL_ADDRESS']
 SERVER_EMAIL = os.environ['EMAIL_ADDRESS']
 EMAIL_HOST_USER = os.environ['EMAIL_ADDRESS']
 EMAIL_HOST_PASSWORD = os.environ['EMAIL_PASSWORD']
-EMAIL_USE_TLS = True
\ No newline at end of file
+EMAIL_USE_TLS = True
+
+#Weather forecast cache config (seconds / entries)
+WEATHER_CACHE_TTL = int(os.getenv('WEATHER_CACHE_TTL', 600))
+WEATHER_CACHE_STALE_TTL = int(os.getenv('WEATHER_CACHE_STALE_TTL', 3600))
+WEATHER_CACHE_MAX_ENTRIES = int(os.getenv('WEATHER_CACHE_MAX_ENTRIES', 512))
+WEATHER_CACHE_COORD_PRECISION = int(os.getenv('WEATHER_CACHE_COORD_PRECISION', 2))
+
+#External API base URLs. Set API_STANDIN_URL (e.g. http://127.0.0.1:8765) to send all
+#OpenWeather and OpenAI traffic to `python manage.py run_api_standin` for load testing
+API_STANDIN_URL = os.getenv('API_STANDIN_URL', '').rstrip('/')
+OPENWEATHER_BASE_URL = os.getenv('OPENWEATHER_BASE_URL', API_STANDIN_URL or 'https://api.openweathermap.org')
+OPENAI_BASE_URL = os.getenv('OPENAI_BASE_URL', f'{API_STANDIN_URL}/v1/' if API_STANDIN_URL else '')
+
+#External API client config (timeouts in seconds)
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 3.05))
+API_READ_TIMEOUT = float(os.getenv('API_READ_TIMEOUT', 10))
+API_MAX_RETRIES = int(os.getenv('API_MAX_RETRIES', 2))
+API_BACKOFF_BASE = float(os.getenv('API_BACKOFF_BASE', 0.25))
+API_BACKOFF_MAX = float(os.getenv('API_BACKOFF_MAX', 2))
+API_POOL_MAXSIZE = int(os.getenv('API_POOL_MAXSIZE', 20))
+API_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('API_CIRCUIT_FAILURE_THRESHOLD', 5))
+API_CIRCUIT_RESET_TIMEOUT = int(os.getenv('API_CIRCUIT_RESET_TIMEOUT', 60))
+OPENWEATHER_TIMEOUTS = {
+    'geocoding': (API_CONNECT_TIMEOUT, 5),
+    'forecast': (API_CONNECT_TIMEOUT, 10),
+}
+OPENAI_COMPLETION_MODEL = os.getenv('OPENAI_COMPLETION_MODEL', 'gpt-3.5-turbo-instruct')
+OPENAI_TIMEOUT = float(os.getenv('OPENAI_TIMEOUT', 20))
+
+#Geocoding config
+GEOCODING_MEMO_SIZE = int(os.getenv('GEOCODING_MEMO_SIZE', 2048))
+
+#Single-flight request coalescing config (seconds)
+SINGLEFLIGHT_LOCK_TIMEOUT = int(os.getenv('SINGLEFLIGHT_LOCK_TIMEOUT', 30))
+SINGLEFLIGHT_WAIT_TIMEOUT = float(os.getenv('SINGLEFLIGHT_WAIT_TIMEOUT', 25))
+SINGLEFLIGHT_POLL_INTERVAL = float(os.getenv('SINGLEFLIGHT_POLL_INTERVAL', 0.1))
+SINGLEFLIGHT_RESULT_TTL = int(os.getenv('SINGLEFLIGHT_RESULT_TTL', 30))
+
+#Outfit generation config (deadline in seconds)
+OUTFIT_GENERATION_MAX_CONCURRENCY = int(os.getenv('OUTFIT_GENERATION_MAX_CONCURRENCY', 8))
+OUTFIT_GENERATION_DEADLINE = float(os.getenv('OUTFIT_GENERATION_DEADLINE', 25))
+#Ask for a whole trip's outfits in one JSON completion instead of one call per day
+OUTFIT_BATCH_GENERATION = os.getenv('OUTFIT_BATCH_GENERATION', 'True') == 'True'
+OUTFIT_BATCH_TOKENS_PER_DAY = int(os.getenv('OUTFIT_BATCH_TOKENS_PER_DAY', 120))
+#Rule-based outfit engine (trips.outfit_rules): 'engine' answers every day from the rules table,
+#'engine_first' asks the LLM only for unusual weather or planned activities, 'llm' always asks the LLM
+OUTFIT_ENGINE = os.getenv('OUTFIT_ENGINE', 'engine_first')
+#Generate a trip's first day in its own call so the outfit page can stream it before the rest
+OUTFIT_STREAM_FIRST_DAY = os.getenv('OUTFIT_STREAM_FIRST_DAY', 'True') == 'True'
+#Seconds an outfit stream (Server-Sent Events) stays open, milliseconds the browser waits before
+#reconnecting, and seconds between checks for new recommendations. Each open stream holds a
+#server thread (sync WSGI), so streams are kept short and resume from the last event id
+OUTFIT_STREAM_TIMEOUT = float(os.getenv('OUTFIT_STREAM_TIMEOUT', 5))
+OUTFIT_STREAM_RETRY_MS = int(os.getenv('OUTFIT_STREAM_RETRY_MS', 3000))
+OUTFIT_STREAM_POLL_INTERVAL = float(os.getenv('OUTFIT_STREAM_POLL_INTERVAL', 0.5))
+
+#Cards per page (and per infinite-scroll fetch) on All Outfits
+ALL_OUTFITS_PAGE_SIZE = int(os.getenv('ALL_OUTFITS_PAGE_SIZE', 24))
+
+#Packing list toggles and quantity changes arriving within PACKING_WRITE_WINDOW_MS of each other
+#are committed together (trips.packing_writes). Off (0) by default: every write waits out the
+#window, which only pays off when many threads of one process write at once on the default
+#(rollback journal) profile; see `python manage.py benchmark_sqlite`
+PACKING_WRITE_WINDOW_MS = float(os.getenv('PACKING_WRITE_WINDOW_MS', 0))
+PACKING_WRITE_MAX_BATCH = int(os.getenv('PACKING_WRITE_MAX_BATCH', 100))
+
+#Packing list edits the page queues up and sends to the batch endpoint in one request
+PACKING_BATCH_MAX_OPERATIONS = int(os.getenv('PACKING_BATCH_MAX_OPERATIONS', 200))
+
+#Shared outfit response cache (trips.outfit_cache). Days whose feels-like temperature falls in
+#the same OUTFIT_CACHE_TEMP_BUCKET-degree band reuse one LLM answer. The forecast prefetch cron
+#job trims it to OUTFIT_CACHE_MAX_ENTRIES; hits are written back to an entry (last use, hit count)
+#at most once every OUTFIT_CACHE_TOUCH_INTERVAL seconds
+OUTFIT_CACHE_TTL = int(os.getenv('OUTFIT_CACHE_TTL', 7 * 24 * 3600))
+OUTFIT_CACHE_MAX_ENTRIES = int(os.getenv('OUTFIT_CACHE_MAX_ENTRIES', 20000))
+OUTFIT_CACHE_TEMP_BUCKET = int(os.getenv('OUTFIT_CACHE_TEMP_BUCKET', 5))
+OUTFIT_CACHE_TOUCH_INTERVAL = int(os.getenv('OUTFIT_CACHE_TOUCH_INTERVAL', 3600))
+
+#Per-destination cultural notes (trips.cultural_notes), refreshed from the LLM after this many seconds
+CULTURAL_NOTES_TTL = int(os.getenv('CULTURAL_NOTES_TTL', 30 * 24 * 3600))
+
+#Background generation jobs (trips.jobs), processed by `python manage.py run_generation_worker`.
+#A running job whose lock is older than GENERATION_JOB_LOCK_TIMEOUT seconds is assumed abandoned
+GENERATION_JOB_MAX_ATTEMPTS = int(os.getenv('GENERATION_JOB_MAX_ATTEMPTS', 3))
+GENERATION_JOB_RETRY_BACKOFF = float(os.getenv('GENERATION_JOB_RETRY_BACKOFF', 10))
+GENERATION_JOB_LOCK_TIMEOUT = int(os.getenv('GENERATION_JOB_LOCK_TIMEOUT', 300))
+#A worker picking up an outfits job runs up to this many of the user's due outfits jobs with it,
+#so their trips' weather and LLM calls fan out together
+GENERATION_JOB_MAX_OUTFIT_TRIPS = int(os.getenv('GENERATION_JOB_MAX_OUTFIT_TRIPS', 10))
+
+#External call metrics (trips.metrics). Costs are USD per 1K tokens for OPENAI_COMPLETION_MODEL
+METRICS_FLUSH_INTERVAL = float(os.getenv('METRICS_FLUSH_INTERVAL', 5))
+METRICS_RETENTION_DAYS = int(os.getenv('METRICS_RETENTION_DAYS', 30))
+OPENAI_PROMPT_TOKEN_COST_PER_1K = float(os.getenv('OPENAI_PROMPT_TOKEN_COST_PER_1K', 0.0015))
+OPENAI_COMPLETION_TOKEN_COST_PER_1K = float(os.getenv('OPENAI_COMPLETION_TOKEN_COST_PER_1K', 0.002))
+
+#Token-bucket rate limits (trips.ratelimit) as (calls per second, burst). State lives in CACHES:
+#with the default local-memory cache every worker process has its own buckets, so point
+#CACHE_BACKEND at a shared cache for the limits to span worker processes. Callers queue for a slot for up to RATE_LIMIT_MAX_WAIT seconds before giving up
+RATE_LIMITS = {
+    'OpenWeather': (float(os.getenv('OPENWEATHER_RATE_LIMIT', 10)), int(os.getenv('OPENWEATHER_RATE_BURST', 20))),
+    'OpenAI': (float(os.getenv('OPENAI_RATE_LIMIT', 20)), int(os.getenv('OPENAI_RATE_BURST', 40))),
+}
+USER_RATE_LIMITS = {
+    'OpenWeather': (float(os.getenv('OPENWEATHER_USER_RATE_LIMIT', 2)), int(os.getenv('OPENWEATHER_USER_RATE_BURST', 10))),
+    'OpenAI': (float(os.getenv('OPENAI_USER_RATE_LIMIT', 2)), int(os.getenv('OPENAI_USER_RATE_BURST', 10))),
+}
+RATE_LIMIT_MAX_WAIT = float(os.getenv('RATE_LIMIT_MAX_WAIT', 30))
+RATE_LIMIT_LOCK_TIMEOUT = float(os.getenv('RATE_LIMIT_LOCK_TIMEOUT', 2))
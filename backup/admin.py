@@ -7,6 +7,14 @@ import subprocess
 import os
 from backup.models import Backup
 from django.contrib import messages
+from django.db import connection
+
+def checkpoint_database():
+    # With DATABASE_PROFILE=production the database runs in WAL mode and recent
+    # commits may still be in db.sqlite3-wal; move them into the main file
+    # before it is copied or replaced
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA wal_checkpoint(TRUNCATE)")
 
 @admin.action(description="Restore selected backup")
 def restore_backup(modeladmin, request, queryset):
@@ -15,6 +23,7 @@ def restore_backup(modeladmin, request, queryset):
 
         backup = queryset.first()
         backup_path = os.path.join(os.environ['BACKUP_DIR'], backup.name)
+        checkpoint_database()
         shutil.copy2(f"{backup_path}.sqlite3", os.environ['DB_PATH'])
 
         Backup.objects.all().delete()
@@ -42,6 +51,7 @@ class BackupAdmin(admin.ModelAdmin):
         backup_path = os.path.join(os.environ['BACKUP_DIR'], obj.name)
         # Create BACKUP_DIR if it doesn't exist
         os.makedirs(os.environ['BACKUP_DIR'], exist_ok=True)
+        checkpoint_database()
         shutil.copy2(os.environ['DB_PATH'], f"{backup_path}.sqlite3")
         super().save_model(request, obj, form, change)
 
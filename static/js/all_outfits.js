@@ -0,0 +1,90 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Format outfit descriptions to show only a summary
+    const formatSummaries = function(root) {
+        root.querySelectorAll('.outfit-summary').forEach(function(element) {
+            const text = element.textContent.trim();
+            const lines = text.split('\n').filter(line => line.trim() !== '');
+
+            // Only show the first 3 lines
+            const displayLines = lines.slice(0, 3);
+            const remainingCount = Math.max(0, lines.length - 3);
+
+            // Clear the element
+            element.innerHTML = '';
+
+            // Add the display lines
+            displayLines.forEach(line => {
+                const div = document.createElement('div');
+                div.textContent = line.trim();
+                element.appendChild(div);
+            });
+
+            // Add a "more items" indicator if needed
+            if (remainingCount > 0) {
+                const moreDiv = document.createElement('div');
+                moreDiv.className = 'text-primary mt-1';
+                moreDiv.textContent = `+ ${remainingCount} more items`;
+                element.appendChild(moreDiv);
+            }
+        });
+    };
+
+    formatSummaries(document);
+
+    // Infinite scroll: when the "Load more" placeholder comes into view, swap
+    // it for the next page of cards (which brings its own placeholder)
+    const container = document.getElementById('outfit-cards');
+    if (!container || !window.IntersectionObserver) {
+        return;
+    }
+
+    let loading = false;
+    const observer = new IntersectionObserver(function(entries) {
+        entries.forEach(function(entry) {
+            if (entry.isIntersecting && !loading) {
+                loadNextPage(entry.target);
+            }
+        });
+    }, { rootMargin: '400px' });
+
+    const loadNextPage = function(placeholder) {
+        loading = true;
+        observer.unobserve(placeholder);
+
+        fetch(placeholder.dataset.nextPageUrl, {
+            headers: {
+                'X-Requested-With': 'XMLHttpRequest'
+            }
+        })
+        .then(response => {
+            if (!response.ok) {
+                throw new Error(`HTTP ${response.status}`);
+            }
+            return response.text();
+        })
+        .then(html => {
+            const template = document.createElement('template');
+            template.innerHTML = html;
+            formatSummaries(template.content);
+            placeholder.replaceWith(template.content);
+            observeNextPage();
+        })
+        .catch(error => {
+            console.error('Error:', error);
+            // Leave the "Load more" link for a manual retry
+            observer.observe(placeholder);
+        })
+        .finally(() => {
+            loading = false;
+        });
+    };
+
+    const observeNextPage = function() {
+        const placeholder = container.querySelector('[data-next-page-url]');
+        if (placeholder) {
+            observer.observe(placeholder);
+        }
+    };
+
+    observeNextPage();
+});
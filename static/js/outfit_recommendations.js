@@ -0,0 +1,102 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Format outfit descriptions to show only a summary
+    const formatSummaries = function(root) {
+        root.querySelectorAll('.outfit-summary').forEach(function(element) {
+            let text = element.textContent.trim();
+            let lines = text.split('\n').filter(line => line.trim() !== '');
+
+            // Clean up the list markers
+            lines = lines.map(line => line.replace(/^[-•*]\s*/, '').trim()).filter(line => line);
+
+            // Only show the first 3 lines
+            let displayLines = lines.slice(0, 3);
+            let remainingCount = Math.max(0, lines.length - 3);
+
+            // Clear the element
+            element.innerHTML = '';
+
+            // Add the display lines
+            displayLines.forEach(line => {
+                let div = document.createElement('div');
+                div.className = 'mb-1 text-muted';
+                div.textContent = line;
+                element.appendChild(div);
+            });
+
+            // Add a "more items" indicator if needed
+            if (remainingCount > 0) {
+                let moreDiv = document.createElement('div');
+                moreDiv.className = 'text-primary mt-2';
+                moreDiv.innerHTML = `<i class="fas fa-ellipsis-h me-1"></i> ${remainingCount} more items...`;
+                element.appendChild(moreDiv);
+            }
+        });
+    };
+
+    formatSummaries(document);
+
+    // While outfits are being generated, stream each day's card in as soon
+    // as it is saved instead of waiting for the whole trip
+    const container = document.getElementById('outfit-cards');
+    if (!container || !container.dataset.streamUrl || !window.EventSource) {
+        return;
+    }
+
+    const status = document.getElementById('outfit-stream-status');
+    const source = new EventSource(container.dataset.streamUrl);
+
+    const addCard = function(recommendation) {
+        if (container.querySelector(`[data-recommendation-id="${recommendation.id}"]`)) {
+            return;
+        }
+        const empty = document.getElementById('outfit-cards-empty');
+        if (empty) {
+            empty.remove();
+        }
+
+        const template = document.createElement('template');
+        template.innerHTML = recommendation.html.trim();
+        const card = template.content.firstElementChild;
+        formatSummaries(card);
+
+        // Keep the cards in day order; batches can finish out of order
+        const next = Array.from(container.querySelectorAll('[data-day]'))
+            .find(element => element.dataset.day > recommendation.day);
+        container.insertBefore(card, next || null);
+    };
+
+    source.addEventListener('recommendation', function(event) {
+        addCard(JSON.parse(event.data));
+    });
+
+    source.addEventListener('done', function(event) {
+        source.close();
+        const job = JSON.parse(event.data);
+        if (!status) {
+            return;
+        }
+        if (job.status === 'succeeded') {
+            status.remove();
+            return;
+        }
+        const alert = status.querySelector('.alert');
+        alert.classList.remove('alert-info');
+        alert.classList.add('alert-danger');
+        status.querySelector('.job-status-text').textContent =
+            job.error || 'Generation failed. Please try again later.';
+        const spinner = status.querySelector('.spinner-border');
+        if (spinner) {
+            spinner.remove();
+        }
+    });
+
+    // On other errors the browser reconnects by itself and resumes after
+    // the last card it received (Last-Event-ID)
+    source.onerror = function(error) {
+        // The server closes the stream every few seconds and the browser
+        // reconnects on its own; only a connection it gave up on is an error
+        if (source.readyState === EventSource.CLOSED) {
+            console.error('Error:', error);
+        }
+    };
+});
@@ -80,35 +80,154 @@ document.addEventListener('DOMContentLoaded', function() {
         return cookieValue;
     }
     
-    // Handle quantity updates using event delegation
-    document.addEventListener('click', function(e) {
-        const button = e.target.closest('.increase-btn, .decrease-btn');
-        if (!button) {
+    // Edits are queued and sent to the batch endpoint together, a moment after
+    // the last click, instead of one request (or page load) each. Toggles,
+    // quantity changes and deletes show up straight away; the server's answer
+    // then corrects anything that didn't go through.
+    const BATCH_DELAY = 500;
+    // trips.packing_writes.MAX_QUANTITY
+    const MAX_QUANTITY_STEP = 999;
+    const container = document.querySelector('[data-batch-url]');
+    if (!container) {
+        updateProgressDisplay();
+        return;
+    }
+    const batchUrl = container.dataset.batchUrl;
+    
+    // item id -> {toggles, deltas} not sent yet
+    let pendingEdits = new Map();
+    // Adds and deletes not sent yet, as {operation, onResult}
+    let pendingOperations = [];
+    let flushTimer = null;
+    let inFlight = false;
+    let flushAgain = false;
+    let reloadWhenSaved = false;
+    
+    const rowFor = function(itemId) {
+        return document.querySelector(`.item-row[data-item-id="${itemId}"]`);
+    };
+    
+    const showPacked = function(row, isPacked) {
+        row.querySelector('.toggle-packed').checked = isPacked;
+        const label = row.querySelector('.form-check-label');
+        if (isPacked) {
+            label.classList.add('text-decoration-line-through', 'text-muted');
+        } else {
+            label.classList.remove('text-decoration-line-through', 'text-muted');
+        }
+    };
+    
+    const showQuantity = function(row, quantity) {
+        row.querySelector('.quantity-display').textContent = quantity;
+        row.querySelector('.decrease-btn').disabled = quantity <= 1;
+    };
+    
+    // The server's state for an item, unless it has been edited again since
+    const showItemState = function(result) {
+        if (pendingEdits.has(result.item_id)) {
+            return;
+        }
+        const row = rowFor(result.item_id);
+        if (!row) {
+            return;
+        }
+        if (!result.found) {
+            row.remove();
+            return;
+        }
+        showPacked(row, result.is_packed);
+        showQuantity(row, result.quantity);
+    };
+    
+    const showAddedItem = function(result) {
+        const existing = rowFor(result.item_id);
+        if (existing) {
+            // Already on the list; the server added to its quantity
+            if (!pendingEdits.has(result.item_id)) {
+                showQuantity(existing, result.quantity);
+            }
+            return;
+        }
+        const category = Array.from(document.querySelectorAll('.accordion-item[data-category]'))
+            .find(element => element.dataset.category === result.category);
+        if (!category) {
+            // First item of a category: let the page build its section
+            reloadWhenSaved = true;
+            return;
+        }
+        const template = document.createElement('template');
+        template.innerHTML = result.html.trim();
+        category.querySelector('.list-group').appendChild(template.content.firstElementChild);
+    };
+    
+    const queueEdit = function(itemId, change) {
+        const edit = pendingEdits.get(itemId) || {toggles: 0, deltas: []};
+        if (change.toggle) {
+            edit.toggles++;
+        }
+        if (change.delta) {
+            // Consecutive steps the same way can be sent as one, up to the
+            // largest step the server accepts
+            const last = edit.deltas.length - 1;
+            if (last >= 0 && Math.sign(edit.deltas[last]) === Math.sign(change.delta)
+                    && Math.abs(edit.deltas[last] + change.delta) <= MAX_QUANTITY_STEP) {
+                edit.deltas[last] += change.delta;
+            } else {
+                edit.deltas.push(change.delta);
+            }
+        }
+        pendingEdits.set(itemId, edit);
+        scheduleFlush();
+    };
+    
+    const takePending = function() {
+        const entries = [];
+        pendingEdits.forEach(function(edit, itemId) {
+            // Toggling twice is no change at all
+            if (edit.toggles % 2) {
+                entries.push({operation: {op: 'toggle', item_id: itemId}, onResult: showItemState});
+            }
+            edit.deltas.forEach(function(delta) {
+                entries.push({operation: {op: 'quantity', item_id: itemId, delta: delta}, onResult: showItemState});
+            });
+        });
+        entries.push(...pendingOperations);
+        pendingEdits = new Map();
+        pendingOperations = [];
+        return entries;
+    };
+    
+    const scheduleFlush = function() {
+        clearTimeout(flushTimer);
+        flushTimer = setTimeout(flush, BATCH_DELAY);
+    };
+    
+    // One batch in flight at a time, so the server applies them in order
+    const flush = function(keepalive) {
+        clearTimeout(flushTimer);
+        if (inFlight) {
+            flushAgain = true;
+            return;
+        }
+        const entries = takePending();
+        if (!entries.length) {
+            if (reloadWhenSaved) {
+                window.location.reload();
+            }
             return;
         }
         
-        e.preventDefault();
-        e.stopPropagation();  // Prevent event from bubbling up to the row
-        
-        const itemRow = button.closest('.item-row');
-        const tripId = itemRow.dataset.tripId;
-        const itemId = itemRow.dataset.itemId;
-        const action = button.classList.contains('increase-btn') ? 'increase' : 'decrease';
-        
-        // Get the CSRF token
-        const csrftoken = getCookie('csrftoken');
-        
-        const formData = new FormData();
-        formData.append('action', action);
-        
-        fetch(`/trips/packing-list/${tripId}/update-quantity/${itemId}/`, {
+        inFlight = true;
+        fetch(batchUrl, {
             method: 'POST',
-            body: formData,
+            body: JSON.stringify({operations: entries.map(entry => entry.operation)}),
             headers: {
-                'X-CSRFToken': csrftoken,
+                'Content-Type': 'application/json',
+                'X-CSRFToken': getCookie('csrftoken') || document.querySelector('[name=csrfmiddlewaretoken]').value,
                 'X-Requested-With': 'XMLHttpRequest'
             },
-            credentials: 'same-origin'
+            credentials: 'same-origin',
+            keepalive: keepalive === true
         })
         .then(response => {
             if (!response.ok) {
@@ -117,113 +236,96 @@ document.addEventListener('DOMContentLoaded', function() {
             return response.json();
         })
         .then(data => {
-            if (data.status === 'success') {
-                // Update quantity display
-                const quantityDisplay = itemRow.querySelector('.quantity-display');
-                quantityDisplay.textContent = data.quantity;
-                
-                // Update decrease button state
-                const decreaseBtn = itemRow.querySelector('.decrease-btn');
-                decreaseBtn.disabled = !data.can_decrease;
-            } else {
-                throw new Error(data.message || 'Failed to update quantity');
-            }
+            data.results.forEach((result, index) => entries[index].onResult(result));
+            updateProgressDisplay();
         })
         .catch(error => {
             console.error('Error:', error);
-            alert('Failed to update quantity. Please try again.');
+            alert('Failed to save your packing list changes. The page will reload to show what was saved.');
+            window.location.reload();
+        })
+        .finally(() => {
+            inFlight = false;
+            if (flushAgain || reloadWhenSaved) {
+                flushAgain = false;
+                flush();
+            }
         });
-    });
+    };
     
-    // Make entire item row clickable
-    document.querySelectorAll('.item-row').forEach(function(row) {
-        row.style.cursor = 'pointer';
-        row.addEventListener('click', function(event) {
-            // Prevent clicking if we're on the delete button or quantity controls
-            if (event.target.closest('.delete-btn') || 
-                event.target.closest('.increase-btn') || 
-                event.target.closest('.decrease-btn') || 
-                event.target.closest('.quantity-display') ||
-                event.target.closest('form')) {
+    // Quantity buttons, checkboxes and clicks anywhere else on an item row
+    document.addEventListener('click', function(e) {
+        const row = e.target.closest('.item-row');
+        if (!row) {
+            return;
+        }
+        const itemId = parseInt(row.dataset.itemId);
+        
+        const button = e.target.closest('.increase-btn, .decrease-btn');
+        if (button) {
+            e.preventDefault();
+            const quantity = parseInt(row.querySelector('.quantity-display').textContent);
+            const delta = button.classList.contains('increase-btn') ? 1 : -1;
+            if (quantity + delta < 1) {
                 return;
             }
-            
-            // Find the checkbox within this row
-            const checkbox = this.querySelector('.toggle-packed');
-            
-            // Toggle the checkbox
-            checkbox.checked = !checkbox.checked;
-            
-            // Get data attributes
-            const tripId = this.dataset.tripId;
-            const itemId = this.dataset.itemId;
-            const label = this.querySelector('.form-check-label');
-            
-            // Send the toggle request
-            fetch(`/trips/packing-list/${tripId}/toggle/${itemId}/`, {
-                method: 'POST',
-                headers: {
-                    'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value,
-                },
-            })
-            .then(response => response.json())
-            .then(data => {
-                // Update the UI immediately
-                checkbox.checked = data.is_packed;
-                
-                if (data.is_packed) {
-                    label.classList.add('text-decoration-line-through', 'text-muted');
-                } else {
-                    label.classList.remove('text-decoration-line-through', 'text-muted');
-                }
-                
-                // Update progress tracking without page reload
-                updateProgressDisplay();
-            })
-            .catch(error => {
-                console.error('Error:', error);
-                checkbox.checked = !checkbox.checked;
-            });
-        });
+            showQuantity(row, quantity + delta);
+            queueEdit(itemId, {delta: delta});
+            return;
+        }
+        
+        // Clicks on a label reach the checkbox as a click of their own
+        if (e.target.closest('.delete-btn, .quantity-display, form, label')) {
+            return;
+        }
+        
+        const checkbox = row.querySelector('.toggle-packed');
+        // A click on the checkbox itself has already flipped it
+        const isPacked = e.target === checkbox ? checkbox.checked : !checkbox.checked;
+        showPacked(row, isPacked);
+        queueEdit(itemId, {toggle: true});
+        updateProgressDisplay();
     });
     
-    // Direct checkbox click handler
-    document.querySelectorAll('.toggle-packed').forEach(function(checkbox) {
-        // Prevent the click from bubbling up to the row
-        checkbox.addEventListener('click', function(event) {
-            event.stopPropagation();
-            
-            const tripId = this.dataset.tripId;
-            const itemId = this.dataset.itemId;
-            const label = this.parentElement.querySelector('.form-check-label');
-            
-            fetch(`/trips/packing-list/${tripId}/toggle/${itemId}/`, {
-                method: 'POST',
-                headers: {
-                    'X-CSRFToken': document.querySelector('[name=csrfmiddlewaretoken]').value,
+    document.addEventListener('submit', function(e) {
+        const form = e.target;
+        
+        if (form.classList.contains('delete-item-form')) {
+            e.preventDefault();
+            const row = form.closest('.item-row');
+            const itemId = parseInt(row.dataset.itemId);
+            // Edits to an item being deleted don't need sending
+            pendingEdits.delete(itemId);
+            pendingOperations.push({operation: {op: 'delete', item_id: itemId}, onResult: function() {}});
+            row.remove();
+            updateProgressDisplay();
+            scheduleFlush();
+        } else if (form.id === 'quick-add-form') {
+            e.preventDefault();
+            const data = new FormData(form);
+            pendingOperations.push({
+                operation: {
+                    op: 'add',
+                    name: data.get('name'),
+                    category: data.get('category'),
+                    quantity: parseInt(data.get('quantity')) || 1,
+                    must_have: data.get('must_have') === 'on'
                 },
-            })
-            .then(response => response.json())
-            .then(data => {
-                // Update the UI immediately
-                this.checked = data.is_packed;
-                
-                if (data.is_packed) {
-                    label.classList.add('text-decoration-line-through', 'text-muted');
-                } else {
-                    label.classList.remove('text-decoration-line-through', 'text-muted');
-                }
-                
-                // Update progress tracking without page reload
-                updateProgressDisplay();
-            })
-            .catch(error => {
-                console.error('Error:', error);
-                this.checked = !this.checked;
+                onResult: showAddedItem
             });
-        });
+            form.reset();
+            // Sent straight away so the new row shows up
+            flush();
+        }
+    });
+    
+    // Don't lose queued edits when the user leaves the page
+    document.addEventListener('visibilitychange', function() {
+        if (document.visibilityState === 'hidden') {
+            flush(true);
+        }
     });
     
     // Initialize progress display on page load
     updateProgressDisplay();
-}); 
\ No newline at end of file
+});
@@ -0,0 +1,54 @@
+document.addEventListener('DOMContentLoaded', function() {
+    // Poll background generation jobs and reload the page once they finish.
+    // Each job is rendered as an element with a data-job-status-url attribute.
+    const jobElements = document.querySelectorAll('[data-job-status-url]');
+    const pollInterval = 2000;
+    let remaining = jobElements.length;
+    let succeeded = 0;
+
+    const finishJob = function(element, job) {
+        remaining--;
+        if (job.status === 'succeeded') {
+            succeeded++;
+        } else {
+            element.classList.remove('alert-info');
+            element.classList.add('alert-danger');
+            const text = element.querySelector('.job-status-text');
+            if (text) {
+                text.textContent = job.error || 'Generation failed. Please try again later.';
+            }
+            const spinner = element.querySelector('.spinner-border');
+            if (spinner) {
+                spinner.remove();
+            }
+        }
+
+        // Reload to show the new results; don't loop if every job failed
+        if (remaining === 0 && succeeded > 0) {
+            window.location.reload();
+        }
+    };
+
+    jobElements.forEach(function(element) {
+        const poll = function() {
+            fetch(element.dataset.jobStatusUrl, {
+                headers: {
+                    'X-Requested-With': 'XMLHttpRequest'
+                }
+            })
+            .then(response => response.json())
+            .then(job => {
+                if (job.done) {
+                    finishJob(element, job);
+                } else {
+                    setTimeout(poll, pollInterval);
+                }
+            })
+            .catch(error => {
+                console.error('Error:', error);
+                setTimeout(poll, pollInterval * 2);
+            });
+        };
+        setTimeout(poll, pollInterval);
+    });
+});
@@ -1,7 +1,12 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.contrib.auth.models import User, Group
-from .models import Trip, OutfitRecommendation, OutfitItem
+from django.utils import timezone
+from .models import (
+    Trip, OutfitRecommendation, OutfitItem, GeocodedLocation, DailyForecast, ForecastPrefetchRun,
+    OutfitResponseCache, CulturalNotes, GenerationJob, ExternalCallStats,
+)
+from .metrics import metrics_report, summarize, token_cost
 
 class TripInline(admin.TabularInline):
     model = Trip
@@ -81,4 +86,99 @@ class OutfitRecommendationAdmin(admin.ModelAdmin):
             'fields': ('created_at', 'updated_at'),
             'classes': ('collapse',)
         })
-    ) 
\ No newline at end of file
+    )
+
+@admin.register(GeocodedLocation)
+class GeocodedLocationAdmin(admin.ModelAdmin):
+    list_display = ('query', 'name', 'country', 'latitude', 'longitude', 'source', 'updated_at')
+    list_filter = ('source', 'country')
+    search_fields = ('query', 'name')
+    readonly_fields = ('created_at', 'updated_at')
+
+@admin.register(DailyForecast)
+class DailyForecastAdmin(admin.ModelAdmin):
+    list_display = ('date', 'latitude', 'longitude', 'condition', 'temp_min', 'temp_max', 'pop_max', 'fetched_at')
+    list_filter = ('condition', 'date')
+    readonly_fields = ('fetched_at',)
+
+@admin.register(ForecastPrefetchRun)
+class ForecastPrefetchRunAdmin(admin.ModelAdmin):
+    list_display = ('started_at', 'duration', 'trips_count', 'locations_count', 'fetched_count',
+                    'fresh_count', 'failed_count', 'fetch_seconds_avg', 'fetch_seconds_max')
+    readonly_fields = [field.name for field in ForecastPrefetchRun._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(OutfitResponseCache)
+class OutfitResponseCacheAdmin(admin.ModelAdmin):
+    list_display = ('destination', 'season', 'temperature_bucket', 'weather_condition', 'activities',
+                    'hit_count', 'created_at', 'last_used_at')
+    list_filter = ('season', 'weather_condition')
+    search_fields = ('destination', 'activities', 'outfit_description')
+    readonly_fields = ('signature', 'hit_count', 'created_at', 'last_used_at')
+
+@admin.register(CulturalNotes)
+class CulturalNotesAdmin(admin.ModelAdmin):
+    list_display = ('destination', 'updated_at')
+    search_fields = ('destination', 'notes')
+    readonly_fields = ('created_at', 'updated_at')
+
+@admin.register(GenerationJob)
+class GenerationJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'trip', 'kind', 'status', 'attempts', 'max_attempts', 'run_after',
+                    'locked_by', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    search_fields = ('trip__destination', 'trip__user__username', 'error')
+    readonly_fields = ('attempts', 'locked_by', 'locked_at', 'result', 'error',
+                       'created_at', 'updated_at', 'finished_at')
+    actions = ['retry_jobs']
+
+    @admin.action(description='Retry selected failed jobs')
+    def retry_jobs(self, request, queryset):
+        retried = 0
+        for job in queryset.filter(status=GenerationJob.FAILED):
+            if GenerationJob.objects.filter(trip=job.trip, kind=job.kind,
+                                            status__in=GenerationJob.ACTIVE_STATUSES).exists():
+                continue
+            job.status = GenerationJob.QUEUED
+            job.attempts = 0
+            job.run_after = timezone.now()
+            job.error = ''
+            job.finished_at = None
+            job.save()
+            retried += 1
+        self.message_user(request, f"Queued {retried} job(s) for retry.")
+
+@admin.register(ExternalCallStats)
+class ExternalCallStatsAdmin(admin.ModelAdmin):
+    change_list_template = 'admin/trips/externalcallstats/change_list.html'
+    list_display = ('hour', 'upstream', 'endpoint', 'caller', 'calls', 'errors', 'rate_limited',
+                    'p50_ms', 'p95_ms', 'p99_ms', 'queued_calls', 'prompt_tokens', 'completion_tokens', 'cost')
+    list_filter = ('upstream', 'endpoint', 'caller')
+    date_hierarchy = 'hour'
+    readonly_fields = [field.name for field in ExternalCallStats._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
+
+    @admin.display(description='p50 (ms)')
+    def p50_ms(self, obj):
+        return summarize([obj])['p50_ms']
+
+    @admin.display(description='p95 (ms)')
+    def p95_ms(self, obj):
+        return summarize([obj])['p95_ms']
+
+    @admin.display(description='p99 (ms)')
+    def p99_ms(self, obj):
+        return summarize([obj])['p99_ms']
+
+    @admin.display(description='Cost ($)')
+    def cost(self, obj):
+        return round(token_cost(obj.prompt_tokens, obj.completion_tokens), 4)
+
+    def changelist_view(self, request, extra_context=None):
+        # Last-24h percentiles and daily token spend above the hourly rows
+        extra_context = dict(extra_context or {}, metrics=metrics_report())
+        return super().changelist_view(request, extra_context=extra_context)
@@ -0,0 +1,249 @@
+import hashlib
+import os
+import random
+import threading
+import time
+
+import openai
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.mail import send_mail
+
+from trips.metrics import track_call
+from trips.ratelimit import RateLimitExceeded, acquire
+from trips.singleflight import SingleFlight, coalesced
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def send_api_fail_email(api_name):
+    admin_users = User.objects.filter(is_staff=True)
+
+    # Get emails of all users who are staff or superusers
+    admin_emails = [user.email for user in list(admin_users)]
+
+    send_mail(
+        subject=f"{api_name} API Failure",
+        message=f"A request to {api_name} has failed",
+        from_email=None,
+        recipient_list=admin_emails,
+        fail_silently=False,
+    )
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised instead of calling an upstream whose circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker.
+
+    After ``failure_threshold`` failures in a row the circuit opens and every
+    call fails fast for ``reset_timeout`` seconds. After that a single trial
+    call is let through (half-open); success closes the circuit, failure
+    opens it again. ``on_open`` runs once each time the circuit trips.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name, failure_threshold, reset_timeout, on_open=None):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.on_open = on_open
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                return True
+            # Open, or half-open with a trial call already in flight
+            return False
+
+    def release_trial(self):
+        """
+        Give back a half-open trial that said nothing about the upstream's
+        health (our own rate limit refused it, or the upstream rejected the
+        request itself), so the next call can make the trial instead of the
+        circuit staying half-open with no call in flight
+        """
+        with self._lock:
+            if self.state == self.HALF_OPEN:
+                # opened_at is already past the reset timeout
+                self.state = self.OPEN
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            tripped = self.state == self.HALF_OPEN or (
+                self.state == self.CLOSED and self.failures >= self.failure_threshold
+            )
+            if tripped:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+        if tripped and self.on_open is not None:
+            try:
+                self.on_open(self.name)
+            except Exception:
+                # Alerting must never turn an upstream failure into a crash
+                pass
+
+
+class APIClient:
+    """
+    Shared HTTP client for one upstream API.
+
+    Keeps a pooled keep-alive session, applies per-endpoint (connect, read)
+    timeouts, retries transient failures with jittered exponential backoff
+    and guards the upstream with a circuit breaker.
+    """
+
+    def __init__(self, name, timeouts=None, max_retries=None, backoff_base=None,
+                 backoff_max=None, pool_maxsize=None, failure_threshold=None, reset_timeout=None):
+        self.name = name
+        self.timeouts = timeouts or {}
+        self.default_timeout = (settings.API_CONNECT_TIMEOUT, settings.API_READ_TIMEOUT)
+        self.max_retries = settings.API_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = settings.API_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = settings.API_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.breaker = CircuitBreaker(
+            name,
+            failure_threshold=failure_threshold or settings.API_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=reset_timeout or settings.API_CIRCUIT_RESET_TIMEOUT,
+            on_open=send_api_fail_email,
+        )
+
+        pool_maxsize = pool_maxsize or settings.API_POOL_MAXSIZE
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def backoff(self, attempt):
+        # "Full jitter": sleep a random amount up to the exponential cap
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def get(self, url, params=None, endpoint=None):
+        """GET ``url`` and return the response, raising RequestException on failure"""
+        if not self.breaker.allow_request():
+            raise CircuitOpenError(f"{self.name} is temporarily unavailable")
+
+        timeout = self.timeouts.get(endpoint, self.default_timeout)
+        attempt = 0
+        while True:
+            # Each attempt is recorded on its own, so backoff sleeps don't count as upstream latency
+            with track_call(self.name, endpoint or 'default') as call:
+                # Every attempt, retries included, needs a slot in the shared rate limit
+                try:
+                    call['queue_wait_ms'] = acquire(self.name) * 1000
+                except RateLimitExceeded:
+                    # Our own limit, not an upstream failure
+                    self.breaker.release_trial()
+                    raise
+                try:
+                    response = self.session.get(url, params=params, timeout=timeout)
+                    response.raise_for_status()
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout, requests.exceptions.HTTPError) as e:
+                    status = getattr(e.response, 'status_code', None)
+                    if status is not None and status not in RETRY_STATUS_CODES:
+                        # The upstream answered (bad key, unknown city...); that's no reason to open the circuit
+                        self.breaker.release_trial()
+                        raise
+                    if attempt >= self.max_retries:
+                        self.breaker.record_failure()
+                        raise
+                    call['status'] = status
+                except requests.exceptions.RequestException:
+                    self.breaker.record_failure()
+                    raise
+                else:
+                    self.breaker.record_success()
+                    call['status'] = response.status_code
+                    return response
+
+            time.sleep(self.backoff(attempt))
+            attempt += 1
+
+
+openweather = APIClient('OpenWeather', timeouts=settings.OPENWEATHER_TIMEOUTS)
+
+
+openai_breaker = CircuitBreaker(
+    'OpenAI',
+    failure_threshold=settings.API_CIRCUIT_FAILURE_THRESHOLD,
+    reset_timeout=settings.API_CIRCUIT_RESET_TIMEOUT,
+    on_open=send_api_fail_email,
+)
+
+
+completion_flight = SingleFlight()
+
+
+def complete(prompt, max_tokens, temperature=0.5, coalesce=True):
+    """
+    Return the text of an OpenAI completion. Identical requests that are in
+    flight at the same time (in this process or, with a shared cache, any
+    other) share a single upstream call, unless ``coalesce`` is False (the
+    caller wants a fresh answer, not one published by a recent call).
+    """
+    if not coalesce:
+        return _complete(prompt, max_tokens, temperature)
+    signature = f"{settings.OPENAI_COMPLETION_MODEL}|{max_tokens}|{temperature}|{prompt}"
+    key = 'completion:' + hashlib.sha256(signature.encode()).hexdigest()
+    return coalesced(
+        completion_flight, key,
+        lambda: _complete(prompt, max_tokens, temperature),
+        result_ttl=settings.SINGLEFLIGHT_RESULT_TTL,
+    )
+
+
+def _complete(prompt, max_tokens, temperature):
+    """Run an OpenAI text completion behind the OpenAI circuit breaker and return its text"""
+    if not openai_breaker.allow_request():
+        raise CircuitOpenError("OpenAI is temporarily unavailable")
+
+    openai.api_key = os.environ.get('OPENAI_API_KEY')
+    if settings.OPENAI_BASE_URL:
+        openai.base_url = settings.OPENAI_BASE_URL
+    try:
+        with track_call('OpenAI', 'completions') as call:
+            call['queue_wait_ms'] = acquire('OpenAI') * 1000
+            response = openai.completions.create(
+                model=settings.OPENAI_COMPLETION_MODEL,
+                prompt=prompt,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                timeout=settings.OPENAI_TIMEOUT,
+            )
+            call['status'] = 200
+            usage = getattr(response, 'usage', None)
+            if usage is not None:
+                call['prompt_tokens'] = usage.prompt_tokens
+                call['completion_tokens'] = usage.completion_tokens
+    except RateLimitExceeded:
+        # Our own limit, not an OpenAI failure
+        openai_breaker.release_trial()
+        raise
+    except Exception:
+        openai_breaker.record_failure()
+        raise
+
+    openai_breaker.record_success()
+    return response.choices[0].text.strip()
@@ -0,0 +1,91 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db.models import Max
+from django.utils import timezone
+
+from trips.metrics import caller, submit_with_caller
+from trips.models import Trip, DailyForecast, ForecastPrefetchRun
+from trips.outfit_cache import prune_outfit_cache
+from trips.weather import forecast_key, fetch_forecast, store_daily_forecasts
+
+# OpenWeather's free forecast covers the next 5 days
+FORECAST_WINDOW_DAYS = 5
+
+
+def timed_fetch(key):
+    started = time.monotonic()
+    try:
+        return key, fetch_forecast(*key), time.monotonic() - started
+    except (requests.exceptions.RequestException, KeyError, ValueError):
+        return key, None, time.monotonic() - started
+
+
+def prefetch_forecasts():
+    """
+    Warm the DailyForecast store for every trip starting inside the forecast
+    window, fetching each rounded location once no matter how many trips share it,
+    and trim the stored forecasts and the outfit response cache.
+    """
+    with caller('cron:prefetch_forecasts'):
+        return _prefetch_forecasts()
+
+
+def _prefetch_forecasts():
+    started = time.monotonic()
+    today = timezone.localdate()
+
+    trips = Trip.objects.filter(
+        start_date__lte=today + timedelta(days=FORECAST_WINDOW_DAYS),
+        end_date__gte=today,
+    ).values_list('latitude', 'longitude')
+    trips = list(trips)
+    locations = sorted({forecast_key(latitude, longitude) for latitude, longitude in trips})
+
+    # Refresh anything that would go stale before the next run
+    interval = settings.FORECAST_PREFETCH_INTERVAL * 60
+    refresh_before = timezone.now() - timedelta(seconds=max(settings.WEATHER_CACHE_TTL - interval, 0))
+    last_fetched = {
+        (float(row['latitude']), float(row['longitude'])): row['fetched_at']
+        for row in DailyForecast.objects.filter(date__gte=today)
+        .values('latitude', 'longitude')
+        .annotate(fetched_at=Max('fetched_at'))
+    }
+    stale = [key for key in locations if key not in last_fetched or last_fetched[key] < refresh_before]
+
+    fetched = failed = 0
+    timings = []
+    batch_size = settings.FORECAST_PREFETCH_BATCH_SIZE
+    with ThreadPoolExecutor(max_workers=settings.FORECAST_PREFETCH_CONCURRENCY) as executor:
+        for i in range(0, len(stale), batch_size):
+            batch = stale[i:i + batch_size]
+            # Network calls run concurrently; DB writes stay on this thread
+            futures = [submit_with_caller(executor, timed_fetch, key) for key in batch]
+            for key, weather_data, elapsed in (future.result() for future in futures):
+                timings.append(elapsed)
+                if weather_data is None:
+                    failed += 1
+                    continue
+                try:
+                    store_daily_forecasts(key, weather_data)
+                    fetched += 1
+                except (KeyError, ValueError, TypeError):
+                    failed += 1
+
+    # Past days are never read again
+    DailyForecast.objects.filter(date__lt=today - timedelta(days=1)).delete()
+    prune_outfit_cache()
+
+    return ForecastPrefetchRun.objects.create(
+        duration=time.monotonic() - started,
+        trips_count=len(trips),
+        locations_count=len(locations),
+        fetched_count=fetched,
+        fresh_count=len(locations) - len(stale),
+        failed_count=failed,
+        fetch_seconds_avg=sum(timings) / len(timings) if timings else 0,
+        fetch_seconds_max=max(timings, default=0),
+    )
@@ -0,0 +1,39 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from trips.api_client import complete
+from trips.geocoding import normalize_destination
+from trips.models import CulturalNotes
+
+UNAVAILABLE = "Cultural information not available."
+
+
+def cultural_prompt(destination):
+    return (
+        f"Provide very brief cultural dress tips for visitors to {destination} in 2-3 bullet points max.\n"
+        "Format as bullet points with dash prefix."
+    )
+
+
+def get_cultural_notes(destination):
+    """
+    Return cultural dress tips for a destination from the CulturalNotes table,
+    asking the LLM only when there is no entry or it is older than
+    CULTURAL_NOTES_TTL. If that call fails the old notes are kept; with no
+    notes at all a placeholder is returned.
+    """
+    key = normalize_destination(destination)
+    entry = CulturalNotes.objects.filter(destination=key).first()
+    fresh_after = timezone.now() - timedelta(seconds=settings.CULTURAL_NOTES_TTL)
+    if entry is not None and entry.updated_at >= fresh_after:
+        return entry.notes
+
+    try:
+        notes = complete(cultural_prompt(destination), max_tokens=100)
+    except Exception:
+        return entry.notes if entry is not None else UNAVAILABLE
+
+    CulturalNotes.objects.update_or_create(destination=key, defaults={'notes': notes})
+    return notes
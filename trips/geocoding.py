@@ -0,0 +1,69 @@
+import os
+import re
+from functools import lru_cache
+
+from django.conf import settings
+
+from trips.api_client import openweather
+from trips.models import GeocodedLocation
+
+GEOCODING_URL = f"{settings.OPENWEATHER_BASE_URL}/geo/1.0/direct"
+
+
+class LocationNotFound(Exception):
+    """Raised when neither the local table nor OpenWeather knows a destination"""
+
+
+def normalize_destination(destination):
+    """Lowercase, collapse whitespace and tidy commas so 'Paris,  FR ' == 'paris, fr'"""
+    text = ' '.join(destination.casefold().split())
+    text = re.sub(r'\s*,\s*', ', ', text)
+    return text.strip(' ,')
+
+
+@lru_cache(maxsize=settings.GEOCODING_MEMO_SIZE)
+def _resolve(query):
+    # Only successful lookups are memoized; LocationNotFound propagates uncached
+    location = GeocodedLocation.objects.filter(query=query).first()
+    if location is not None:
+        return location.latitude, location.longitude
+
+    params = {'q': query, 'limit': 1, 'appid': os.environ['OPENWEATHER_API_KEY']}
+    response = openweather.get(GEOCODING_URL, params=params, endpoint='geocoding')
+    location_data = response.json()
+
+    if not location_data:
+        raise LocationNotFound(query)
+
+    location, _ = GeocodedLocation.objects.get_or_create(
+        query=query,
+        defaults={
+            'name': location_data[0].get('name', query),
+            'country': location_data[0].get('country', ''),
+            'latitude': location_data[0]['lat'],
+            'longitude': location_data[0]['lon'],
+            'source': 'api',
+        }
+    )
+    return location.latitude, location.longitude
+
+
+def geocode(destination):
+    """
+    Return (latitude, longitude) for a destination, or None if it can't be found.
+
+    Lookups go through an in-process memo, then the GeocodedLocation table
+    (seeded by ``manage.py load_gazetteer``), and only then OpenWeather.
+    Raises RequestException if the API has to be called and fails.
+    """
+    query = normalize_destination(destination)
+    if not query:
+        return None
+    try:
+        return _resolve(query)
+    except LocationNotFound:
+        return None
+
+
+def clear_geocoding_memo():
+    _resolve.cache_clear()
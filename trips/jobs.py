@@ -0,0 +1,194 @@
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from trips.metrics import caller
+from trips.models import GenerationJob
+from trips.outfits import generate_outfits_for_trips
+from trips.packing import build_smart_packing_list
+
+
+class JobError(Exception):
+    """Raised by a job handler when the job should be retried"""
+
+
+def run_outfits_jobs(trips):
+    """
+    Generate outfits for all of ``trips`` in one generate_outfits_for_trips
+    call, so their weather lookups and LLM calls fan out together. Returns
+    {trip id: result}, with a JobError for each trip that should be retried.
+    """
+    result = generate_outfits_for_trips(trips)
+    outcomes = {}
+    for trip in trips:
+        if trip.id in result['errors']:
+            outcomes[trip.id] = JobError(result['errors'][trip.id])
+        elif trip.id in result['timed_out']:
+            # Finished days are saved; a retry only generates the rest
+            outcomes[trip.id] = JobError(f"{result['timed_out'][trip.id]} day(s) timed out")
+        else:
+            outcomes[trip.id] = {
+                'generated': trip.id in result['generated'],
+                'message': 'Outfit recommendations generated successfully!',
+            }
+    return outcomes
+
+
+def run_smart_packing_jobs(trips):
+    return {trip.id: {'message': build_smart_packing_list(trip)} for trip in trips}
+
+
+HANDLERS = {
+    GenerationJob.OUTFITS: run_outfits_jobs,
+    GenerationJob.SMART_PACKING: run_smart_packing_jobs,
+}
+
+
+def enqueue_generation_job(trip, kind):
+    """
+    Queue a generation job for a trip, or return the one already queued or
+    running. Enqueueing is idempotent so repeat page loads and double
+    submits don't pile up duplicate work.
+    """
+    existing = GenerationJob.objects.filter(
+        trip=trip, kind=kind, status__in=GenerationJob.ACTIVE_STATUSES
+    ).first()
+    if existing is not None:
+        return existing
+
+    try:
+        with transaction.atomic():
+            return GenerationJob.objects.create(
+                trip=trip, kind=kind, max_attempts=settings.GENERATION_JOB_MAX_ATTEMPTS
+            )
+    except IntegrityError:
+        # Another request queued it between the lookup and the insert
+        return GenerationJob.objects.get(
+            trip=trip, kind=kind, status__in=GenerationJob.ACTIVE_STATUSES
+        )
+
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+def claim_job(worker):
+    """
+    Atomically take the oldest runnable job, or return None.
+
+    Runnable means queued and due, or running under a lock older than
+    GENERATION_JOB_LOCK_TIMEOUT (its worker died). The status/lock check in
+    the UPDATE makes sure only one worker wins each job.
+    """
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=settings.GENERATION_JOB_LOCK_TIMEOUT)
+    runnable = GenerationJob.objects.filter(
+        Q(status=GenerationJob.QUEUED, run_after__lte=now)
+        | Q(status=GenerationJob.RUNNING, locked_at__lt=stale_before)
+    ).order_by('run_after', 'id')
+
+    for job in runnable[:10]:
+        claimed = GenerationJob.objects.filter(
+            id=job.id, status=job.status, locked_at=job.locked_at
+        ).update(
+            status=GenerationJob.RUNNING,
+            locked_by=worker,
+            locked_at=now,
+            attempts=F('attempts') + 1,
+            updated_at=now,
+        )
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def claim_user_outfit_jobs(job):
+    """
+    Claim up to GENERATION_JOB_MAX_OUTFIT_TRIPS - 1 more queued, due outfits
+    jobs of ``job``'s user for the worker holding ``job``, and return them.
+    A "generate all outfits" request queues one job per trip; running them
+    together lets generate_outfits_for_trips fan out over all the trips.
+    """
+    now = timezone.now()
+    ids = list(
+        GenerationJob.objects.filter(
+            kind=GenerationJob.OUTFITS, status=GenerationJob.QUEUED, run_after__lte=now,
+            trip__user_id=job.trip.user_id,
+        ).exclude(id=job.id).order_by('run_after', 'id').values_list('id', flat=True)[
+            :settings.GENERATION_JOB_MAX_OUTFIT_TRIPS - 1
+        ]
+    )
+    if not ids:
+        return []
+
+    # As in claim_job, the status check makes sure only one worker wins each job
+    GenerationJob.objects.filter(id__in=ids, status=GenerationJob.QUEUED).update(
+        status=GenerationJob.RUNNING,
+        locked_by=job.locked_by,
+        locked_at=now,
+        attempts=F('attempts') + 1,
+        updated_at=now,
+    )
+    return list(
+        GenerationJob.objects.filter(
+            id__in=ids, status=GenerationJob.RUNNING, locked_by=job.locked_by, locked_at=now
+        ).select_related('trip')
+    )
+
+
+def run_job(job):
+    """
+    Run a claimed job and record success, a scheduled retry or final failure.
+    An outfits job takes the user's other due outfits jobs along (see
+    claim_user_outfit_jobs). Returns every job that ran.
+    """
+    if job.attempts > job.max_attempts:
+        # Reclaimed from a dead worker after its last attempt
+        finish_job(job, GenerationJob.FAILED, error=job.error or 'Worker stopped while running the job')
+        return [job]
+
+    jobs = [job]
+    if job.kind == GenerationJob.OUTFITS:
+        jobs += claim_user_outfit_jobs(job)
+
+    try:
+        with caller(f'job:{job.kind}', user_id=job.trip.user_id):
+            outcomes = HANDLERS[job.kind]([queued.trip for queued in jobs])
+    except Exception as e:
+        outcomes = {queued.trip_id: e for queued in jobs}
+
+    for queued in jobs:
+        record_outcome(queued, outcomes[queued.trip_id])
+    return jobs
+
+
+def record_outcome(job, outcome):
+    if not isinstance(outcome, Exception):
+        finish_job(job, GenerationJob.SUCCEEDED, result=outcome)
+    elif job.attempts >= job.max_attempts:
+        finish_job(job, GenerationJob.FAILED, error=str(outcome))
+    else:
+        delay = settings.GENERATION_JOB_RETRY_BACKOFF * 2 ** (job.attempts - 1)
+        job.status = GenerationJob.QUEUED
+        job.error = str(outcome)
+        job.run_after = timezone.now() + timedelta(seconds=delay)
+        job.locked_by = ''
+        job.locked_at = None
+        job.save(update_fields=['status', 'error', 'run_after', 'locked_by', 'locked_at', 'updated_at'])
+
+
+def finish_job(job, status, result=None, error=''):
+    job.status = status
+    job.result = result
+    job.error = error
+    job.locked_by = ''
+    job.locked_at = None
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'result', 'error', 'locked_by', 'locked_at', 'finished_at', 'updated_at'])
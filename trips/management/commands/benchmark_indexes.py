@@ -0,0 +1,183 @@
+import os
+import random
+import tempfile
+import time
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from trips.models import OutfitRecommendation, PackingListItem, Trip
+
+BEFORE_MIGRATION = '0015_packinglistitem_unique'
+AFTER_MIGRATION = '0016_hot_lookup_indexes'
+CATEGORIES = ['Clothing', 'Toiletries', 'Documents', 'Electronics', 'Accessories', 'Miscellaneous']
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare query plans and timings of the hot trip, outfit and packing list "
+        f"lookups before ({BEFORE_MIGRATION}) and after ({AFTER_MIGRATION}) the "
+        "composite indexes, on a synthetic dataset in a throwaway SQLite database. "
+        "The project database is not touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=500)
+        parser.add_argument('--trips-per-user', type=int, default=20)
+        parser.add_argument('--days', type=int, default=7,
+                            help='Outfit recommendations per trip')
+        parser.add_argument('--items', type=int, default=30,
+                            help='Packing list items per trip')
+        parser.add_argument('--repeat', type=int, default=500,
+                            help='Timed runs of each query (with different ids)')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--keep', action='store_true',
+                            help="Keep the benchmark database file instead of deleting it")
+
+    def handle(self, *args, **options):
+        connection = connections['default']
+        if connection.vendor != 'sqlite':
+            raise CommandError("The index benchmark runs against SQLite only")
+
+        # Point the default connection at a scratch file for the run, the way
+        # the test runner swaps in its test database
+        fd, path = tempfile.mkstemp(prefix='travelmate-index-benchmark-', suffix='.sqlite3')
+        os.close(fd)
+        original_name = connection.settings_dict['NAME']
+        connection.close()
+        connection.settings_dict['NAME'] = path
+        self.rng = random.Random(options['seed'])
+
+        try:
+            # Everything up to date, then the trips schema rolled back to before the indexes
+            call_command('migrate', verbosity=0)
+            call_command('migrate', 'trips', BEFORE_MIGRATION, verbosity=0)
+            started = time.monotonic()
+            self.populate(options)
+            self.stdout.write(f"Built the dataset in {time.monotonic() - started:.1f}s")
+
+            samples = self.sample(options['repeat'])
+            before = self.run_queries(f"Before ({BEFORE_MIGRATION})", samples)
+            call_command('migrate', 'trips', AFTER_MIGRATION, verbosity=0)
+            after = self.run_queries(f"After ({AFTER_MIGRATION})", samples)
+
+            self.stdout.write("\nSummary (ms per query)")
+            for label in before:
+                speedup = before[label] / after[label] if after[label] else float('inf')
+                self.stdout.write(f"  {label:<32} {before[label]:>8.3f} -> {after[label]:>8.3f}  ({speedup:.1f}x)")
+        finally:
+            connection.close()
+            connection.settings_dict['NAME'] = original_name
+            if options['keep']:
+                self.stdout.write(f"\nBenchmark database kept at {path}")
+            else:
+                os.remove(path)
+
+    def populate(self, options):
+        users = User.objects.bulk_create(
+            [User(username=f'benchmark{i}') for i in range(options['users'])], batch_size=2000
+        )
+
+        # Trips of each user are interleaved, as they would be in a real table
+        start = date(2025, 1, 1)
+        trips = []
+        for _ in range(options['users'] * options['trips_per_user']):
+            trip_start = start + timedelta(days=self.rng.randrange(365))
+            trips.append(Trip(
+                user=self.rng.choice(users), destination='Benchmark City', latitude=0, longitude=0,
+                start_date=trip_start, end_date=trip_start + timedelta(days=options['days'] - 1),
+            ))
+        trips = Trip.objects.bulk_create(trips, batch_size=2000)
+        with connections['default'].cursor() as cursor:
+            # auto_now_add gave every trip the same timestamp; spread them over a year
+            cursor.execute(
+                "UPDATE trips_trip SET created_at = datetime(created_at, '-' || (abs(random()) % 31536000) || ' seconds')"
+            )
+
+        OutfitRecommendation.objects.bulk_create(
+            (
+                OutfitRecommendation(
+                    trip=trip, day=trip.start_date + timedelta(days=offset),
+                    weather_condition='Clear', temperature=65, outfit_description='- T-shirt\n- Jeans',
+                )
+                for trip in trips
+                for offset in range(options['days'])
+            ),
+            batch_size=5000,
+        )
+        PackingListItem.objects.bulk_create(
+            (
+                PackingListItem(
+                    trip=trip, name=f'Item {number}', category=CATEGORIES[number % len(CATEGORIES)],
+                    is_packed=self.rng.random() < 0.4, is_auto_generated=True,
+                )
+                for trip in trips
+                for number in range(options['items'])
+            ),
+            batch_size=5000,
+        )
+        self.days = options['days']
+        self.items = options['items']
+
+    def sample(self, count):
+        user_ids = list(User.objects.values_list('id', flat=True))
+        trips = list(Trip.objects.values_list('id', 'start_date'))
+        samples = []
+        for _ in range(count):
+            trip_id, start_date = self.rng.choice(trips)
+            number = self.rng.randrange(self.items)
+            samples.append({
+                'user_id': self.rng.choice(user_ids),
+                'trip_id': trip_id,
+                'day': start_date + timedelta(days=self.rng.randrange(self.days)),
+                'name': f'Item {number}',
+                'category': CATEGORIES[number % len(CATEGORIES)],
+            })
+        return samples
+
+    def queries(self):
+        # (label, queryset for a sample); timings run the compiled SQL directly
+        # so ORM overhead doesn't hide the difference
+        return [
+            ("My trips (user, -created_at)",
+             lambda s: Trip.objects.filter(user_id=s['user_id']).order_by('-created_at')),
+            ("Trip outfits (trip, day)",
+             lambda s: OutfitRecommendation.objects.filter(trip_id=s['trip_id']).order_by('day')),
+            ("Outfit for a day",
+             lambda s: OutfitRecommendation.objects.filter(trip_id=s['trip_id'], day=s['day'])),
+            ("Packing item lookup",
+             lambda s: PackingListItem.objects.filter(trip_id=s['trip_id'], name=s['name'], category=s['category'])),
+            ("Packed count (trip, is_packed)",
+             lambda s: PackingListItem.objects.filter(trip_id=s['trip_id'], is_packed=True)
+             .order_by().values('id')),
+        ]
+
+    def run_queries(self, title, samples):
+        with connections['default'].cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        self.stdout.write(f"\n{title}")
+        timings = {}
+        for label, make_queryset in self.queries():
+            plan = make_queryset(samples[0]).explain()
+            statements = [make_queryset(sample).query.sql_with_params() for sample in samples]
+
+            with connections['default'].cursor() as cursor:
+                # Warm the page cache so both runs measure the plan, not the disk
+                for sql, params in statements[:20]:
+                    cursor.execute(sql, params)
+                    cursor.fetchall()
+
+                started = time.perf_counter()
+                for sql, params in statements:
+                    cursor.execute(sql, params)
+                    cursor.fetchall()
+                timings[label] = (time.perf_counter() - started) * 1000 / len(statements)
+
+            self.stdout.write(f"  {label}: {timings[label]:.3f} ms")
+            for line in plan.splitlines():
+                self.stdout.write(f"      {line}")
+        return timings
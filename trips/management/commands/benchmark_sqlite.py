@@ -0,0 +1,232 @@
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import date
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections, connection, connections
+from django.db.models import Count, Q
+
+from trips.models import PackingListItem, Trip
+from trips.packing_writes import PackingWriteQueue, submit_packing_write
+
+CATEGORIES = ['Clothing', 'Toiletries', 'Documents', 'Electronics', 'Accessories', 'Miscellaneous']
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure concurrent read/write throughput of the packing list endpoints on "
+        "the default SQLite profile and on DATABASE_PROFILE=production (WAL, tuned "
+        "pragmas, persistent connections), toggling items with a read and save(), "
+        "with a read and a compare-and-set UPDATE (what toggle_packed_status does "
+        "by default) and with group-committed writes (PACKING_WRITE_WINDOW_MS), each on a copy of "
+        "the same synthetic dataset in a throwaway database. The project database "
+        "is not touched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=8,
+                            help='Threads loading packing lists and their stats')
+        parser.add_argument('--writers', type=int, default=4,
+                            help='Threads toggling packed items')
+        parser.add_argument('--duration', type=float, default=5,
+                            help='Seconds to run each profile for')
+        parser.add_argument('--trips', type=int, default=50)
+        parser.add_argument('--items', type=int, default=40,
+                            help='Packing list items per trip')
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument('--window-ms', type=float, default=10,
+                            help='Group commit window for the coalesced runs')
+
+    def handle(self, *args, **options):
+        db = connections['default'].settings_dict
+        if db['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError("The SQLite benchmark runs against SQLite only")
+
+        # Every thread opens its connection from this same settings dict, so
+        # swapping its values switches the profile for all of them (as in
+        # benchmark_indexes, the way the test runner swaps in its database)
+        original = {key: db.get(key) for key in ('NAME', 'OPTIONS', 'CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+        default_options = {
+            key: value for key, value in original['OPTIONS'].items()
+            if key not in settings.SQLITE_PRODUCTION_OPTIONS
+        }
+        default_profile = {
+            'OPTIONS': default_options, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False,
+        }
+        production_profile = {
+            'OPTIONS': {**default_options, **settings.SQLITE_PRODUCTION_OPTIONS},
+            'CONN_MAX_AGE': settings.SQLITE_PRODUCTION_CONN_MAX_AGE, 'CONN_HEALTH_CHECKS': True,
+        }
+        # (name, profile, how toggles are written)
+        scenarios = [
+            ('default/save', default_profile, 'save'),
+            ('default/update', default_profile, 'update'),
+            ('default/coalesced', default_profile, 'coalesced'),
+            ('production/save', production_profile, 'save'),
+            ('production/update', production_profile, 'update'),
+            ('production/coalesced', production_profile, 'coalesced'),
+        ]
+
+        directory = tempfile.mkdtemp(prefix='travelmate-sqlite-benchmark-')
+        seed_path = os.path.join(directory, 'seed.sqlite3')
+        connection.close()
+        self.rng = random.Random(options['seed'])
+
+        try:
+            db.update(NAME=seed_path, **default_profile)
+            call_command('migrate', verbosity=0)
+            self.populate(options)
+            connection.close()
+
+            results = {}
+            for name, profile, write_mode in scenarios:
+                path = os.path.join(directory, f"{name.replace('/', '-')}.sqlite3")
+                shutil.copyfile(seed_path, path)
+                db.update(NAME=path, **profile)
+                results[name] = self.run_profile(name, options, write_mode)
+                connection.close()
+
+            self.stdout.write("\nSummary")
+            self.stdout.write(f"  {'':<18}" + ''.join(f"{name:>22}" for name in results))
+            for label in results['default/save']:
+                self.stdout.write(
+                    f"  {label:<18}" + ''.join(f"{result[label]:>22.1f}" for result in results.values())
+                )
+        finally:
+            connection.close()
+            db.update(original)
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def populate(self, options):
+        user = User.objects.create(username='benchmark')
+        trips = Trip.objects.bulk_create(
+            Trip(
+                user=user, destination='Benchmark City', latitude=0, longitude=0,
+                start_date=date(2025, 1, 1), end_date=date(2025, 1, 7),
+            )
+            for _ in range(options['trips'])
+        )
+        PackingListItem.objects.bulk_create(
+            (
+                PackingListItem(
+                    trip=trip, name=f'Item {number}', category=CATEGORIES[number % len(CATEGORIES)],
+                    is_packed=self.rng.random() < 0.4, is_auto_generated=True,
+                )
+                for trip in trips
+                for number in range(options['items'])
+            ),
+            batch_size=5000,
+        )
+
+    def run_profile(self, name, options, write_mode):
+        user_id = User.objects.get(username='benchmark').id
+        trip_ids = list(Trip.objects.values_list('id', flat=True))
+        items = list(PackingListItem.objects.values_list('id', 'trip_id'))
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode')
+            journal_mode = cursor.fetchone()[0]
+        connection.close()
+
+        deadline = time.monotonic() + options['duration']
+        latencies = {'read': [], 'write': []}
+        errors = []
+        lock = threading.Lock()
+
+        def read(rng):
+            # What the packing list page and its stats endpoint load
+            trip_id = rng.choice(trip_ids)
+            list(PackingListItem.objects.filter(trip_id=trip_id))
+            list(
+                PackingListItem.objects.filter(trip_id=trip_id).values('category')
+                .annotate(total=Count('id'), packed=Count('id', filter=Q(is_packed=True)))
+                .order_by()
+            )
+
+        queue = PackingWriteQueue(window=options['window_ms'] / 1000, max_batch=settings.PACKING_WRITE_MAX_BATCH)
+
+        def save_write(rng):
+            # What toggle_packed_status used to do: read the item, save every column
+            item_id, trip_id = rng.choice(items)
+            item = PackingListItem.objects.get(id=item_id, trip_id=trip_id, trip__user_id=user_id)
+            item.is_packed = not item.is_packed
+            item.save()
+
+        def update_write(rng):
+            # What toggle_packed_status does with PACKING_WRITE_WINDOW_MS=0
+            item_id, trip_id = rng.choice(items)
+            submit_packing_write(trip_id, item_id, user_id, toggle=True)
+
+        def coalesced_write(rng):
+            item_id, trip_id = rng.choice(items)
+            submit_packing_write(trip_id, item_id, user_id, toggle=True, queue=queue)
+
+        write = {'save': save_write, 'update': update_write, 'coalesced': coalesced_write}[write_mode]
+
+        def worker(kind, operation, seed):
+            rng = random.Random(seed)
+            timings = []
+            failures = 0
+            try:
+                while time.monotonic() < deadline:
+                    # Each operation stands for one request: connections are
+                    # closed afterwards unless CONN_MAX_AGE keeps them open
+                    close_old_connections()
+                    started = time.perf_counter()
+                    try:
+                        operation(rng)
+                    except OperationalError:
+                        failures += 1
+                        continue
+                    finally:
+                        close_old_connections()
+                    timings.append(time.perf_counter() - started)
+            finally:
+                connection.close()
+                with lock:
+                    latencies[kind].extend(timings)
+                    errors.append(failures)
+
+        threads = [
+            threading.Thread(target=worker, args=('read', read, self.rng.random()))
+            for _ in range(options['readers'])
+        ] + [
+            threading.Thread(target=worker, args=('write', write, self.rng.random()))
+            for _ in range(options['writers'])
+        ]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        # Each transaction takes the writer lock once
+        write_transactions = queue.batches if write_mode == 'coalesced' else len(latencies['write'])
+
+        result = {
+            'reads/s': len(latencies['read']) / elapsed,
+            'writes/s': len(latencies['write']) / elapsed,
+            'read p95 ms': self.percentile(latencies['read'], 0.95) * 1000,
+            'write p95 ms': self.percentile(latencies['write'], 0.95) * 1000,
+            'write transactions': write_transactions,
+            'locked errors': sum(errors),
+        }
+        self.stdout.write(
+            f"\n{name} (journal_mode={journal_mode}, CONN_MAX_AGE={connection.settings_dict['CONN_MAX_AGE']}, "
+            f"{options['readers']} readers, {options['writers']} writers, {elapsed:.1f}s)"
+        )
+        for label, value in result.items():
+            self.stdout.write(f"  {label:<18} {value:>9.1f}")
+        return result
+
+    def percentile(self, values, fraction):
+        if not values:
+            return 0
+        values = sorted(values)
+        return values[min(len(values) - 1, int(len(values) * fraction))]
@@ -0,0 +1,108 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from trips.geocoding import normalize_destination
+from trips.models import GeocodedLocation
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-load a local gazetteer into the geocoding table so common destinations "
+        "resolve without calling OpenWeather. Accepts a CSV with name, latitude, "
+        "longitude and optional country columns, or a GeoNames cities dump "
+        "(e.g. cities15000.txt)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the gazetteer file')
+        parser.add_argument(
+            '--format', choices=['csv', 'geonames'], default=None,
+            help='File format (default: guessed from the file extension)'
+        )
+        parser.add_argument(
+            '--replace', action='store_true',
+            help='Overwrite coordinates already stored for a destination'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('geonames' if path.endswith('.txt') else 'csv')
+
+        try:
+            with open(path, newline='', encoding='utf-8') as f:
+                if file_format == 'geonames':
+                    rows = self.read_geonames(f)
+                else:
+                    rows = self.read_csv(f)
+                locations = self.build_locations(rows)
+        except OSError as e:
+            raise CommandError(f"Could not read {path}: {e}")
+        except (KeyError, ValueError, IndexError) as e:
+            raise CommandError(f"Malformed gazetteer file {path}: {e}")
+
+        if options['replace']:
+            GeocodedLocation.objects.bulk_create(
+                locations,
+                batch_size=options['batch_size'],
+                update_conflicts=True,
+                unique_fields=['query'],
+                update_fields=['name', 'country', 'latitude', 'longitude', 'source'],
+            )
+        else:
+            GeocodedLocation.objects.bulk_create(
+                locations, batch_size=options['batch_size'], ignore_conflicts=True
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Loaded {len(locations)} gazetteer entries from {path}"))
+
+    def read_csv(self, f):
+        for row in csv.DictReader(f):
+            yield {
+                'name': row['name'],
+                'country': row.get('country', '') or '',
+                'latitude': float(row['latitude']),
+                'longitude': float(row['longitude']),
+                'population': int(row.get('population') or 0),
+                'aliases': [],
+            }
+
+    def read_geonames(self, f):
+        # http://download.geonames.org/export/dump/readme.txt
+        for line in f:
+            fields = line.rstrip('\n').split('\t')
+            yield {
+                'name': fields[1],
+                'country': fields[8],
+                'latitude': float(fields[4]),
+                'longitude': float(fields[5]),
+                'population': int(fields[14] or 0),
+                'aliases': [fields[2]],
+            }
+
+    def build_locations(self, rows):
+        """
+        Expand each place into its lookup keys ("paris" and "paris, fr").
+        When several places share a key the most populous one wins, which
+        matches what OpenWeather returns for an ambiguous name.
+        """
+        best = {}
+        for row in sorted(rows, key=lambda r: r['population'], reverse=True):
+            names = [row['name']] + row['aliases']
+            keys = []
+            for name in names:
+                keys.append(normalize_destination(name))
+                if row['country']:
+                    keys.append(normalize_destination(f"{name}, {row['country']}"))
+            for key in keys:
+                if key and key not in best:
+                    best[key] = GeocodedLocation(
+                        query=key[:200],
+                        name=row['name'],
+                        country=row['country'],
+                        latitude=row['latitude'],
+                        longitude=row['longitude'],
+                        source='gazetteer',
+                    )
+        return list(best.values())
@@ -0,0 +1,236 @@
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from django.core.management.base import BaseCommand, CommandError
+
+CONDITIONS = [
+    (800, 'Clear'),
+    (802, 'Clouds'),
+    (500, 'Rain'),
+    (600, 'Snow'),
+    (701, 'Mist'),
+]
+
+
+def seeded_random(*parts):
+    """Deterministic RNG so the same location/prompt always gets the same answer"""
+    digest = hashlib.sha256('|'.join(str(part) for part in parts).encode()).hexdigest()
+    return random.Random(int(digest[:16], 16))
+
+
+def fake_geocoding(query):
+    rng = seeded_random('geo', query.casefold())
+    return [{
+        'name': query.split(',')[0].strip().title(),
+        'lat': round(rng.uniform(-60, 70), 4),
+        'lon': round(rng.uniform(-180, 180), 4),
+        'country': 'ZZ',
+    }]
+
+
+def fake_forecast(lat, lon):
+    """40 three-hour entries starting at the current 3-hour slot, like the real API"""
+    rng = seeded_random('forecast', round(float(lat), 2), round(float(lon), 2))
+    now = int(time.time())
+    start = now - now % 10800
+    base_temp = rng.uniform(20, 90)
+    entries = []
+    for i in range(40):
+        condition_id, main = rng.choice(CONDITIONS)
+        temp = round(base_temp + rng.uniform(-8, 8), 2)
+        entry = {
+            'dt': start + i * 10800,
+            'main': {'temp': temp, 'feels_like': round(temp - rng.uniform(0, 4), 2), 'humidity': rng.randint(30, 95)},
+            'wind': {'speed': round(rng.uniform(0, 20), 2)},
+            'clouds': {'all': rng.randint(0, 100)},
+            'pop': round(rng.random(), 2),
+            'weather': [{'id': condition_id, 'main': main}],
+        }
+        if main == 'Rain':
+            entry['rain'] = {'3h': round(rng.uniform(0.1, 5), 2)}
+        entries.append(entry)
+    return {'cod': '200', 'cnt': len(entries), 'list': entries, 'city': {'timezone': 0}}
+
+
+def fake_outfit_items(temp, rng):
+    if temp < 45:
+        items = ['Thermal base layer', 'Wool sweater', 'Winter coat', 'Jeans', 'Boots', 'Scarf']
+    elif temp < 65:
+        items = ['Long-sleeve shirt', 'Light jacket', 'Jeans', 'Sneakers']
+    else:
+        items = ['T-shirt', 'Shorts', 'Sandals', 'Sunglasses', 'Hat']
+    rng.shuffle(items)
+    return items
+
+
+def fake_completion_text(prompt):
+    rng = seeded_random('completion', prompt)
+    # Batched trip outfits (trips.outfits.trip_outfits_prompt): one
+    # "YYYY-MM-DD: 70°F, ..." line per day, answered with {date: [items]}
+    days = re.findall(r'^(\d{4}-\d{2}-\d{2}): (-?[\d.]+)°F', prompt, re.MULTILINE)
+    if days:
+        return json.dumps({day: fake_outfit_items(float(temp), rng) for day, temp in days})
+    if 'JSON' in prompt:
+        return json.dumps({
+            'Clothing': ['T-shirt', 'Jeans'],
+            'Toiletries': ['Toothbrush', 'Sunscreen'],
+            'Electronics': ['Phone Charger'],
+            'Miscellaneous': ['Water Bottle'],
+        })
+    if 'cultural' in prompt.lower():
+        return '- Dress modestly at religious sites\n- Smart casual is common for dinner'
+
+    match = re.search(r'temperature (-?[\d.]+)', prompt)
+    temp = float(match.group(1)) if match else 65
+    return '\n'.join(f'- {item}' for item in fake_outfit_items(temp, rng))
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    server_version = 'TravelMateStandin/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+
+        if url.path == '/geo/1.0/direct':
+            query = params.get('q', '')
+            self.respond('geocoding', lambda: self.server.fixtures['geocoding'].get(query.casefold()) or fake_geocoding(query))
+        elif url.path == '/data/2.5/forecast':
+            key = f"{round(float(params.get('lat', 0)), 2)},{round(float(params.get('lon', 0)), 2)}"
+            self.respond('forecast', lambda: self.server.fixtures['forecast'].get(key) or fake_forecast(params.get('lat', 0), params.get('lon', 0)))
+        else:
+            self.send_json(404, {'cod': '404', 'message': 'Not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path.rstrip('/') != '/v1/completions':
+            self.send_json(404, {'error': {'message': 'Not found'}})
+            return
+
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        prompt = body.get('prompt', '')
+        if isinstance(prompt, list):
+            prompt = '\n'.join(prompt)
+
+        def completion():
+            text = next(
+                (fixture['text'] for fixture in self.server.fixtures['completions'] if fixture['match'] in prompt),
+                None
+            ) or fake_completion_text(prompt)
+            prompt_tokens = max(len(prompt) // 4, 1)
+            completion_tokens = max(len(text) // 4, 1)
+            return {
+                'id': f'cmpl-standin-{int(time.time() * 1000)}',
+                'object': 'text_completion',
+                'created': int(time.time()),
+                'model': body.get('model', 'standin'),
+                'choices': [{'text': text, 'index': 0, 'logprobs': None, 'finish_reason': 'stop'}],
+                'usage': {
+                    'prompt_tokens': prompt_tokens,
+                    'completion_tokens': completion_tokens,
+                    'total_tokens': prompt_tokens + completion_tokens,
+                },
+            }
+
+        self.respond('completions', completion)
+
+    def respond(self, endpoint, build):
+        server = self.server
+        with server.stats_lock:
+            server.stats[endpoint] = server.stats.get(endpoint, 0) + 1
+
+        latency = server.latency[endpoint] + random.uniform(-server.jitter, server.jitter)
+        time.sleep(max(latency, 0) / 1000)
+
+        if random.random() < server.error_rate:
+            with server.stats_lock:
+                server.stats['errors'] = server.stats.get('errors', 0) + 1
+            self.send_json(server.error_status, {'cod': str(server.error_status), 'message': 'Injected failure'})
+            return
+
+        self.send_json(200, build())
+
+    def send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the OpenWeather geocoding/forecast endpoints and the "
+        "OpenAI completions endpoint, for offline load testing. Point the app at it with "
+        "API_STANDIN_URL=http://HOST:PORT."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--weather-latency-ms', type=float, default=150,
+                            help='Mean latency of the geocoding and forecast endpoints')
+        parser.add_argument('--llm-latency-ms', type=float, default=800,
+                            help='Mean latency of the completions endpoint')
+        parser.add_argument('--jitter-ms', type=float, default=50,
+                            help='Latency varies uniformly by +/- this much')
+        parser.add_argument('--error-rate', type=float, default=0.0,
+                            help='Fraction of requests (0-1) that fail with --error-status')
+        parser.add_argument('--error-status', type=int, default=503)
+        parser.add_argument('--fixtures',
+                            help='JSON file of recorded responses to replay: {"geocoding": {"paris": [...]}, '
+                                 '"forecast": {"48.85,2.35": {...}}, "completions": [{"match": "...", "text": "..."}]}')
+        parser.add_argument('--verbose-requests', action='store_true', help='Log every request')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['error_rate'] <= 1:
+            raise CommandError('--error-rate must be between 0 and 1')
+
+        fixtures = {'geocoding': {}, 'forecast': {}, 'completions': []}
+        if options['fixtures']:
+            try:
+                with open(options['fixtures'], encoding='utf-8') as f:
+                    loaded = json.load(f)
+            except (OSError, ValueError) as e:
+                raise CommandError(f"Could not load fixtures: {e}")
+            fixtures['geocoding'] = {key.casefold(): value for key, value in loaded.get('geocoding', {}).items()}
+            fixtures['forecast'] = loaded.get('forecast', {})
+            fixtures['completions'] = loaded.get('completions', [])
+
+        server = ThreadingHTTPServer((options['host'], options['port']), StandinHandler)
+        server.daemon_threads = True
+        server.fixtures = fixtures
+        server.latency = {
+            'geocoding': options['weather_latency_ms'],
+            'forecast': options['weather_latency_ms'],
+            'completions': options['llm_latency_ms'],
+        }
+        server.jitter = options['jitter_ms']
+        server.error_rate = options['error_rate']
+        server.error_status = options['error_status']
+        server.verbose = options['verbose_requests']
+        server.stats = {}
+        server.stats_lock = threading.Lock()
+
+        url = f"http://{options['host']}:{server.server_port}"
+        self.stdout.write(self.style.SUCCESS(f"API stand-in listening on {url}"))
+        self.stdout.write(f"Run the app with API_STANDIN_URL={url} to use it. Ctrl-C to stop.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(f"Requests served: {json.dumps(server.stats)}")
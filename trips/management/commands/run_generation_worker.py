@@ -0,0 +1,64 @@
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+
+from trips.jobs import claim_job, run_job, worker_name
+
+
+class Command(BaseCommand):
+    help = (
+        "Process queued outfit and smart packing list generation jobs. Run one or "
+        "more of these alongside the web server; jobs are claimed atomically so "
+        "any number of workers can share the queue."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=1,
+                            help='Jobs to run at once in this process')
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help='Seconds to sleep when the queue is empty')
+        parser.add_argument('--once', action='store_true',
+                            help='Exit when the queue is empty instead of polling')
+
+    def handle(self, *args, **options):
+        self.stopping = threading.Event()
+        threads = [
+            threading.Thread(target=self.work, args=(options,), name=f'generation-worker-{i}')
+            for i in range(max(options['threads'], 1))
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            for thread in threads:
+                while thread.is_alive():
+                    thread.join(0.5)
+        except KeyboardInterrupt:
+            self.stdout.write("Stopping after the jobs in progress finish...")
+            self.stopping.set()
+            for thread in threads:
+                thread.join()
+
+    def work(self, options):
+        worker = worker_name()
+        try:
+            while not self.stopping.is_set():
+                close_old_connections()
+                job = claim_job(worker)
+                if job is None:
+                    if options['once']:
+                        return
+                    time.sleep(options['poll_interval'])
+                    continue
+
+                started = time.monotonic()
+                for ran in run_job(job):
+                    self.stdout.write(
+                        f"Job {ran.id} ({ran.kind}, trip {ran.trip_id}) {ran.status} "
+                        f"after attempt {ran.attempts} in {time.monotonic() - started:.1f}s"
+                        + (f": {ran.error}" if ran.error else "")
+                    )
+        finally:
+            connection.close()
@@ -0,0 +1,287 @@
+import atexit
+import contextvars
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from trips.models import ExternalCallStats
+
+# Upper bounds (ms) of the latency histogram buckets stored on ExternalCallStats
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000)
+BUCKET_FIELDS = [f'latency_le_{bound}' for bound in LATENCY_BUCKETS_MS] + ['latency_gt_10000']
+COUNTER_FIELDS = [
+    'calls', 'errors', 'rate_limited', 'total_latency_ms', 'queued_calls', 'total_queue_wait_ms',
+    'prompt_tokens', 'completion_tokens',
+] + BUCKET_FIELDS
+
+# The view, job or cron task making external calls in this context, and the
+# user it is working for (used for per-user rate limits)
+current_caller = contextvars.ContextVar('current_caller', default='')
+current_user_id = contextvars.ContextVar('current_user_id', default=None)
+
+
+@contextmanager
+def caller(name, user_id=None):
+    """Attribute external calls made inside the block to ``name`` (and ``user_id``)"""
+    caller_token = current_caller.set(name)
+    user_token = current_user_id.set(user_id)
+    try:
+        yield
+    finally:
+        current_caller.reset(caller_token)
+        current_user_id.reset(user_token)
+
+
+def submit_with_caller(executor, fn, *args):
+    """executor.submit() that keeps the current caller for calls made by ``fn``"""
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+class CallerMiddleware:
+    """Record the resolved view name as the caller of any external calls it makes"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        caller_token = current_caller.set('')
+        user_token = current_user_id.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            current_caller.reset(caller_token)
+            current_user_id.reset(user_token)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        match = request.resolver_match
+        current_caller.set(match.view_name if match else view_func.__name__)
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            current_user_id.set(user.id)
+
+
+def bucket_field(latency_ms):
+    for bound, field in zip(LATENCY_BUCKETS_MS, BUCKET_FIELDS):
+        if latency_ms <= bound:
+            return field
+    return BUCKET_FIELDS[-1]
+
+
+class MetricsRecorder:
+    """
+    Buffers external call measurements in memory and folds them into the
+    hourly ExternalCallStats rows every METRICS_FLUSH_INTERVAL seconds from a
+    background thread. Rows are updated with F() increments so any number of
+    processes can flush into the same hour.
+    """
+
+    def __init__(self, flush_interval):
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flusher = None
+        self._last_prune = 0
+
+    def record(self, upstream, endpoint, latency_ms, status, prompt_tokens=0, completion_tokens=0, queue_wait_ms=0):
+        hour = timezone.now().replace(minute=0, second=0, microsecond=0)
+        key = (hour, upstream, endpoint, current_caller.get() or 'unknown')
+        error = status is None or not 200 <= status < 400
+
+        with self._lock:
+            stats = self._pending.setdefault(key, Counter())
+            stats['calls'] += 1
+            stats['errors'] += int(error)
+            stats['rate_limited'] += int(status == 429)
+            stats['total_latency_ms'] += latency_ms
+            stats['queued_calls'] += int(queue_wait_ms > 0)
+            stats['total_queue_wait_ms'] += queue_wait_ms
+            stats['prompt_tokens'] += prompt_tokens
+            stats['completion_tokens'] += completion_tokens
+            stats[bucket_field(latency_ms)] += 1
+            stats['max_latency_ms'] = max(stats['max_latency_ms'], latency_ms)
+
+            if self._flusher is None or not self._flusher.is_alive():
+                self._flusher = threading.Thread(target=self._run, name='metrics-flusher', daemon=True)
+                self._flusher.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            finally:
+                connection.close()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        for (hour, upstream, endpoint, call_caller), stats in pending.items():
+            lookup = {'hour': hour, 'upstream': upstream, 'endpoint': endpoint, 'caller': call_caller}
+            updates = {field: F(field) + stats[field] for field in COUNTER_FIELDS if stats[field]}
+            updates['max_latency_ms'] = Greatest(F('max_latency_ms'), stats['max_latency_ms'])
+            try:
+                if not ExternalCallStats.objects.filter(**lookup).update(**updates):
+                    try:
+                        with transaction.atomic():
+                            ExternalCallStats.objects.create(
+                                **lookup, **{field: stats[field] for field in COUNTER_FIELDS},
+                                max_latency_ms=stats['max_latency_ms'],
+                            )
+                    except IntegrityError:
+                        # Another process created the row first
+                        ExternalCallStats.objects.filter(**lookup).update(**updates)
+            except DatabaseError:
+                # Metrics are best effort; never let them break a request
+                continue
+
+        if time.monotonic() - self._last_prune > 3600:
+            self._last_prune = time.monotonic()
+            cutoff = timezone.now() - timedelta(days=settings.METRICS_RETENTION_DAYS)
+            try:
+                ExternalCallStats.objects.filter(hour__lt=cutoff).delete()
+            except DatabaseError:
+                pass
+
+
+recorder = MetricsRecorder(flush_interval=settings.METRICS_FLUSH_INTERVAL)
+atexit.register(recorder.flush)
+
+
+def error_status(exc):
+    """HTTP status of a failed call if the upstream answered, else None"""
+    response = getattr(exc, 'response', None)
+    return getattr(response, 'status_code', None) or getattr(exc, 'status_code', None)
+
+
+@contextmanager
+def track_call(upstream, endpoint):
+    """
+    Time an external call and record it. Set ``call['status']`` (and the
+    token counts for LLM calls) inside the block, and add any time spent
+    queueing for a rate limit slot to ``call['queue_wait_ms']``; it is
+    reported separately from the upstream latency. Exceptions are recorded
+    with the upstream's status code if there was one.
+    """
+    call = {'status': None, 'prompt_tokens': 0, 'completion_tokens': 0, 'queue_wait_ms': 0}
+    started = time.monotonic()
+    try:
+        yield call
+    except Exception as e:
+        call['status'] = error_status(e)
+        raise
+    finally:
+        latency_ms = (time.monotonic() - started) * 1000 - call['queue_wait_ms']
+        recorder.record(
+            upstream, endpoint, max(latency_ms, 0), call['status'],
+            prompt_tokens=call['prompt_tokens'], completion_tokens=call['completion_tokens'],
+            queue_wait_ms=call['queue_wait_ms'],
+        )
+
+
+def token_cost(prompt_tokens, completion_tokens):
+    return (
+        prompt_tokens * settings.OPENAI_PROMPT_TOKEN_COST_PER_1K
+        + completion_tokens * settings.OPENAI_COMPLETION_TOKEN_COST_PER_1K
+    ) / 1000
+
+
+def percentile(histogram, count, max_latency_ms, q):
+    """Estimate a latency percentile by interpolating inside the histogram bucket it falls in"""
+    if not count:
+        return 0.0
+    target = q * count
+    seen = 0
+    lower = 0
+    for bound, field in zip(LATENCY_BUCKETS_MS + (None,), BUCKET_FIELDS):
+        in_bucket = histogram[field]
+        upper = bound if bound is not None else max(max_latency_ms, lower)
+        if in_bucket and seen + in_bucket >= target:
+            upper = min(upper, max_latency_ms)
+            return round(lower + (upper - lower) * (target - seen) / in_bucket, 1)
+        seen += in_bucket
+        lower = bound if bound is not None else lower
+    return round(max_latency_ms, 1)
+
+
+def summarize(rows):
+    """Merge ExternalCallStats rows into one summary with p50/p95/p99"""
+    totals = Counter()
+    max_latency_ms = 0.0
+    for row in rows:
+        for field in COUNTER_FIELDS:
+            totals[field] += getattr(row, field)
+        max_latency_ms = max(max_latency_ms, row.max_latency_ms)
+
+    calls = totals['calls']
+    return {
+        'calls': calls,
+        'errors': totals['errors'],
+        'rate_limited': totals['rate_limited'],
+        'avg_ms': round(totals['total_latency_ms'] / calls, 1) if calls else 0.0,
+        'p50_ms': percentile(totals, calls, max_latency_ms, 0.50),
+        'p95_ms': percentile(totals, calls, max_latency_ms, 0.95),
+        'p99_ms': percentile(totals, calls, max_latency_ms, 0.99),
+        'max_ms': round(max_latency_ms, 1),
+        'queued_calls': totals['queued_calls'],
+        'avg_queue_wait_ms': round(totals['total_queue_wait_ms'] / totals['queued_calls'], 1) if totals['queued_calls'] else 0.0,
+        'prompt_tokens': totals['prompt_tokens'],
+        'completion_tokens': totals['completion_tokens'],
+        'cost': round(token_cost(totals['prompt_tokens'], totals['completion_tokens']), 4),
+    }
+
+
+def metrics_report(hours=24, days=7):
+    """
+    Latency percentiles per upstream endpoint and per caller over the last
+    ``hours``, plus token spend per day over the last ``days``.
+    """
+    now = timezone.now()
+    recent = list(ExternalCallStats.objects.filter(hour__gte=now - timedelta(hours=hours)))
+
+    def grouped(key):
+        groups = {}
+        for row in recent:
+            groups.setdefault(key(row), []).append(row)
+        return groups
+
+    endpoints = [
+        dict(upstream=upstream, endpoint=endpoint, **summarize(rows))
+        for (upstream, endpoint), rows in sorted(grouped(lambda row: (row.upstream, row.endpoint)).items())
+    ]
+    callers = [
+        dict(caller=call_caller, **summarize(rows))
+        for call_caller, rows in sorted(grouped(lambda row: row.caller).items())
+    ]
+
+    daily = {}
+    for row in ExternalCallStats.objects.filter(hour__gte=now - timedelta(days=days)):
+        day = daily.setdefault(timezone.localtime(row.hour).date(), Counter())
+        day['prompt_tokens'] += row.prompt_tokens
+        day['completion_tokens'] += row.completion_tokens
+        day['calls'] += row.calls
+    daily_tokens = [
+        {
+            'date': day.isoformat(),
+            'calls': totals['calls'],
+            'prompt_tokens': totals['prompt_tokens'],
+            'completion_tokens': totals['completion_tokens'],
+            'cost': round(token_cost(totals['prompt_tokens'], totals['completion_tokens']), 4),
+        }
+        for day, totals in sorted(daily.items())
+    ]
+
+    return {
+        'window_hours': hours,
+        'endpoints': endpoints,
+        'callers': callers,
+        'daily_tokens': daily_tokens,
+    }
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0006_packinglistitem_must_have'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeocodedLocation',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('query', models.CharField(max_length=200, unique=True)),
+                ('name', models.CharField(max_length=200)),
+                ('country', models.CharField(blank=True, max_length=100)),
+                ('latitude', models.DecimalField(decimal_places=10, max_digits=15)),
+                ('longitude', models.DecimalField(decimal_places=10, max_digits=15)),
+                ('source', models.CharField(choices=[('api', 'OpenWeather API'), ('gazetteer', 'Gazetteer')], default='api', max_length=20)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['query'],
+            },
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0007_geocodedlocation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyForecast',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('latitude', models.DecimalField(decimal_places=4, max_digits=9)),
+                ('longitude', models.DecimalField(decimal_places=4, max_digits=9)),
+                ('date', models.DateField()),
+                ('temp_min', models.FloatField()),
+                ('temp_max', models.FloatField()),
+                ('temp_mean', models.FloatField()),
+                ('feels_like_min', models.FloatField()),
+                ('feels_like_max', models.FloatField()),
+                ('feels_like_mean', models.FloatField()),
+                ('humidity_mean', models.FloatField()),
+                ('wind_speed_mean', models.FloatField()),
+                ('cloud_cover_mean', models.FloatField()),
+                ('pop_max', models.FloatField()),
+                ('rain_total', models.FloatField(default=0)),
+                ('condition', models.CharField(max_length=100)),
+                ('condition_id', models.IntegerField()),
+                ('fetched_at', models.DateTimeField()),
+            ],
+            options={
+                'ordering': ['latitude', 'longitude', 'date'],
+                'constraints': [models.UniqueConstraint(fields=('latitude', 'longitude', 'date'), name='unique_daily_forecast')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0008_dailyforecast'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastPrefetchRun',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('duration', models.FloatField(default=0)),
+                ('trips_count', models.IntegerField(default=0)),
+                ('locations_count', models.IntegerField(default=0)),
+                ('fetched_count', models.IntegerField(default=0)),
+                ('fresh_count', models.IntegerField(default=0)),
+                ('failed_count', models.IntegerField(default=0)),
+                ('fetch_seconds_avg', models.FloatField(default=0)),
+                ('fetch_seconds_max', models.FloatField(default=0)),
+            ],
+            options={
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:47
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0009_forecastprefetchrun'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutfitResponseCache',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('signature', models.CharField(max_length=64, unique=True)),
+                ('destination', models.CharField(max_length=200)),
+                ('season', models.CharField(max_length=20)),
+                ('temperature_bucket', models.IntegerField()),
+                ('weather_condition', models.CharField(max_length=100)),
+                ('activities', models.CharField(blank=True, max_length=255)),
+                ('outfit_description', models.TextField()),
+                ('hit_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+            ],
+            options={
+                'ordering': ['-last_used_at'],
+            },
+        ),
+    ]
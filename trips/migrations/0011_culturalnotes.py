@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0010_outfitresponsecache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CulturalNotes',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('destination', models.CharField(max_length=200, unique=True)),
+                ('notes', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'cultural notes',
+                'ordering': ['destination'],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0012_generationjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExternalCallStats',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('hour', models.DateTimeField()),
+                ('upstream', models.CharField(max_length=50)),
+                ('endpoint', models.CharField(max_length=50)),
+                ('caller', models.CharField(max_length=100)),
+                ('calls', models.IntegerField(default=0)),
+                ('errors', models.IntegerField(default=0)),
+                ('rate_limited', models.IntegerField(default=0)),
+                ('total_latency_ms', models.FloatField(default=0)),
+                ('max_latency_ms', models.FloatField(default=0)),
+                ('prompt_tokens', models.IntegerField(default=0)),
+                ('completion_tokens', models.IntegerField(default=0)),
+                ('latency_le_50', models.IntegerField(default=0)),
+                ('latency_le_100', models.IntegerField(default=0)),
+                ('latency_le_250', models.IntegerField(default=0)),
+                ('latency_le_500', models.IntegerField(default=0)),
+                ('latency_le_1000', models.IntegerField(default=0)),
+                ('latency_le_2500', models.IntegerField(default=0)),
+                ('latency_le_5000', models.IntegerField(default=0)),
+                ('latency_le_10000', models.IntegerField(default=0)),
+                ('latency_gt_10000', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'external call stats',
+                'ordering': ['-hour', 'upstream', 'endpoint', 'caller'],
+                'constraints': [models.UniqueConstraint(fields=('hour', 'upstream', 'endpoint', 'caller'), name='unique_external_call_stats')],
+            },
+        ),
+    ]
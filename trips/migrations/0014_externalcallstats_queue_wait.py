@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0013_externalcallstats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='externalcallstats',
+            name='queued_calls',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='externalcallstats',
+            name='total_queue_wait_ms',
+            field=models.FloatField(default=0),
+        ),
+    ]
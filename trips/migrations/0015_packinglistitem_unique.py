@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:01
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_items(apps, schema_editor):
+    """Fold repeated trip/name/category items into the oldest one before the constraint is added"""
+    PackingListItem = apps.get_model('trips', 'PackingListItem')
+    db_alias = schema_editor.connection.alias
+    duplicates = (
+        PackingListItem.objects.using(db_alias).values('trip_id', 'name', 'category')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+    )
+    for group in duplicates:
+        items = list(
+            PackingListItem.objects.using(db_alias).filter(
+                trip_id=group['trip_id'], name=group['name'], category=group['category']
+            ).order_by('id')
+        )
+        keep = items[0]
+        keep.quantity = max(item.quantity for item in items)
+        keep.is_packed = any(item.is_packed for item in items)
+        keep.must_have = any(item.must_have for item in items)
+        keep.is_auto_generated = all(item.is_auto_generated for item in items)
+        keep.save()
+        PackingListItem.objects.using(db_alias).filter(id__in=[item.id for item in items[1:]]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0014_externalcallstats_queue_wait'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_items, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='packinglistitem',
+            constraint=models.UniqueConstraint(fields=('trip', 'name', 'category'), name='unique_packing_list_item'),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 19:05
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def drop_duplicate_recommendations(apps, schema_editor):
+    """Keep one outfit per trip day (the customized one if any, else the oldest) before the constraint is added"""
+    OutfitRecommendation = apps.get_model('trips', 'OutfitRecommendation')
+    db_alias = schema_editor.connection.alias
+    duplicates = (
+        OutfitRecommendation.objects.using(db_alias).values('trip_id', 'day')
+        .annotate(count=Count('id'))
+        .filter(count__gt=1)
+    )
+    for group in duplicates:
+        ids = list(
+            OutfitRecommendation.objects.using(db_alias).filter(trip_id=group['trip_id'], day=group['day'])
+            .order_by('-is_customized', 'id')
+            .values_list('id', flat=True)
+        )
+        OutfitRecommendation.objects.using(db_alias).filter(id__in=ids[1:]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('trips', '0015_packinglistitem_unique'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_recommendations, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='packinglistitem',
+            index=models.Index(fields=['trip', 'is_packed'], name='trips_packi_trip_id_22a2d2_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='trip',
+            index=models.Index(fields=['user', '-created_at'], name='trips_trip_user_id_2f4a85_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='outfitrecommendation',
+            constraint=models.UniqueConstraint(fields=('trip', 'day'), name='unique_outfit_recommendation_day'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 class Trip(models.Model):
     id = models.AutoField(primary_key=True)
@@ -15,6 +16,12 @@ class Trip(models.Model):
     def __str__(self):
         return f"{self.destination} ({self.start_date} - {self.end_date})"
 
+    class Meta:
+        indexes = [
+            # My Trips: a user's trips, newest first
+            models.Index(fields=['user', '-created_at']),
+        ]
+
 class PackingListItem(models.Model):
     id = models.AutoField(primary_key=True)
     trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='packing_items')
@@ -32,6 +39,14 @@ class PackingListItem(models.Model):
 
     class Meta:
         ordering = ['category', 'name']
+        constraints = [
+            # Lets generation upsert the whole list in one bulk_create
+            models.UniqueConstraint(fields=['trip', 'name', 'category'], name='unique_packing_list_item'),
+        ]
+        indexes = [
+            # Packed/unpacked counts per trip
+            models.Index(fields=['trip', 'is_packed']),
+        ]
 
 class OutfitRecommendation(models.Model):
     id = models.AutoField(primary_key=True)
@@ -51,6 +66,10 @@ class OutfitRecommendation(models.Model):
 
     class Meta:
         ordering = ['day']
+        constraints = [
+            # One outfit per trip day; also serves the trip's day-ordered lookups
+            models.UniqueConstraint(fields=['trip', 'day'], name='unique_outfit_recommendation_day'),
+        ]
 
 class OutfitItem(models.Model):
     CATEGORY_CHOICES = (
@@ -72,4 +91,210 @@ class OutfitItem(models.Model):
         return f"{self.name} ({self.get_category_display()})"
     
     class Meta:
-        ordering = ['category', 'name'] 
\ No newline at end of file
+        ordering = ['category', 'name']
+
+class GeocodedLocation(models.Model):
+    SOURCE_CHOICES = (
+        ('api', 'OpenWeather API'),
+        ('gazetteer', 'Gazetteer'),
+    )
+
+    id = models.AutoField(primary_key=True)
+    query = models.CharField(max_length=200, unique=True)  # Normalized destination text
+    name = models.CharField(max_length=200)
+    country = models.CharField(max_length=100, blank=True)
+    latitude = models.DecimalField(max_digits=15, decimal_places=10)
+    longitude = models.DecimalField(max_digits=15, decimal_places=10)
+    source = models.CharField(max_length=20, choices=SOURCE_CHOICES, default='api')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.query} -> ({self.latitude}, {self.longitude})"
+
+    class Meta:
+        ordering = ['query']
+
+class DailyForecast(models.Model):
+    """Daily summary of the OpenWeather 3-hour forecast for a rounded location"""
+    id = models.AutoField(primary_key=True)
+    latitude = models.DecimalField(max_digits=9, decimal_places=4)  # Rounded, see trips.weather.forecast_key
+    longitude = models.DecimalField(max_digits=9, decimal_places=4)
+    date = models.DateField()  # Local date at the destination
+    temp_min = models.FloatField()
+    temp_max = models.FloatField()
+    temp_mean = models.FloatField()
+    feels_like_min = models.FloatField()
+    feels_like_max = models.FloatField()
+    feels_like_mean = models.FloatField()
+    humidity_mean = models.FloatField()
+    wind_speed_mean = models.FloatField()
+    cloud_cover_mean = models.FloatField()
+    pop_max = models.FloatField()  # Highest 3-hour probability of precipitation (0-1)
+    rain_total = models.FloatField(default=0)  # mm over the day
+    condition = models.CharField(max_length=100)  # Dominant condition, e.g. 'Rain', 'Clouds'
+    condition_id = models.IntegerField()  # OpenWeather condition code, used for the icon
+    fetched_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.date} at ({self.latitude}, {self.longitude}) - {self.condition}"
+
+    class Meta:
+        ordering = ['latitude', 'longitude', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['latitude', 'longitude', 'date'], name='unique_daily_forecast'),
+        ]
+
+class ForecastPrefetchRun(models.Model):
+    """Timing stats for one run of the trips.cron.prefetch_forecasts job"""
+    id = models.AutoField(primary_key=True)
+    started_at = models.DateTimeField(auto_now_add=True)
+    duration = models.FloatField(default=0)  # Seconds for the whole run
+    trips_count = models.IntegerField(default=0)
+    locations_count = models.IntegerField(default=0)  # Distinct rounded coordinates
+    fetched_count = models.IntegerField(default=0)
+    fresh_count = models.IntegerField(default=0)  # Skipped because stored rows were still fresh
+    failed_count = models.IntegerField(default=0)
+    fetch_seconds_avg = models.FloatField(default=0)
+    fetch_seconds_max = models.FloatField(default=0)
+
+    def __str__(self):
+        return f"Prefetch at {self.started_at} - {self.fetched_count}/{self.locations_count} locations"
+
+    class Meta:
+        ordering = ['-started_at']
+
+class OutfitResponseCache(models.Model):
+    """
+    Outfit text returned by the LLM for a normalized prompt signature, shared
+    by every user. See trips.outfit_cache.
+    """
+    id = models.AutoField(primary_key=True)
+    signature = models.CharField(max_length=64, unique=True)  # sha256 of the fields below
+    destination = models.CharField(max_length=200)  # Normalized, see trips.geocoding.normalize_destination
+    season = models.CharField(max_length=20)
+    temperature_bucket = models.IntegerField()  # Lower bound in °F, see OUTFIT_CACHE_TEMP_BUCKET
+    weather_condition = models.CharField(max_length=100)
+    activities = models.CharField(max_length=255, blank=True)
+    outfit_description = models.TextField()
+    hit_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    def __str__(self):
+        return f"{self.destination} {self.season} {self.temperature_bucket}°F {self.weather_condition}"
+
+    class Meta:
+        ordering = ['-last_used_at']
+
+class CulturalNotes(models.Model):
+    """Cultural dress tips for a destination, shared by every trip there"""
+    id = models.AutoField(primary_key=True)
+    destination = models.CharField(max_length=200, unique=True)  # Normalized, see trips.geocoding.normalize_destination
+    notes = models.TextField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Cultural notes for {self.destination}"
+
+    class Meta:
+        ordering = ['destination']
+        verbose_name_plural = 'cultural notes'
+
+class GenerationJob(models.Model):
+    """Background outfit / smart packing list generation, run by manage.py run_generation_worker"""
+    OUTFITS = 'outfits'
+    SMART_PACKING = 'smart_packing'
+    KIND_CHOICES = (
+        (OUTFITS, 'Outfit recommendations'),
+        (SMART_PACKING, 'Smart packing list'),
+    )
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    )
+    ACTIVE_STATUSES = (QUEUED, RUNNING)
+
+    id = models.AutoField(primary_key=True)
+    trip = models.ForeignKey(Trip, on_delete=models.CASCADE, related_name='generation_jobs')
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)  # Pushed back between retries
+    locked_by = models.CharField(max_length=100, blank=True)  # Worker currently running the job
+    locked_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} for {self.trip} - {self.status}"
+
+    @property
+    def is_active(self):
+        return self.status in self.ACTIVE_STATUSES
+
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # At most one queued/running job of each kind per trip, so repeat requests reuse it
+            models.UniqueConstraint(
+                fields=['trip', 'kind'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='unique_active_generation_job',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'run_after']),
+        ]
+
+class ExternalCallStats(models.Model):
+    """
+    Hourly rollup of calls to OpenWeather and OpenAI per endpoint and caller,
+    written by trips.metrics. Latencies are kept as a fixed-bucket histogram
+    so percentiles can be estimated across any set of rows.
+    """
+    id = models.AutoField(primary_key=True)
+    hour = models.DateTimeField()  # Start of the hour
+    upstream = models.CharField(max_length=50)  # e.g. 'OpenWeather', 'OpenAI'
+    endpoint = models.CharField(max_length=50)  # e.g. 'forecast', 'completions'
+    caller = models.CharField(max_length=100)  # View name, 'job:<kind>' or 'cron:<task>'
+    calls = models.IntegerField(default=0)
+    errors = models.IntegerField(default=0)
+    rate_limited = models.IntegerField(default=0)  # Calls that ended in HTTP 429
+    total_latency_ms = models.FloatField(default=0)  # Upstream time only, excluding rate limit queueing
+    max_latency_ms = models.FloatField(default=0)
+    queued_calls = models.IntegerField(default=0)  # Calls that had to wait for a rate limit slot
+    total_queue_wait_ms = models.FloatField(default=0)
+    prompt_tokens = models.IntegerField(default=0)
+    completion_tokens = models.IntegerField(default=0)
+    latency_le_50 = models.IntegerField(default=0)
+    latency_le_100 = models.IntegerField(default=0)
+    latency_le_250 = models.IntegerField(default=0)
+    latency_le_500 = models.IntegerField(default=0)
+    latency_le_1000 = models.IntegerField(default=0)
+    latency_le_2500 = models.IntegerField(default=0)
+    latency_le_5000 = models.IntegerField(default=0)
+    latency_le_10000 = models.IntegerField(default=0)
+    latency_gt_10000 = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.upstream} {self.endpoint} from {self.caller} at {self.hour}"
+
+    class Meta:
+        ordering = ['-hour', 'upstream', 'endpoint', 'caller']
+        verbose_name_plural = 'external call stats'
+        constraints = [
+            models.UniqueConstraint(fields=['hour', 'upstream', 'endpoint', 'caller'], name='unique_external_call_stats'),
+        ]
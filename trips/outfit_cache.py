@@ -0,0 +1,94 @@
+import hashlib
+import math
+import threading
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+from trips.geocoding import normalize_destination
+from trips.models import OutfitResponseCache
+
+# Cache hits not written back yet, per entry id (see get_cached_outfit)
+_unrecorded_hits = Counter()
+_hits_lock = threading.Lock()
+
+
+def temperature_bucket(temp):
+    """Lower bound of the OUTFIT_CACHE_TEMP_BUCKET-wide band ``temp`` falls in"""
+    size = settings.OUTFIT_CACHE_TEMP_BUCKET
+    return int(math.floor(float(temp) / size) * size)
+
+
+def outfit_signature(destination, temp, weather_desc, season, activities=None):
+    """
+    Normalized inputs of an outfit prompt. Days whose temperature lands in the
+    same bucket and whose other inputs match (ignoring case and spacing)
+    share one cached answer.
+    """
+    fields = {
+        'destination': normalize_destination(destination),
+        'season': season,
+        'temperature_bucket': temperature_bucket(temp),
+        'weather_condition': ' '.join(weather_desc.casefold().split()),
+        'activities': ' '.join((activities or '').casefold().split()),
+    }
+    text = '|'.join(str(value) for value in fields.values())
+    return hashlib.sha256(text.encode()).hexdigest(), fields
+
+
+def get_cached_outfit(signature):
+    """
+    Return the cached outfit for a signature, or None if missing or older
+    than OUTFIT_CACHE_TTL. Hits are counted in memory and written back with
+    the entry's last use at most once per OUTFIT_CACHE_TOUCH_INTERVAL, so
+    reads stay reads.
+    """
+    now = timezone.now()
+    fresh_after = now - timedelta(seconds=settings.OUTFIT_CACHE_TTL)
+    entry = (
+        OutfitResponseCache.objects.filter(signature=signature, created_at__gte=fresh_after)
+        .only('id', 'outfit_description', 'last_used_at').first()
+    )
+    if entry is None:
+        return None
+
+    with _hits_lock:
+        _unrecorded_hits[entry.id] += 1
+        if entry.last_used_at > now - timedelta(seconds=settings.OUTFIT_CACHE_TOUCH_INTERVAL):
+            return entry.outfit_description
+        hits = _unrecorded_hits.pop(entry.id)
+
+    OutfitResponseCache.objects.filter(id=entry.id).update(hit_count=F('hit_count') + hits, last_used_at=now)
+    return entry.outfit_description
+
+
+def store_outfit(signature, fields, outfit_description):
+    """Save (or replace) the outfit for a signature in a single upsert"""
+    now = timezone.now()
+    entry = OutfitResponseCache(
+        signature=signature, outfit_description=outfit_description, hit_count=0,
+        created_at=now, last_used_at=now, **fields,
+    )
+    OutfitResponseCache.objects.bulk_create(
+        [entry], update_conflicts=True, unique_fields=['signature'],
+        update_fields=list(fields) + ['outfit_description', 'hit_count', 'created_at', 'last_used_at'],
+    )
+
+
+def prune_outfit_cache():
+    """
+    Drop expired entries, then the least recently used ones beyond
+    OUTFIT_CACHE_MAX_ENTRIES. Run by the forecast prefetch cron job.
+    """
+    fresh_after = timezone.now() - timedelta(seconds=settings.OUTFIT_CACHE_TTL)
+    OutfitResponseCache.objects.filter(created_at__lt=fresh_after).delete()
+
+    stale_ids = list(
+        OutfitResponseCache.objects.order_by('-last_used_at')
+        .values_list('id', flat=True)[settings.OUTFIT_CACHE_MAX_ENTRIES:]
+    )
+    if stale_ids:
+        OutfitResponseCache.objects.filter(id__in=stale_ids).delete()
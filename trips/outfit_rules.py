@@ -0,0 +1,108 @@
+# Local, deterministic outfit engine: outfits are built from OUTFIT_RULES
+# without any external calls. OUTFIT_ENGINE in settings decides how it is
+# combined with the LLM (see trips.outfits.engine_outfit).
+
+# Keyword taxonomy used to file outfit items under OutfitItem categories
+CATEGORY_KEYWORDS = [
+    ('top', ['shirt', 'top', 'tee', 't-shirt', 'blouse', 'sweater', 'polo']),
+    ('bottom', ['pants', 'jeans', 'shorts', 'skirt', 'trouser']),
+    ('outerwear', ['jacket', 'coat', 'hoodie', 'cardigan', 'blazer']),
+    ('footwear', ['shoes', 'boots', 'sandals', 'sneakers', 'footwear']),
+    ('accessory', ['hat', 'cap', 'sunglasses', 'scarf', 'gloves', 'umbrella']),
+]
+
+# One of each of these is worn at a time, so a later rule's item replaces an earlier one;
+# season rules only fill an empty slot, so the weather's choice (e.g. a rain jacket) wins
+SINGLE_ITEM_CATEGORIES = {'outerwear', 'footwear'}
+
+# (min °F inclusive, max °F exclusive, conditions, seasons, items) against the
+# day's feels-like temperature. None matches anything. Every matching row
+# contributes its items, in order.
+OUTFIT_RULES = [
+    # Base outfit by temperature
+    (-20, 20, None, None, ['Insulated winter coat', 'Thermal base layer', 'Wool sweater',
+                           'Insulated pants', 'Insulated boots', 'Warm hat', 'Gloves', 'Scarf']),
+    (20, 40, None, None, ['Winter coat', 'Sweater', 'Jeans', 'Warm boots', 'Gloves', 'Scarf']),
+    (40, 55, None, None, ['Light jacket', 'Long-sleeve shirt', 'Jeans', 'Sneakers']),
+    (55, 70, None, None, ['Long-sleeve shirt', 'Chino trousers', 'Sneakers']),
+    (70, 85, None, None, ['T-shirt', 'Shorts', 'Sneakers']),
+    (85, 110, None, None, ['Linen shirt', 'Shorts', 'Sandals']),
+
+    # Weather
+    (None, 40, ('Rain', 'Drizzle', 'Snow'), None, ['Waterproof boots']),
+    (None, 40, ('Rain', 'Drizzle'), None, ['Umbrella']),
+    (40, 70, ('Rain',), None, ['Rain jacket', 'Waterproof shoes', 'Umbrella']),
+    (40, 110, ('Drizzle',), None, ['Umbrella']),
+    (70, 110, ('Rain',), None, ['Light rain jacket', 'Umbrella']),
+    (70, 110, ('Clear',), None, ['Sunglasses']),
+    (85, 110, ('Clear',), None, ['Sun hat']),
+
+    # Season
+    (40, 55, None, ('Winter',), ['Scarf']),
+    (55, 70, None, ('Spring', 'Fall'), ['Light cardigan']),
+    (55, 85, ('Clear',), ('Summer',), ['Sunglasses']),
+]
+
+# Anything outside these is left to the LLM in engine-first mode
+USUAL_TEMPERATURE_RANGE = (-20, 110)
+USUAL_CONDITIONS = {'Clear', 'Clouds', 'Rain', 'Drizzle', 'Snow', 'Mist', 'Fog', 'Haze'}
+
+
+def categorize_item(item_text):
+    """OutfitItem category for an item name, 'other' if no keyword matches"""
+    text = item_text.lower()
+    for category, keywords in CATEGORY_KEYWORDS:
+        if any(word in text for word in keywords):
+            return category
+    return 'other'
+
+
+RULE_ITEM_CATEGORIES = {
+    item: categorize_item(item) for *_, rule_items in OUTFIT_RULES for item in rule_items
+}
+
+
+def is_usual(temp, weather_desc):
+    low, high = USUAL_TEMPERATURE_RANGE
+    return low <= temp < high and weather_desc in USUAL_CONDITIONS
+
+
+def rule_based_items(temp, weather_desc, season):
+    """Outfit item names for a day from OUTFIT_RULES"""
+    # Out-of-range temperatures get the nearest band
+    low, high = USUAL_TEMPERATURE_RANGE
+    temp = min(max(float(temp), low), high - 0.01)
+
+    items = []
+    for min_temp, max_temp, conditions, seasons, rule_items in OUTFIT_RULES:
+        if min_temp is not None and temp < min_temp:
+            continue
+        if max_temp is not None and temp >= max_temp:
+            continue
+        if conditions is not None and weather_desc not in conditions:
+            continue
+        if seasons is not None and season not in seasons:
+            continue
+
+        for item in rule_items:
+            category = RULE_ITEM_CATEGORIES[item]
+            if category in SINGLE_ITEM_CATEGORIES:
+                filled = any(RULE_ITEM_CATEGORIES[existing] == category for existing in items)
+                if filled and seasons is not None:
+                    continue
+                items = [existing for existing in items if RULE_ITEM_CATEGORIES[existing] != category]
+            if item not in items:
+                items.append(item)
+    return items
+
+
+def rule_based_outfit(temp, weather_desc, season, strict=True):
+    """
+    Dash-formatted outfit for a day, in the same format as the LLM answers.
+    With ``strict`` set, returns None for unusual conditions (see
+    USUAL_TEMPERATURE_RANGE and USUAL_CONDITIONS) so the caller can ask the
+    LLM instead.
+    """
+    if strict and not is_usual(float(temp), weather_desc):
+        return None
+    return '\n'.join(f"- {item}" for item in rule_based_items(temp, weather_desc, season))
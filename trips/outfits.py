@@ -0,0 +1,457 @@
+import json
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+
+import requests
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from trips.api_client import complete
+from trips.cultural_notes import UNAVAILABLE, get_cultural_notes
+from trips.metrics import submit_with_caller
+from trips.models import OutfitRecommendation, OutfitItem, PackingListItem
+from trips.outfit_cache import outfit_signature, get_cached_outfit, store_outfit
+from trips.outfit_rules import categorize_item, rule_based_outfit
+from trips.weather import get_daily_forecasts
+
+# Shared by every request in the process, so max_workers is the global cap
+# on concurrent weather/LLM calls made by outfit generation
+generation_executor = ThreadPoolExecutor(
+    max_workers=settings.OUTFIT_GENERATION_MAX_CONCURRENCY,
+    thread_name_prefix='outfit-generation',
+)
+
+
+def extract_items_from_outfit_description(outfit_description):
+    """Helper function to extract and categorize outfit items from description text"""
+    items = []
+    lines = outfit_description.split('\n')
+    
+    for line in lines:
+        line = line.strip()
+        # Look for bullet points or similar indicators
+        if line and (line.startswith('-') or line.startswith('•') or line.startswith('*')):
+            item_text = line.lstrip('-•* ').strip()
+            # Skip empty items or items that look like section headings
+            if not item_text or item_text.endswith(':') or "cultural" in item_text.lower():
+                continue
+                
+            items.append({
+                'name': item_text,
+                'category': categorize_item(item_text)
+            })
+    
+    return items
+
+def sync_trip_outfits_to_packing_list(trip):
+    """
+    Bring a trip's Clothing packing items in line with all of its outfits:
+    every outfit item is listed once, with a quantity equal to the number of
+    days it's worn. Auto-generated items follow that count; items the user
+    added themselves are only ever raised to it. Two reads, then at most one
+    bulk insert and one bulk update.
+    """
+    worn = set(OutfitItem.objects.filter(outfit__trip=trip).values_list('outfit_id', 'name'))
+    days_worn = Counter(name for outfit_id, name in worn)
+    packing_items = {
+        item.name: item for item in PackingListItem.objects.filter(trip=trip, category='Clothing')
+    }
+
+    to_create = []
+    to_update = []
+    for name, days in days_worn.items():
+        item = packing_items.get(name)
+        if item is None:
+            to_create.append(PackingListItem(
+                trip=trip, name=name, category='Clothing', quantity=days, is_auto_generated=True
+            ))
+            continue
+        quantity = days if item.is_auto_generated else max(item.quantity, days)
+        if item.quantity != quantity:
+            item.quantity = quantity
+            # bulk_update() doesn't apply auto_now
+            item.updated_at = timezone.now()
+            to_update.append(item)
+
+    with transaction.atomic():
+        PackingListItem.objects.bulk_create(to_create)
+        PackingListItem.objects.bulk_update(to_update, ['quantity', 'updated_at'])
+
+
+def add_outfit_items_to_packing_list(trip, names):
+    """Make sure each named outfit item is on the trip's Clothing list, with a quantity of at least 1"""
+    names = set(names)
+    existing = {
+        item.name: item
+        for item in PackingListItem.objects.filter(trip=trip, category='Clothing', name__in=names)
+    }
+    to_update = [item for item in existing.values() if item.quantity < 1]
+    for item in to_update:
+        item.quantity = 1
+        item.updated_at = timezone.now()
+
+    with transaction.atomic():
+        PackingListItem.objects.bulk_create([
+            PackingListItem(trip=trip, name=name, category='Clothing', quantity=1, is_auto_generated=True)
+            for name in sorted(names - existing.keys())
+        ])
+        PackingListItem.objects.bulk_update(to_update, ['quantity', 'updated_at'])
+
+
+def format_outfit_description(outfit_description):
+    """Make sure every line of an LLM outfit answer starts with a dash"""
+    if outfit_description.strip().startswith('-'):
+        return outfit_description
+
+    formatted_items = []
+    for item in outfit_description.split('\n'):
+        item = item.strip()
+        if item and not item.startswith('-'):
+            formatted_items.append(f"- {item}")
+        elif item:
+            formatted_items.append(item)
+    return '\n'.join(formatted_items)
+
+
+def get_season(day, latitude):
+    """Rough season for a date, flipped for the southern hemisphere"""
+    northern_seasons = {
+        (12, 1, 2): 'Winter',
+        (3, 4, 5): 'Spring',
+        (6, 7, 8): 'Summer',
+        (9, 10, 11): 'Fall'
+    }
+    southern_seasons = {
+        (12, 1, 2): 'Summer',
+        (3, 4, 5): 'Fall',
+        (6, 7, 8): 'Winter',
+        (9, 10, 11): 'Spring'
+    }
+    seasons = northern_seasons if float(latitude) >= 0 else southern_seasons
+    return next((s for months, s in seasons.items() if day.month in months), 'Unknown')
+
+
+def outfit_prompt(destination, temp, weather_desc, season, activities=None):
+    prompt = (
+        f"For a day in {destination} with temperature {temp}°F and {weather_desc} weather in {season} season, suggest a practical outfit.\n"
+        "Format your response as a simple list of clothing items ONLY, each on a separate line with a dash prefix.\n"
+        "Example:\n"
+        "- Item 1\n"
+        "- Item 2\n"
+        "- Item 3"
+    )
+    if activities:
+        prompt += f"\nPlanned Activities: {activities}"
+    return prompt
+
+
+def engine_outfit(temp, weather_desc, season, activities=None, exclude=None):
+    """
+    The rule-based outfit for a day according to OUTFIT_ENGINE, or None if
+    the LLM should answer: always in 'llm' mode, and in 'engine_first' mode
+    for unusual conditions, planned activities (which only the LLM can take
+    into account) or when regenerating the engine's own answer (``exclude``).
+    'engine' mode always answers from the rules.
+    """
+    if settings.OUTFIT_ENGINE == 'engine':
+        return rule_based_outfit(temp, weather_desc, season, strict=False)
+    if settings.OUTFIT_ENGINE != 'engine_first' or activities:
+        return None
+    outfit_description = rule_based_outfit(temp, weather_desc, season)
+    return outfit_description if outfit_description != exclude else None
+
+
+def recommend_outfit(destination, temp, weather_desc, season, activities=None, exclude=None):
+    """
+    Return a dash-formatted outfit for one day, from the rule-based engine
+    when OUTFIT_ENGINE allows, otherwise reusing the shared outfit cache when
+    another trip already asked for the same conditions. A cached answer
+    equal to ``exclude`` (the outfit being regenerated) is skipped, and so is
+    single-flight coalescing, so the user gets a fresh one. Raises if the LLM
+    has to be called and fails.
+    """
+    outfit_description = engine_outfit(temp, weather_desc, season, activities, exclude)
+    if outfit_description is not None:
+        return outfit_description
+
+    signature, fields = outfit_signature(destination, temp, weather_desc, season, activities)
+    cached = get_cached_outfit(signature)
+    if cached is not None and cached != exclude:
+        return cached
+
+    outfit_description = complete(
+        outfit_prompt(destination, temp, weather_desc, season, activities), max_tokens=150,
+        coalesce=exclude is None,
+    )
+    outfit_description = format_outfit_description(outfit_description)
+    store_outfit(signature, fields, outfit_description)
+    return outfit_description
+
+
+def trip_outfits_prompt(destination, days):
+    day_lines = '\n'.join(
+        f"{day.isoformat()}: {temp}°F, {weather_desc} weather, {season} season"
+        for day, temp, weather_desc, season in days
+    )
+    return (
+        f"Suggest a practical outfit for each day of a trip to {destination}:\n"
+        f"{day_lines}\n"
+        "Respond with a JSON object ONLY, mapping each date above to a list of clothing items. Example:\n"
+        '{"2024-06-01": ["Item 1", "Item 2", "Item 3"]}'
+    )
+
+
+def parse_trip_outfits(response_text, dates):
+    """
+    Return {date: dash-formatted outfit} for the days of a batched answer that
+    are well formed. Days that are missing, empty or not a list of strings are
+    left out so the caller can retry just those.
+    """
+    start, end = response_text.find('{'), response_text.rfind('}')
+    if start == -1 or end < start:
+        return {}
+    try:
+        data = json.loads(response_text[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(data, dict):
+        return {}
+
+    outfits = {}
+    for day in dates:
+        items = data.get(day.isoformat())
+        if not isinstance(items, list):
+            continue
+        items = [item.strip() for item in items if isinstance(item, str) and item.strip()]
+        if items:
+            outfits[day] = '\n'.join(f"- {item}" for item in items)
+    return outfits
+
+
+def recommend_trip_outfits(destination, days):
+    """
+    Return {date: outfit} for ``days``, a list of (date, temp, weather_desc,
+    season) tuples.
+
+    Days the rule-based engine covers (see engine_outfit) or found in the
+    shared outfit cache are answered locally. With OUTFIT_BATCH_GENERATION
+    on, the rest go to the LLM in a single JSON request; any day that
+    request fails to answer properly falls back to its own per-day call.
+    Days whose fallback also fails are left out.
+    """
+    outfits = {}
+    pending = []
+    for day, temp, weather_desc, season in days:
+        outfit_description = engine_outfit(temp, weather_desc, season)
+        if outfit_description is not None:
+            outfits[day] = outfit_description
+            continue
+
+        signature, fields = outfit_signature(destination, temp, weather_desc, season)
+        cached = get_cached_outfit(signature)
+        if cached is not None:
+            outfits[day] = cached
+        else:
+            pending.append((day, temp, weather_desc, season, signature, fields))
+
+    if settings.OUTFIT_BATCH_GENERATION and len(pending) > 1:
+        try:
+            response_text = complete(
+                trip_outfits_prompt(destination, [entry[:4] for entry in pending]),
+                max_tokens=settings.OUTFIT_BATCH_TOKENS_PER_DAY * len(pending),
+            )
+            batched = parse_trip_outfits(response_text, [entry[0] for entry in pending])
+        except Exception:
+            batched = {}
+
+        for day, temp, weather_desc, season, signature, fields in pending:
+            if day in batched:
+                store_outfit(signature, fields, batched[day])
+                outfits[day] = batched[day]
+
+    for day, temp, weather_desc, season, signature, fields in pending:
+        if day in outfits:
+            continue
+        try:
+            outfits[day] = recommend_outfit(destination, temp, weather_desc, season)
+        except Exception:
+            pass
+    return outfits
+
+
+def _in_worker(fn, *args):
+    # Pool threads open their own DB connections; close them after each task
+    try:
+        return fn(*args)
+    finally:
+        connection.close()
+
+
+def _fetch_trip_forecasts(trip):
+    return get_daily_forecasts(trip.latitude, trip.longitude, trip.start_date, trip.end_date)
+
+
+def _generate_outfits(trip, days):
+    """Outfits for (date, temp, weather_desc) days of one trip, from the rule-based engine for any that fail"""
+    seasons = {day: get_season(day, trip.latitude) for day, temp, weather_desc in days}
+    outfits = recommend_trip_outfits(trip.destination, [
+        (day, temp, weather_desc, seasons[day]) for day, temp, weather_desc in days
+    ])
+    return {
+        day: outfits.get(day) or rule_based_outfit(temp, weather_desc, seasons[day], strict=False)
+        for day, temp, weather_desc in days
+    }
+
+
+def _save_outfits(trip, batch, outfits, cultural_notes):
+    """
+    Persist one finished batch of days, their items and the packing list sync
+    in one transaction. Days are upserted, so a job reclaimed from a stalled
+    worker can save the same days as the original without conflicting.
+    """
+    recommendations = [
+        OutfitRecommendation(
+            trip=trip,
+            day=day,
+            weather_condition=weather_desc,
+            temperature=temp,
+            outfit_description=outfits[day],
+            cultural_notes=cultural_notes
+        )
+        for day, temp, weather_desc in batch
+    ]
+    with transaction.atomic():
+        OutfitRecommendation.objects.bulk_create(
+            recommendations,
+            update_conflicts=True,
+            unique_fields=['trip', 'day'],
+            update_fields=[
+                'weather_condition', 'temperature', 'outfit_description', 'cultural_notes', 'updated_at',
+            ],
+        )
+        # Upserts don't return primary keys on every Django version, so look them up
+        ids = dict(
+            OutfitRecommendation.objects.filter(trip=trip, day__in=[day for day, _, _ in batch])
+            .values_list('day', 'id')
+        )
+        for recommendation in recommendations:
+            recommendation.id = ids[recommendation.day]
+        OutfitItem.objects.filter(outfit_id__in=ids.values()).delete()
+        OutfitItem.objects.bulk_create([
+            OutfitItem(outfit=recommendation, name=item['name'], category=item['category'])
+            for recommendation in recommendations
+            for item in extract_items_from_outfit_description(recommendation.outfit_description)
+        ])
+        sync_trip_outfits_to_packing_list(trip)
+
+
+def generate_outfits_for_trips(trips):
+    """
+    Generate simple outfit recommendations for every missing day of ``trips``.
+
+    Weather for all trips is fetched concurrently, then the LLM calls are
+    fanned out, both on the shared generation pool: one batched call per
+    trip with OUTFIT_BATCH_GENERATION on (after a separate call for the
+    first day when OUTFIT_STREAM_FIRST_DAY is set), otherwise one per
+    missing day. Each call's days are saved as soon as it finishes (with
+    every other finished call for the same trip, in one transaction and a
+    fixed number of queries), so the outfit page streaming the trip can
+    show them straight away. Work still running when
+    OUTFIT_GENERATION_DEADLINE expires is abandoned and those days are left
+    for the next request.
+
+    Returns a dict with the ids of trips that got new recommendations
+    (``generated``), trips whose weather lookup failed (``errors``, id ->
+    message) and the number of days dropped by the deadline per trip
+    (``timed_out``, id -> days).
+    """
+    deadline = time.monotonic() + settings.OUTFIT_GENERATION_DEADLINE
+    result = {'generated': set(), 'errors': {}, 'timed_out': {}}
+    if not trips:
+        return result
+
+    def remaining():
+        return max(deadline - time.monotonic(), 0)
+
+    # Stage 1: weather for every trip and cultural notes for every destination at once
+    weather_futures = {
+        submit_with_caller(generation_executor, _in_worker, _fetch_trip_forecasts, trip): trip
+        for trip in trips
+    }
+    notes_futures = {
+        destination: submit_with_caller(generation_executor, _in_worker, get_cultural_notes, destination)
+        for destination in {trip.destination for trip in trips}
+    }
+    done, not_done = wait(list(weather_futures) + list(notes_futures.values()), timeout=remaining())
+
+    existing_days = set(
+        OutfitRecommendation.objects.filter(trip__in=trips).values_list('trip_id', 'day')
+    )
+
+    # Stage 2: the LLM calls for every trip together
+    outfit_futures = {}
+    for future, trip in weather_futures.items():
+        if future in not_done:
+            future.cancel()
+            result['errors'][trip.id] = 'Timed out fetching weather data'
+            continue
+        try:
+            forecasts = future.result()
+        except (requests.exceptions.RequestException, KeyError, ValueError) as e:
+            result['errors'][trip.id] = str(e)
+            continue
+
+        days = [
+            (forecast.date, round(forecast.feels_like_mean, 2), forecast.condition)
+            for forecast in forecasts
+            if (trip.id, forecast.date) not in existing_days
+        ]
+        if not settings.OUTFIT_BATCH_GENERATION:
+            batches = [[day] for day in days]
+        elif settings.OUTFIT_STREAM_FIRST_DAY:
+            # The first day on its own returns quickly, so its card shows up while the rest generate
+            batches = [days[:1], days[1:]]
+        else:
+            batches = [days]
+        for batch in batches:
+            if batch:
+                outfit_future = submit_with_caller(generation_executor, _in_worker, _generate_outfits, trip, batch)
+                outfit_futures[outfit_future] = (trip, batch)
+
+    def notes_for(destination):
+        # Notes lookups never raise for upstream failures, but may still be running
+        future = notes_futures[destination]
+        try:
+            return future.result(timeout=remaining())
+        except Exception:
+            return UNAVAILABLE
+
+    # Stage 3: persist days as soon as their call finishes. Calls that are
+    # already done by then are saved along with it, one write per trip
+    pending = set(outfit_futures)
+    try:
+        for future in as_completed(outfit_futures, timeout=remaining()):
+            if future not in pending:
+                continue
+            finished = [f for f in pending if f.done()]
+            pending.difference_update(finished)
+
+            by_trip = {}
+            for f in finished:
+                trip, batch = outfit_futures[f]
+                trip_batch, trip_outfits = by_trip.setdefault(trip, ([], {}))
+                trip_batch.extend(batch)
+                trip_outfits.update(f.result())
+            for trip, (trip_batch, trip_outfits) in by_trip.items():
+                _save_outfits(trip, trip_batch, trip_outfits, notes_for(trip.destination))
+                result['generated'].add(trip.id)
+    except FuturesTimeoutError:
+        for future in pending:
+            future.cancel()
+            trip, batch = outfit_futures[future]
+            result['timed_out'][trip.id] = result['timed_out'].get(trip.id, 0) + len(batch)
+
+    return result
@@ -0,0 +1,232 @@
+import json
+
+from django.db import transaction
+
+from trips.api_client import complete
+from trips.models import PackingListItem
+from trips.outfits import sync_trip_outfits_to_packing_list
+from trips.weather import get_daily_forecasts
+
+
+def build_packing_list(trip):
+    """
+    Add the rule-based packing list (basics, weather-specific items and
+    clothing scaled to the trip length) to a trip. Raises RequestException
+    if the forecast has to be fetched and OpenWeather fails.
+    """
+    # Calculate trip duration
+    duration = (trip.end_date - trip.start_date).days + 1
+    
+    # Get the daily forecast summaries for the destination
+    forecasts = get_daily_forecasts(trip.latitude, trip.longitude)
+    
+    # Basic items everyone needs (with must-have items marked)
+    basic_items = [
+        ('Toiletries', [
+            {'name': 'Toothbrush', 'must_have': True},
+            {'name': 'Toothpaste', 'must_have': True},
+            {'name': 'Deodorant', 'must_have': True},
+            {'name': 'Shampoo', 'must_have': False},
+            {'name': 'Soap', 'must_have': True}
+        ]),
+        ('Documents', [
+            {'name': 'Passport', 'must_have': True},
+            {'name': 'ID', 'must_have': True},
+            {'name': 'Travel Insurance', 'must_have': True},
+            {'name': 'Boarding Pass', 'must_have': True}
+        ]),
+        ('Electronics', [
+            {'name': 'Phone Charger', 'must_have': True},
+            {'name': 'Power Bank', 'must_have': False},
+            {'name': 'Adapter', 'must_have': True}
+        ]),
+        ('Miscellaneous', [
+            {'name': 'Wallet', 'must_have': True},
+            {'name': 'Keys', 'must_have': True},
+            {'name': 'Medications', 'must_have': True}
+        ]),
+    ]
+    
+    # Add weather-specific items
+    weather_items = []
+    coldest = min((forecast.temp_min for forecast in forecasts), default=None)
+    hottest = max((forecast.temp_max for forecast in forecasts), default=None)
+    total_rain = sum(forecast.rain_total for forecast in forecasts)
+
+    if coldest is not None and coldest < 60:
+        weather_items.extend([
+            ('Clothing', {'name': 'Warm Jacket', 'must_have': True}),
+            ('Clothing', {'name': 'Sweater', 'must_have': False}),
+            ('Accessories', {'name': 'Scarf', 'must_have': False}),
+            ('Accessories', {'name': 'Gloves', 'must_have': False}),
+        ])
+    
+    if hottest is not None and hottest > 75:
+        weather_items.extend([
+            ('Clothing', {'name': 'Sunglasses', 'must_have': True}),
+            ('Toiletries', {'name': 'Sunscreen', 'must_have': True}),
+            ('Clothing', {'name': 'Hat', 'must_have': False}),
+            ('Clothing', {'name': 'Shorts', 'must_have': False}),
+        ])
+    
+    if total_rain > 0:
+        weather_items.extend([
+            ('Accessories', {'name': 'Umbrella', 'must_have': True}),
+            ('Clothing', {'name': 'Rain Jacket', 'must_have': True}),
+            ('Accessories', {'name': 'Waterproof Bag', 'must_have': False}),
+        ])
+    
+    # Add clothing based on duration
+    clothing_items = [
+        ('Clothing', {'name': 'T-shirt', 'must_have': True}, duration),
+        ('Clothing', {'name': 'Underwear', 'must_have': True}, duration),
+        ('Clothing', {'name': 'Socks', 'must_have': True}, duration),
+        ('Clothing', {'name': 'Pants', 'must_have': True}, (duration // 2) + 1),
+    ]
+
+    # Build the whole target list in memory, then write it with two upserts
+    fixed_items = {}
+    for category, items in basic_items:
+        for item in items:
+            fixed_items[(item['name'], category)] = PackingListItem(
+                trip=trip, name=item['name'], category=category,
+                must_have=item['must_have'], is_auto_generated=True
+            )
+    for category, item in weather_items:
+        fixed_items[(item['name'], category)] = PackingListItem(
+            trip=trip, name=item['name'], category=category,
+            must_have=item['must_have'], is_auto_generated=True
+        )
+    scaled_items = {
+        (item['name'], category): PackingListItem(
+            trip=trip, name=item['name'], category=category, quantity=count,
+            must_have=item['must_have'], is_auto_generated=True
+        )
+        for category, item, count in clothing_items
+    }
+
+    with transaction.atomic():
+        # Items already on the list keep their quantity and packed state...
+        upsert_packing_items(
+            [item for key, item in fixed_items.items() if key not in scaled_items], ['must_have']
+        )
+        # ...except the clothing counts, which follow the trip length
+        upsert_packing_items(scaled_items.values(), ['quantity', 'must_have'])
+
+
+def upsert_packing_items(items, update_fields):
+    """
+    Insert PackingListItems in one query. Items already on the trip's list
+    under the same name and category get ``update_fields`` overwritten
+    instead. Duplicates in ``items`` must be removed by the caller.
+    """
+    return PackingListItem.objects.bulk_create(
+        list(items),
+        update_conflicts=True,
+        unique_fields=['trip', 'name', 'category'],
+        update_fields=list(update_fields) + ['updated_at'],
+    )
+
+
+def add_manual_item(trip, name, category, quantity=1, must_have=False):
+    """
+    Add a user's own item to a trip's packing list. Each item is listed once
+    per category, so adding one that is already there adds to its quantity.
+    Returns (item, created).
+    """
+    item = PackingListItem.objects.filter(trip=trip, name=name, category=category).first()
+    if item:
+        item.quantity += quantity
+        item.must_have = item.must_have or must_have
+        item.save(update_fields=['quantity', 'must_have', 'updated_at'])
+        return item, False
+
+    item = PackingListItem.objects.create(
+        trip=trip,
+        name=name,
+        category=category,
+        quantity=quantity,
+        must_have=must_have,
+        is_auto_generated=False,
+    )
+    return item, True
+
+
+def build_smart_packing_list(trip):
+    """
+    Replace a trip's auto-generated non-clothing items with an LLM-generated
+    list and re-sync its outfits. Falls back to build_packing_list() if the
+    LLM answer isn't valid JSON. Returns a message for the user; raises if
+    the forecast or completion call fails.
+    """
+    # Get weather data
+    forecasts = get_daily_forecasts(trip.latitude, trip.longitude, trip.start_date, trip.end_date)
+    
+    # Prepare weather summary
+    weather_summary = [
+        {
+            'date': forecast.date.strftime('%Y-%m-%d'),
+            'temp': round(forecast.feels_like_mean),
+            'weather': forecast.condition
+        }
+        for forecast in forecasts
+    ]
+    
+    # Generate packing list using OpenAI
+    # More concise prompt to save tokens
+    prompt = f"""Trip: {trip.destination}, Days: {(trip.end_date - trip.start_date).days + 1}, Weather: {weather_summary[0]['weather'] if weather_summary else 'Unknown'}, Temp: {weather_summary[0]['temp'] if weather_summary else 'Unknown'}°F.
+    Create minimal packing list with categories: Clothing, Toiletries, Electronics, Miscellaneous.
+    Format: JSON object with category names as keys, item arrays as values."""
+    
+    response_text = complete(
+        prompt,
+        max_tokens=300,  # Limit response size
+        temperature=0.5  # Lower creativity for more predictable responses
+    )
+    
+    # Parse the response and create packing list items
+    try:
+        items_by_category = json.loads(response_text)
+    except json.JSONDecodeError:
+        build_packing_list(trip)
+        return 'Error parsing AI response. Used the standard packing list instead.'
+    
+    # Collect the new items; the LLM sometimes repeats one, and the last copy wins
+    new_items = {}
+    for category, items in items_by_category.items():
+        # Skip clothing category as it will be handled by outfit recommendations
+        if category.lower() == 'clothing':
+            continue
+            
+        for item in items:
+            name = item
+            quantity = 1
+            
+            # If item is a dict with name and quantity
+            if isinstance(item, dict):
+                name = item.get('name', '')
+                quantity = item.get('quantity', 1)
+            
+            new_items[(name, category)] = PackingListItem(
+                trip=trip,
+                name=name,
+                category=category,
+                quantity=quantity,
+                is_auto_generated=True
+            )
+    
+    with transaction.atomic():
+        # Delete existing auto-generated items, except those from outfit recommendations
+        PackingListItem.objects.filter(
+            trip=trip,
+            is_auto_generated=True,
+            category__in=['Toiletries', 'Electronics', 'Miscellaneous']
+        ).delete()
+
+        # Items the user added themselves under the same name just get the new quantity
+        upsert_packing_items(new_items.values(), ['quantity'])
+    
+    # Sync all outfit recommendations to the packing list
+    sync_trip_outfits_to_packing_list(trip)
+    
+    return 'Smart packing list generated successfully!'
@@ -0,0 +1,293 @@
+import threading
+from collections import defaultdict
+from contextlib import nullcontext
+from itertools import groupby
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from trips.models import PackingListItem
+from trips.packing import add_manual_item
+
+
+class _Write:
+    def __init__(self, trip_id, item_id, user_id, toggle=False, quantity_delta=0):
+        self.trip_id = trip_id
+        self.item_id = item_id
+        self.user_id = user_id
+        self.toggle = toggle
+        # +n adds n; -n removes n but never goes below 1, like the quantity buttons
+        self.quantity_delta = quantity_delta
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _quantity_expression(deltas):
+    """F() expression applying quantity changes in order, clamping decreases at 1"""
+    expression = F('quantity')
+    for delta in deltas:
+        expression = expression + delta if delta > 0 else Greatest(expression + delta, Value(1))
+    return expression
+
+
+def apply_packing_writes(writes):
+    """
+    Apply toggle/quantity writes in one transaction. Repeated toggles of an
+    item cancel out in pairs and its quantity changes fold into a single
+    expression; items of a trip that end up with the same change (typically
+    "toggle") share one UPDATE limited to the fields that change.
+
+    Each write's ``result`` is set to the item's state once the batch is
+    committed ({'is_packed': ..., 'quantity': ...}), or None if the item doesn't exist
+    or doesn't belong to the write's trip and user. Every write of an item gets
+    the same final state, so clients end up showing what was committed
+    whatever order the responses arrive in.
+    """
+    by_item = defaultdict(list)
+    for write in writes:
+        by_item[write.item_id, write.trip_id, write.user_id].append(write)
+
+    # (trip, user, toggle?, quantity changes) -> item ids
+    by_change = defaultdict(list)
+    for (item_id, trip_id, user_id), item_writes in by_item.items():
+        toggle = sum(write.toggle for write in item_writes) % 2 == 1
+        deltas = tuple(write.quantity_delta for write in item_writes if write.quantity_delta)
+        if toggle or deltas:
+            by_change[trip_id, user_id, toggle, deltas].append(item_id)
+
+    now = timezone.now()
+    updates = []
+    for (trip_id, user_id, toggle, deltas), item_ids in by_change.items():
+        values = {'updated_at': now}
+        if toggle:
+            values['is_packed'] = Case(When(is_packed=True, then=Value(False)), default=Value(True))
+        if deltas:
+            values['quantity'] = _quantity_expression(deltas)
+        updates.append((
+            PackingListItem.objects.filter(id__in=item_ids, trip_id=trip_id, trip__user_id=user_id), values
+        ))
+
+    # A single UPDATE is atomic on its own; skipping the explicit transaction
+    # keeps SQLite's writer lock for just that statement
+    with transaction.atomic() if len(updates) > 1 else nullcontext():
+        for items, values in updates:
+            items.update(**values)
+
+    # Read back after the commit, outside the writer lock
+    states = {
+        row['id']: row
+        for row in PackingListItem.objects.filter(id__in={write.item_id for write in writes}).values(
+            'id', 'trip_id', 'trip__user_id', 'is_packed', 'quantity'
+        )
+    }
+
+    for write in writes:
+        state = states.get(write.item_id)
+        if state and state['trip_id'] == write.trip_id and state['trip__user_id'] == write.user_id:
+            write.result = {'is_packed': state['is_packed'], 'quantity': state['quantity']}
+
+
+def apply_packing_write(write):
+    """
+    Apply one toggle/quantity write on its own, with the two queries the
+    plain read-then-save() took: read the item (checking it belongs to the
+    write's trip and user), then an UPDATE of just the changed fields that
+    only matches if the item still has the values read. If another write got
+    in between, read it again and retry, so concurrent clicks aren't lost.
+    Sets ``result`` like apply_packing_writes.
+    """
+    items = PackingListItem.objects.filter(id=write.item_id)
+    state = items.filter(trip_id=write.trip_id, trip__user_id=write.user_id).values('is_packed', 'quantity').first()
+    while state is not None:
+        values = {'is_packed': state['is_packed'] != write.toggle, 'quantity': state['quantity']}
+        if write.quantity_delta > 0:
+            values['quantity'] += write.quantity_delta
+        elif write.quantity_delta < 0:
+            values['quantity'] = max(values['quantity'] + write.quantity_delta, 1)
+
+        if items.filter(**state).update(updated_at=timezone.now(), **values):
+            write.result = values
+            return
+        state = items.values('is_packed', 'quantity').first()
+
+
+class PackingWriteQueue:
+    """
+    Group commit for packing list writes inside one process.
+
+    The first caller to arrive becomes the leader: it waits up to ``window``
+    seconds (less if ``max_batch`` writes pile up) for other callers, then
+    applies everything queued in one transaction and wakes them with their
+    results. Bursts of clicks then take SQLite's writer lock once per batch
+    instead of once per click.
+    """
+
+    def __init__(self, window, max_batch):
+        self.window = window
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._pending = []
+        self._collecting = False
+        self._full = threading.Event()
+        self.batches = 0
+        self.writes = 0
+
+    def submit(self, write):
+        with self._lock:
+            self._pending.append(write)
+            leader = not self._collecting
+            self._collecting = True
+            if len(self._pending) >= self.max_batch:
+                self._full.set()
+
+        if leader:
+            self._full.wait(self.window)
+            with self._lock:
+                batch, self._pending = self._pending, []
+                self._collecting = False
+                self._full.clear()
+                self.batches += 1
+                self.writes += len(batch)
+
+            try:
+                apply_packing_writes(batch)
+            except Exception as e:
+                for queued in batch:
+                    queued.error = e
+            finally:
+                for queued in batch:
+                    queued.event.set()
+
+        write.event.wait()
+        if write.error is not None:
+            raise write.error
+        return write.result
+
+
+write_queue = PackingWriteQueue(
+    window=settings.PACKING_WRITE_WINDOW_MS / 1000,
+    max_batch=settings.PACKING_WRITE_MAX_BATCH,
+)
+
+
+def submit_packing_write(trip_id, item_id, user_id, toggle=False, quantity_delta=0, queue=None):
+    """
+    Toggle an item's packed flag and/or change its quantity. With
+    PACKING_WRITE_WINDOW_MS set (or an explicit ``queue``), the write is
+    coalesced with others arriving within the window; by default it is
+    applied straight away. Returns the item's state after the write, or None
+    if the user has no such item on that trip.
+    """
+    write = _Write(trip_id, item_id, user_id, toggle=toggle, quantity_delta=quantity_delta)
+    if queue is None:
+        if settings.PACKING_WRITE_WINDOW_MS <= 0:
+            apply_packing_write(write)
+            return write.result
+        queue = write_queue
+    return queue.submit(write)
+
+
+# Largest quantity an add, and largest step a quantity change, may carry
+MAX_QUANTITY = 999
+
+# Consecutive operations of the same kind are applied together
+_OP_KINDS = {'add': 'add', 'toggle': 'write', 'quantity': 'write', 'delete': 'delete'}
+
+
+def _require_int(operation, field, default=None, minimum=None, maximum=None):
+    value = operation.get(field, default)
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"'{field}' must be an integer")
+    if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+        raise ValueError(f"'{field}' must be between {minimum} and {maximum}")
+    return value
+
+
+def _require_text(operation, field, max_length):
+    value = operation.get(field)
+    if not isinstance(value, str) or not value.strip():
+        raise ValueError(f"'{field}' is required")
+    if len(value.strip()) > max_length:
+        raise ValueError(f"'{field}' is longer than {max_length} characters")
+    return value.strip()
+
+
+def apply_packing_batch(trip, operations):
+    """
+    Apply a client's queued packing list edits for ``trip`` in one
+    transaction. Operations look like
+
+        {"op": "toggle", "item_id": 5}
+        {"op": "quantity", "item_id": 5, "delta": -2}   (never below 1)
+        {"op": "add", "name": "Hat", "category": "Accessories", "quantity": 1, "must_have": false}
+        {"op": "delete", "item_id": 5}
+
+    Operations are applied in the order given; consecutive ones of the same
+    kind (adds, toggles and quantity changes, deletes) share their queries.
+    Returns one result dict per operation, in order: the item's state after
+    the operation for toggles and quantity changes, the PackingListItem for
+    adds, and whether the item was found for deletes. Raises ValueError for
+    a malformed operation before anything is written.
+    """
+    if not isinstance(operations, list):
+        raise ValueError("'operations' must be a list")
+    if len(operations) > settings.PACKING_BATCH_MAX_OPERATIONS:
+        raise ValueError(f"At most {settings.PACKING_BATCH_MAX_OPERATIONS} operations per batch")
+
+    parsed = []
+    for operation in operations:
+        if not isinstance(operation, dict):
+            raise ValueError("Each operation must be an object")
+        op = operation.get('op')
+        if op == 'add':
+            parsed.append((op, {
+                'name': _require_text(operation, 'name', PackingListItem._meta.get_field('name').max_length),
+                'category': _require_text(operation, 'category', PackingListItem._meta.get_field('category').max_length),
+                'quantity': _require_int(operation, 'quantity', 1, minimum=1, maximum=MAX_QUANTITY),
+                'must_have': operation.get('must_have') is True,
+            }))
+        elif op in ('toggle', 'delete'):
+            parsed.append((op, _require_int(operation, 'item_id')))
+        elif op == 'quantity':
+            parsed.append((op, (
+                _require_int(operation, 'item_id'),
+                _require_int(operation, 'delta', minimum=-MAX_QUANTITY, maximum=MAX_QUANTITY),
+            )))
+        else:
+            raise ValueError(f"Unknown operation {op!r}")
+
+    results = [None] * len(parsed)
+    with transaction.atomic():
+        for kind, run in groupby(enumerate(parsed), key=lambda entry: _OP_KINDS[entry[1][0]]):
+            run = list(run)
+            if kind == 'add':
+                for index, (op, value) in run:
+                    item, created = add_manual_item(trip, **value)
+                    results[index] = {'op': op, 'item': item, 'created': created}
+
+            elif kind == 'write':
+                writes = {}
+                for index, (op, value) in run:
+                    if op == 'toggle':
+                        writes[index] = _Write(trip.id, value, trip.user_id, toggle=True)
+                    else:
+                        item_id, delta = value
+                        writes[index] = _Write(trip.id, item_id, trip.user_id, quantity_delta=delta)
+                apply_packing_writes(list(writes.values()))
+                for index, write in writes.items():
+                    results[index] = {'op': parsed[index][0], 'item_id': write.item_id, 'found': write.result is not None}
+                    if write.result is not None:
+                        results[index].update(write.result)
+
+            else:
+                items = PackingListItem.objects.filter(trip=trip, id__in={value for _, (_, value) in run})
+                deleted_ids = set(items.values_list('id', flat=True))
+                items.delete()
+                for index, (op, value) in run:
+                    results[index] = {'op': op, 'item_id': value, 'found': value in deleted_ids}
+
+    return results
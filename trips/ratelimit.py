@@ -0,0 +1,119 @@
+import time
+import uuid
+from contextlib import contextmanager
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from trips.metrics import current_user_id
+
+
+class RateLimitExceeded(requests.exceptions.RequestException):
+    """Raised when a call would have to queue longer than RATE_LIMIT_MAX_WAIT for a slot"""
+
+
+def try_cache_lock(key, timeout):
+    """Take a lock in the shared Django cache without waiting; return its token, or None if it is held"""
+    token = uuid.uuid4().hex
+    return token if cache.add(key, token, timeout=timeout) else None
+
+
+def release_cache_lock(key, token):
+    """Release a lock taken with ``token``, unless it expired and is someone else's now"""
+    if cache.get(key) == token:
+        cache.delete(key)
+
+
+@contextmanager
+def cache_lock(key, timeout):
+    """Short mutual-exclusion lock in the shared Django cache"""
+    deadline = time.monotonic() + timeout
+    token = try_cache_lock(key, timeout)
+    while token is None:
+        if time.monotonic() >= deadline:
+            # The holder died mid-update; its lock expires on its own
+            break
+        time.sleep(0.005)
+        token = try_cache_lock(key, timeout)
+    try:
+        yield
+    finally:
+        if token is not None:
+            release_cache_lock(key, token)
+
+
+class TokenBucket:
+    """
+    Token bucket whose state lives in the Django cache. ``rate`` tokens per
+    second refill up to ``burst``.
+
+    Every worker process draws from the same budget only when CACHES points
+    at a shared backend (database, memcached, redis); with the default
+    local-memory cache each process has its own bucket, so the effective
+    limit is the configured one times the number of processes.
+
+    Callers reserve a token even when the bucket is empty (the balance goes
+    negative) and are told how long to wait for it, so they queue in arrival
+    order without polling.
+    """
+
+    def __init__(self, name, rate, burst):
+        self.name = name
+        self.rate = rate
+        self.burst = burst
+        self.state_key = f'ratelimit:{name}'
+        self.lock_key = f'ratelimit:lock:{name}'
+
+    def reserve(self, max_wait):
+        """Reserve one token and return the seconds to wait for it, or None if that exceeds ``max_wait``"""
+        with cache_lock(self.lock_key, settings.RATE_LIMIT_LOCK_TIMEOUT):
+            now = time.time()
+            tokens, updated_at = cache.get(self.state_key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+            if wait > max_wait:
+                return None
+            cache.set(self.state_key, (tokens - 1, now), timeout=self.state_timeout(max_wait))
+        return wait
+
+    def refund(self, max_wait):
+        """Give back a token reserved by reserve(), for a call that didn't go ahead"""
+        with cache_lock(self.lock_key, settings.RATE_LIMIT_LOCK_TIMEOUT):
+            now = time.time()
+            tokens, updated_at = cache.get(self.state_key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate + 1)
+            cache.set(self.state_key, (tokens, now), timeout=self.state_timeout(max_wait))
+
+    def state_timeout(self, max_wait):
+        # Keep the state until the bucket would have refilled anyway
+        return int(self.burst / self.rate + max_wait) + 60
+
+
+def acquire(upstream):
+    """
+    Block until one more call to ``upstream`` fits both its overall budget
+    (RATE_LIMITS) and the current user's budget (USER_RATE_LIMITS), and
+    return the seconds spent waiting. Raises RateLimitExceeded instead of
+    queueing longer than RATE_LIMIT_MAX_WAIT, giving back any token already
+    reserved so refused calls don't use up the budget.
+    """
+    buckets = []
+    if upstream in settings.RATE_LIMITS:
+        buckets.append(TokenBucket(upstream, *settings.RATE_LIMITS[upstream]))
+    user_id = current_user_id.get()
+    if user_id is not None and upstream in settings.USER_RATE_LIMITS:
+        buckets.append(TokenBucket(f'{upstream}:user:{user_id}', *settings.USER_RATE_LIMITS[upstream]))
+
+    wait = 0.0
+    for index, bucket in enumerate(buckets):
+        bucket_wait = bucket.reserve(settings.RATE_LIMIT_MAX_WAIT)
+        if bucket_wait is None:
+            for reserved in buckets[:index]:
+                reserved.refund(settings.RATE_LIMIT_MAX_WAIT)
+            raise RateLimitExceeded(f"{upstream} rate limit queue is full, try again later")
+        wait = max(wait, bucket_wait)
+
+    if wait:
+        time.sleep(wait)
+    return wait
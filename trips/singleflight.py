@@ -0,0 +1,102 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from trips.ratelimit import release_cache_lock, try_cache_lock
+
+MISSING = object()
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapse concurrent calls with the same key inside one process.
+
+    The first caller for a key runs the function; callers that arrive while
+    it is still running wait for it and get the same result (or exception).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+
+def shared_call(key, fn, result_ttl=None):
+    """
+    Run ``fn`` once across processes using a lock in the shared Django cache.
+
+    The process that takes the lock calls ``fn``; if ``result_ttl`` is set it
+    also publishes the result so processes waiting on the lock can use it
+    instead of calling ``fn`` themselves. Without ``result_ttl`` waiters call
+    ``fn`` after the lock is released, which suits functions that re-check a
+    shared store (e.g. the DailyForecast table) before going upstream.
+
+    Only coalesces across processes when CACHES points at a shared backend
+    (database, memcached, redis); with the default local-memory cache it
+    degrades to per-process locking.
+    """
+    lock_key = f'singleflight:lock:{key}'
+    result_key = f'singleflight:result:{key}'
+    deadline = time.monotonic() + settings.SINGLEFLIGHT_WAIT_TIMEOUT
+
+    while True:
+        if result_ttl:
+            result = cache.get(result_key, MISSING)
+            if result is not MISSING:
+                return result
+
+        token = try_cache_lock(lock_key, settings.SINGLEFLIGHT_LOCK_TIMEOUT)
+        if token is not None:
+            try:
+                result = fn()
+                if result_ttl:
+                    cache.set(result_key, result, result_ttl)
+                return result
+            finally:
+                # If fn outlasted the lock, it may be the next leader's by now
+                release_cache_lock(lock_key, token)
+
+        if time.monotonic() >= deadline:
+            # The lock holder is slow or died; don't hold this request hostage
+            return fn()
+        time.sleep(settings.SINGLEFLIGHT_POLL_INTERVAL)
+
+
+def coalesced(flight, key, fn, result_ttl=None):
+    """Single-flight ``fn`` within this process and then across processes"""
+    return flight.do(key, lambda: shared_call(key, fn, result_ttl=result_ttl))
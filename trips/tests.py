@@ -0,0 +1,751 @@
+import json
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
+
+import requests
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import QuerySet
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from trips import api_client, outfit_cache
+from trips.api_client import APIClient, CircuitBreaker
+from trips.cron import prefetch_forecasts
+from trips.jobs import claim_job, enqueue_generation_job, run_job
+from trips.management.commands.run_api_standin import fake_completion_text
+from trips.models import DailyForecast, GenerationJob, OutfitRecommendation, OutfitResponseCache, PackingListItem, Trip
+from trips.outfit_rules import rule_based_items
+from trips.outfits import _save_outfits, parse_trip_outfits, trip_outfits_prompt
+from trips.packing_writes import submit_packing_write
+from trips.metrics import caller
+from trips.ratelimit import RateLimitExceeded, TokenBucket, acquire
+from trips.singleflight import shared_call
+from trips.weather import ForecastCache, aggregate_daily, store_daily_forecasts
+
+
+@contextmanager
+def fake_track_call(upstream, endpoint):
+    yield {'queue_wait_ms': 0}
+
+
+def make_trip(user, destination='Paris'):
+    return Trip.objects.create(
+        user=user, destination=destination, latitude=0, longitude=0,
+        start_date=date(2025, 6, 1), end_date=date(2025, 6, 3),
+    )
+
+
+def open_breaker_ready_for_trial(breaker):
+    breaker.state = CircuitBreaker.OPEN
+    breaker.failures = breaker.failure_threshold
+    breaker.opened_at = time.monotonic() - breaker.reset_timeout - 1
+
+
+@mock.patch('trips.api_client.track_call', fake_track_call)
+class RateLimitedHalfOpenTrialTests(SimpleTestCase):
+    def test_get_gives_back_the_trial(self):
+        client = APIClient('Test')
+        open_breaker_ready_for_trial(client.breaker)
+
+        with mock.patch('trips.api_client.acquire', side_effect=RateLimitExceeded('full')):
+            with self.assertRaises(RateLimitExceeded):
+                client.get('http://upstream.invalid/')
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+        # The next call makes the trial, and its success closes the circuit
+        response = mock.Mock(status_code=200)
+        with mock.patch('trips.api_client.acquire', return_value=0), \
+                mock.patch.object(client.session, 'get', return_value=response):
+            self.assertIs(client.get('http://upstream.invalid/'), response)
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_completion_gives_back_the_trial(self):
+        breaker = api_client.openai_breaker
+        saved = (breaker.state, breaker.failures, breaker.opened_at)
+
+        def restore():
+            breaker.state, breaker.failures, breaker.opened_at = saved
+        self.addCleanup(restore)
+        open_breaker_ready_for_trial(breaker)
+
+        with mock.patch('trips.api_client.acquire', side_effect=RateLimitExceeded('full')):
+            with self.assertRaises(RateLimitExceeded):
+                api_client._complete('prompt', max_tokens=10, temperature=0.5)
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertTrue(breaker.allow_request())
+
+
+class RuleBasedOutfitTests(SimpleTestCase):
+    def test_rain_jacket_wins_over_season_outerwear(self):
+        for season in ('Spring', 'Fall'):
+            items = rule_based_items(60, 'Rain', season)
+            self.assertIn('Rain jacket', items)
+            self.assertNotIn('Light cardigan', items)
+            self.assertIn('Umbrella', items)
+
+    def test_season_outerwear_fills_an_empty_slot(self):
+        self.assertIn('Light cardigan', rule_based_items(60, 'Clear', 'Spring'))
+
+
+class StandinCompletionTests(SimpleTestCase):
+    def test_trip_outfits_prompt_gets_an_outfit_per_day(self):
+        start = date(2025, 6, 1)
+        days = [
+            (start + timedelta(days=offset), temp, 'Clear', 'Summer')
+            for offset, temp in enumerate((40, 60, 80))
+        ]
+        dates = [day for day, *_ in days]
+        prompt = trip_outfits_prompt('Paris', days)
+
+        outfits = parse_trip_outfits(fake_completion_text(prompt), dates)
+        self.assertEqual(list(outfits), dates)
+        self.assertIn('- Winter coat', outfits[dates[0]])
+        self.assertIn('- Shorts', outfits[dates[2]])
+
+
+def forecast_entry(at, temp, condition, condition_id, pop=0, rain=None):
+    entry = {
+        'dt': int(at.timestamp()),
+        'main': {'temp': temp, 'feels_like': temp - 2, 'humidity': 50},
+        'wind': {'speed': 4},
+        'clouds': {'all': 20},
+        'weather': [{'id': condition_id, 'main': condition}],
+        'pop': pop,
+    }
+    if rain is not None:
+        entry['rain'] = {'3h': rain}
+    return entry
+
+
+def forecast_payload(utc_offset=0):
+    june_1 = datetime(2025, 6, 1, tzinfo=dt_timezone.utc)
+    entries = [
+        forecast_entry(june_1 + timedelta(hours=15), 70, 'Rain', 501, pop=0.8, rain=2.5),
+        forecast_entry(june_1 + timedelta(hours=3), 60, 'Clear', 800),
+        forecast_entry(june_1 + timedelta(hours=9), 65, 'Rain', 500, pop=0.4, rain=1),
+        forecast_entry(june_1 + timedelta(hours=23), 55, 'Clouds', 803),
+    ]
+    return {'list': entries, 'city': {'timezone': utc_offset}}
+
+
+class DailyForecastAggregationTests(SimpleTestCase):
+    def test_entries_are_summarised_per_day(self):
+        (day,) = aggregate_daily(forecast_payload())
+        self.assertEqual(day['date'], date(2025, 6, 1))
+        self.assertEqual((day['temp_min'], day['temp_max'], day['temp_mean']), (55, 70, 62.5))
+        self.assertEqual((day['pop_max'], day['rain_total']), (0.8, 3.5))
+        # Rain is the most frequent condition; its icon code comes from its earliest entry
+        self.assertEqual((day['condition'], day['condition_id']), ('Rain', 500))
+
+    def test_days_follow_the_destinations_local_time(self):
+        days = aggregate_daily(forecast_payload(utc_offset=2 * 3600))
+        self.assertEqual([day['date'] for day in days], [date(2025, 6, 1), date(2025, 6, 2)])
+        self.assertEqual((days[1]['condition'], days[1]['temp_mean']), ('Clouds', 55))
+
+    def test_empty_forecast(self):
+        self.assertEqual(aggregate_daily({'list': []}), [])
+
+
+class StoreDailyForecastTests(TestCase):
+    def test_refetching_updates_the_stored_days(self):
+        key = (48.86, 2.35)
+        store_daily_forecasts(key, forecast_payload())
+        payload = forecast_payload(utc_offset=2 * 3600)
+        for entry in payload['list']:
+            entry['main']['temp'] += 10
+        store_daily_forecasts(key, payload)
+
+        rows = list(DailyForecast.objects.values_list('date', 'temp_max'))
+        self.assertEqual(rows, [(date(2025, 6, 1), 80), (date(2025, 6, 2), 65)])
+
+
+class ForecastCacheTests(SimpleTestCase):
+    def make_cache(self, ttl=60, stale_ttl=0, max_entries=10):
+        self.fetched = []
+
+        def fetch(latitude, longitude):
+            self.fetched.append((latitude, longitude))
+            return f'forecast {len(self.fetched)}'
+        return ForecastCache(ttl, stale_ttl, max_entries, fetch=fetch)
+
+    def test_nearby_locations_share_one_fetch(self):
+        forecasts = self.make_cache()
+        self.assertEqual(forecasts.get(48.8566, 2.3522), 'forecast 1')
+        self.assertEqual(forecasts.get(48.8601, 2.3479), 'forecast 1')
+        self.assertEqual(self.fetched, [(48.86, 2.35)])
+        self.assertEqual((forecasts.hits, forecasts.misses), (1, 1))
+
+    def test_least_recently_used_location_is_evicted(self):
+        forecasts = self.make_cache(max_entries=2)
+        forecasts.get(1, 1)
+        forecasts.get(2, 2)
+        forecasts.get(1, 1)
+        forecasts.get(3, 3)
+        forecasts.get(1, 1)
+        forecasts.get(2, 2)
+        self.assertEqual(self.fetched, [(1, 1), (2, 2), (3, 3), (2, 2)])
+        self.assertEqual(forecasts.stats()['evictions'], 2)
+
+    def test_stale_entries_are_served_while_refreshing(self):
+        forecasts = self.make_cache(ttl=0, stale_ttl=60)
+
+        def wait_for_refreshes(count):
+            deadline = time.monotonic() + 2
+            while forecasts.refreshes < count and time.monotonic() < deadline:
+                time.sleep(0.01)
+            self.assertEqual(forecasts.refreshes, count)
+
+        forecasts.get(1, 1)
+        self.assertEqual(forecasts.get(1, 1), 'forecast 1')
+        wait_for_refreshes(1)
+        self.assertEqual(forecasts.get(1, 1), 'forecast 2')
+        wait_for_refreshes(2)
+        self.assertEqual(forecasts.stale_hits, 2)
+
+    def test_expired_entry_is_served_when_the_refetch_fails(self):
+        fetch = mock.Mock(side_effect=requests.exceptions.ConnectionError())
+        forecasts = ForecastCache(ttl=0, stale_ttl=0, max_entries=10, fetch=fetch)
+        forecasts.set((1.0, 1.0), 'old forecast')
+
+        self.assertEqual(forecasts.get(1, 1), 'old forecast')
+        self.assertEqual(forecasts.degraded, 1)
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            forecasts.get(2, 2)
+
+
+class GenerationJobQueueTests(TestCase):
+    def setUp(self):
+        self.trip = make_trip(User.objects.create(username='traveller'))
+
+    def test_enqueue_reuses_the_active_job(self):
+        job = enqueue_generation_job(self.trip, GenerationJob.OUTFITS)
+        self.assertEqual(enqueue_generation_job(self.trip, GenerationJob.OUTFITS), job)
+        self.assertNotEqual(enqueue_generation_job(self.trip, GenerationJob.SMART_PACKING), job)
+
+        GenerationJob.objects.filter(id=job.id).update(status=GenerationJob.SUCCEEDED)
+        self.assertNotEqual(enqueue_generation_job(self.trip, GenerationJob.OUTFITS), job)
+        self.assertEqual(GenerationJob.objects.filter(kind=GenerationJob.OUTFITS).count(), 2)
+
+    def test_one_active_job_per_trip_and_kind(self):
+        GenerationJob.objects.create(trip=self.trip, kind=GenerationJob.OUTFITS)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            GenerationJob.objects.create(trip=self.trip, kind=GenerationJob.OUTFITS, status=GenerationJob.RUNNING)
+        # Finished jobs don't count against the constraint
+        GenerationJob.objects.create(trip=self.trip, kind=GenerationJob.OUTFITS, status=GenerationJob.FAILED)
+
+    def test_enqueue_race_returns_the_winners_job(self):
+        winner = GenerationJob.objects.create(trip=self.trip, kind=GenerationJob.OUTFITS)
+        # The lookup misses, as if the other request inserted right after it
+        with mock.patch.object(QuerySet, 'first', return_value=None):
+            self.assertEqual(enqueue_generation_job(self.trip, GenerationJob.OUTFITS), winner)
+
+    def test_each_job_is_claimed_once(self):
+        job = enqueue_generation_job(self.trip, GenerationJob.OUTFITS)
+        claimed = claim_job('worker-1')
+        self.assertEqual(claimed, job)
+        self.assertEqual((claimed.status, claimed.locked_by, claimed.attempts), (GenerationJob.RUNNING, 'worker-1', 1))
+        self.assertIsNone(claim_job('worker-2'))
+
+    def test_claim_loses_a_race_to_another_worker(self):
+        enqueue_generation_job(self.trip, GenerationJob.OUTFITS)
+        real_update = QuerySet.update
+
+        def update(queryset, **values):
+            # Another worker claims the job between our SELECT and our UPDATE
+            real_update(GenerationJob.objects.all(), status=GenerationJob.RUNNING, locked_by='worker-2',
+                        locked_at=timezone.now())
+            return real_update(queryset, **values)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=update):
+            self.assertIsNone(claim_job('worker-1'))
+        self.assertEqual(GenerationJob.objects.get().locked_by, 'worker-2')
+
+    def test_claim_skips_jobs_that_are_not_due(self):
+        enqueue_generation_job(self.trip, GenerationJob.OUTFITS)
+        GenerationJob.objects.update(run_after=timezone.now() + timedelta(minutes=5))
+        self.assertIsNone(claim_job('worker-1'))
+
+    @override_settings(GENERATION_JOB_LOCK_TIMEOUT=60)
+    def test_jobs_of_dead_workers_are_reclaimed(self):
+        enqueue_generation_job(self.trip, GenerationJob.OUTFITS)
+        claim_job('worker-1')
+        GenerationJob.objects.update(locked_at=timezone.now() - timedelta(minutes=5))
+
+        claimed = claim_job('worker-2')
+        self.assertEqual((claimed.locked_by, claimed.attempts), ('worker-2', 2))
+        self.assertIsNone(claim_job('worker-3'))
+
+
+class GroupedOutfitJobTests(TestCase):
+    def test_user_outfit_jobs_run_together(self):
+        user = User.objects.create(username='traveller')
+        other = User.objects.create(username='someone-else')
+        paris, rome, oslo = (make_trip(user, name) for name in ('Paris', 'Rome', 'Oslo'))
+        elsewhere = make_trip(other, 'Lima')
+        for trip in (paris, rome, oslo, elsewhere):
+            enqueue_generation_job(trip, GenerationJob.OUTFITS)
+
+        result = {'generated': {paris.id}, 'errors': {rome.id: 'No forecast'}, 'timed_out': {oslo.id: 2}}
+        with mock.patch('trips.jobs.generate_outfits_for_trips', return_value=result) as generate:
+            ran = run_job(claim_job('test-worker'))
+
+        generate.assert_called_once()
+        self.assertEqual({trip.id for trip in generate.call_args.args[0]}, {paris.id, rome.id, oslo.id})
+        self.assertEqual(len(ran), 3)
+        statuses = dict(GenerationJob.objects.values_list('trip_id', 'status'))
+        self.assertEqual(statuses[paris.id], GenerationJob.SUCCEEDED)
+        self.assertEqual(statuses[rome.id], GenerationJob.QUEUED)
+        self.assertEqual(statuses[oslo.id], GenerationJob.QUEUED)
+        self.assertEqual(statuses[elsewhere.id], GenerationJob.QUEUED)
+        self.assertEqual(GenerationJob.objects.get(trip=oslo).error, '2 day(s) timed out')
+
+
+class OutfitStreamTests(TestCase):
+    @override_settings(OUTFIT_STREAM_TIMEOUT=0.2, OUTFIT_STREAM_POLL_INTERVAL=0.05, OUTFIT_STREAM_RETRY_MS=1500)
+    def test_stream_closes_with_a_retry_hint_while_the_job_runs(self):
+        user = User.objects.create(username='traveller')
+        trip = make_trip(user)
+        enqueue_generation_job(trip, GenerationJob.OUTFITS)
+        self.client.force_login(user)
+
+        started = time.monotonic()
+        response = self.client.get(reverse('trips:stream_outfit_recommendations', args=[trip.id]))
+        body = b''.join(response.streaming_content).decode()
+
+        self.assertLess(time.monotonic() - started, 2)
+        self.assertTrue(body.startswith('retry: 1500\n\n'))
+        self.assertNotIn('event: done', body)
+
+
+@override_settings(OUTFIT_ENGINE='llm')
+@mock.patch('trips.api_client.track_call', fake_track_call)
+class RegenerateOutfitTests(TestCase):
+    def test_regenerating_twice_gives_two_new_outfits(self):
+        user = User.objects.create(username='traveller')
+        trip = make_trip(user)
+        recommendation = OutfitRecommendation.objects.create(
+            trip=trip, day=trip.start_date, weather_condition='Clear', temperature=70,
+            outfit_description='- Outfit 0',
+        )
+        self.client.force_login(user)
+        answers = (mock.Mock(choices=[mock.Mock(text=f'- Outfit {number}')]) for number in range(1, 10))
+
+        outfits = []
+        with mock.patch('openai.completions.create', side_effect=lambda **kwargs: next(answers)), \
+                mock.patch('trips.views.get_cultural_notes', return_value=''):
+            for _ in range(2):
+                self.client.post(reverse('trips:regenerate_outfit', args=[trip.id, recommendation.id]))
+                recommendation.refresh_from_db()
+                outfits.append(recommendation.outfit_description)
+
+        self.assertEqual(outfits, ['- Outfit 1', '- Outfit 2'])
+
+
+@override_settings(ALL_OUTFITS_PAGE_SIZE=3)
+class AllOutfitsPaginationTests(TestCase):
+    def test_pages_cover_every_outfit_once_newest_day_first(self):
+        user = User.objects.create(username='traveller')
+        paris, rome = make_trip(user, 'Paris'), make_trip(user, 'Rome')
+        elsewhere = make_trip(User.objects.create(username='someone-else'), 'Lima')
+        for trip in (paris, rome, elsewhere):
+            for offset in range(3):
+                OutfitRecommendation.objects.create(
+                    trip=trip, day=trip.start_date + timedelta(days=offset), weather_condition='Clear',
+                    temperature=70, outfit_description=f'- {trip.destination}',
+                )
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('trips:all_outfits'))
+        seen = [recommendation.id for recommendation in response.context['recommendations']]
+        while response.context['next_page_url']:
+            response = self.client.get(response.context['next_page_url'], headers={'X-Requested-With': 'XMLHttpRequest'})
+            self.assertTemplateUsed(response, 'trips/all_outfits_page.html')
+            seen += [recommendation.id for recommendation in response.context['recommendations']]
+
+        # Days shared by both trips are split between pages by id, without repeats or gaps
+        expected = OutfitRecommendation.objects.filter(trip__user=user).order_by('-day', '-id')
+        self.assertEqual(seen, list(expected.values_list('id', flat=True)))
+
+    def test_malformed_cursor_starts_from_the_first_page(self):
+        user = User.objects.create(username='traveller')
+        trip = make_trip(user)
+        OutfitRecommendation.objects.create(
+            trip=trip, day=trip.start_date, weather_condition='Clear', temperature=70, outfit_description='- Hat',
+        )
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('trips:all_outfits'), {'before_day': 'yesterday', 'before_id': 'x'})
+        self.assertEqual(len(response.context['recommendations']), 1)
+
+
+class PackingWriteTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='traveller')
+        self.trip = make_trip(self.user)
+        self.item = PackingListItem.objects.create(trip=self.trip, name='Hat', category='Accessories', quantity=2)
+
+    def test_toggle_and_quantity_changes(self):
+        self.assertEqual(
+            submit_packing_write(self.trip.id, self.item.id, self.user.id, toggle=True),
+            {'is_packed': True, 'quantity': 2},
+        )
+        self.assertEqual(
+            submit_packing_write(self.trip.id, self.item.id, self.user.id, quantity_delta=-5),
+            {'is_packed': True, 'quantity': 1},
+        )
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.is_packed, self.item.quantity), (True, 1))
+
+    def test_other_users_items_are_not_written(self):
+        other = User.objects.create(username='someone-else')
+        self.assertIsNone(submit_packing_write(self.trip.id, self.item.id, other.id, toggle=True))
+        self.assertIsNone(submit_packing_write(make_trip(other).id, self.item.id, other.id, toggle=True))
+        self.item.refresh_from_db()
+        self.assertFalse(self.item.is_packed)
+
+    def test_write_retries_after_a_concurrent_change(self):
+        real_update = QuerySet.update
+        attempts = []
+
+        def update(queryset, **values):
+            if not attempts:
+                # Another request packs the item between our read and our UPDATE
+                real_update(PackingListItem.objects.filter(id=self.item.id), is_packed=True)
+            attempts.append(values)
+            return real_update(queryset, **values)
+
+        with mock.patch.object(QuerySet, 'update', autospec=True, side_effect=update):
+            result = submit_packing_write(self.trip.id, self.item.id, self.user.id, toggle=True)
+
+        # Both clicks count: packed by the other request, unpacked by ours
+        self.assertEqual(len(attempts), 2)
+        self.assertEqual(result, {'is_packed': False, 'quantity': 2})
+        self.item.refresh_from_db()
+        self.assertFalse(self.item.is_packed)
+
+
+class PackingListStatsTests(TestCase):
+    def test_counts_per_category_and_overall(self):
+        user = User.objects.create(username='traveller')
+        trip = make_trip(user)
+        for name, category, is_packed in (
+            ('Hat', 'Accessories', True), ('Scarf', 'Accessories', False),
+            ('Shirt', 'Clothing', True), ('Socks', 'Clothing', True), ('Charger', 'Electronics', False),
+        ):
+            PackingListItem.objects.create(trip=trip, name=name, category=category, is_packed=is_packed)
+        PackingListItem.objects.create(trip=make_trip(user, 'Rome'), name='Hat', category='Accessories', is_packed=True)
+        self.client.force_login(user)
+
+        # Session, user, trip and the one grouped aggregate
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('trips:packing_list_stats', args=[trip.id]))
+        self.assertEqual(response.json(), {
+            'total_items': 5,
+            'packed_items': 3,
+            'categories': {
+                'Accessories': {'total': 2, 'packed': 1},
+                'Clothing': {'total': 2, 'packed': 2},
+                'Electronics': {'total': 1, 'packed': 0},
+            },
+        })
+
+
+class PackingBatchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='traveller')
+        self.trip = make_trip(self.user)
+        self.item = PackingListItem.objects.create(trip=self.trip, name='Hat', category='Accessories')
+        self.client.force_login(self.user)
+
+    def post_batch(self, operations):
+        return self.client.post(
+            reverse('trips:packing_list_batch', args=[self.trip.id]),
+            json.dumps({'operations': operations}), content_type='application/json',
+        )
+
+    def test_delete_then_add_back_keeps_the_item(self):
+        response = self.post_batch([
+            {'op': 'delete', 'item_id': self.item.id},
+            {'op': 'add', 'name': 'Hat', 'category': 'Accessories', 'quantity': 2},
+        ])
+        self.assertEqual(response.status_code, 200)
+        item = PackingListItem.objects.get(trip=self.trip, name='Hat')
+        self.assertEqual(item.quantity, 2)
+        self.assertTrue(response.json()['results'][1]['created'])
+
+    def test_edits_before_a_delete_are_applied_first(self):
+        results = self.post_batch([
+            {'op': 'toggle', 'item_id': self.item.id},
+            {'op': 'delete', 'item_id': self.item.id},
+        ]).json()['results']
+        self.assertEqual([result['found'] for result in results], [True, True])
+        self.assertTrue(results[0]['is_packed'])
+        self.assertFalse(PackingListItem.objects.filter(id=self.item.id).exists())
+
+    def test_out_of_range_quantities_are_rejected(self):
+        for operation in (
+            {'op': 'add', 'name': 'Socks', 'category': 'Clothing', 'quantity': 10 ** 30},
+            {'op': 'add', 'name': 'Socks', 'category': 'Clothing', 'quantity': 0},
+            {'op': 'quantity', 'item_id': self.item.id, 'delta': 1000},
+            {'op': 'quantity', 'item_id': self.item.id, 'delta': -10 ** 30},
+        ):
+            response = self.post_batch([operation])
+            self.assertEqual(response.status_code, 400, operation)
+        self.assertEqual(PackingListItem.objects.filter(trip=self.trip).count(), 1)
+
+    @override_settings(PACKING_BATCH_MAX_OPERATIONS=2)
+    def test_malformed_batches_are_rejected_whole(self):
+        url = reverse('trips:packing_list_batch', args=[self.trip.id])
+        for body in ('not json', json.dumps([]), json.dumps({'operations': {'op': 'toggle'}})):
+            self.assertEqual(self.client.post(url, body, content_type='application/json').status_code, 400, body)
+
+        toggle = {'op': 'toggle', 'item_id': self.item.id}
+        for operations in (
+            [toggle, {'op': 'rename', 'item_id': self.item.id}],
+            [toggle, {'op': 'toggle', 'item_id': str(self.item.id)}],
+            [toggle, 'toggle'],
+            [toggle, {'op': 'add', 'name': '', 'category': 'Clothing'}],
+            [toggle, toggle, toggle],
+        ):
+            self.assertEqual(self.post_batch(operations).status_code, 400, operations)
+        # An invalid operation anywhere means none of the batch is applied
+        self.item.refresh_from_db()
+        self.assertFalse(self.item.is_packed)
+
+    def test_other_users_trips_and_items_are_not_touched(self):
+        other = User.objects.create(username='someone-else')
+        other_trip = make_trip(other)
+        other_item = PackingListItem.objects.create(trip=other_trip, name='Scarf', category='Accessories')
+
+        response = self.client.post(
+            reverse('trips:packing_list_batch', args=[other_trip.id]),
+            json.dumps({'operations': [{'op': 'toggle', 'item_id': other_item.id}]}),
+            content_type='application/json',
+        )
+        self.assertEqual(response.status_code, 404)
+
+        # Items of another trip can't be reached through this trip's id either
+        results = self.post_batch([
+            {'op': 'toggle', 'item_id': other_item.id},
+            {'op': 'quantity', 'item_id': other_item.id, 'delta': 3},
+            {'op': 'delete', 'item_id': other_item.id},
+        ]).json()['results']
+        self.assertEqual([result['found'] for result in results], [False, False, False])
+        other_item.refresh_from_db()
+        self.assertEqual((other_item.is_packed, other_item.quantity), (False, 1))
+
+
+@override_settings(RATE_LIMITS={'Test': (1, 2)}, USER_RATE_LIMITS={'Test': (1, 1)}, RATE_LIMIT_MAX_WAIT=0)
+class RateLimitTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_bucket_allows_its_burst_then_queues(self):
+        bucket = TokenBucket('Test', rate=1, burst=2)
+        self.assertEqual(bucket.reserve(max_wait=0), 0)
+        self.assertEqual(bucket.reserve(max_wait=0), 0)
+        self.assertIsNone(bucket.reserve(max_wait=0))
+        self.assertAlmostEqual(bucket.reserve(max_wait=5), 1, delta=0.1)
+
+    def test_refused_user_gives_back_the_overall_token(self):
+        with caller('test', user_id=1):
+            acquire('Test')
+            with self.assertRaises(RateLimitExceeded):
+                acquire('Test')
+        # The overall bucket still has its second token for someone else
+        with caller('test', user_id=2):
+            self.assertEqual(acquire('Test'), 0)
+
+
+class SharedCallTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_leader_outlasting_its_lock_keeps_the_next_leaders_lock(self):
+        def slow_call():
+            # The lock expired mid-call and another process took it
+            cache.set('singleflight:lock:key', 'next-leader')
+            return 'result'
+
+        self.assertEqual(shared_call('key', slow_call), 'result')
+        self.assertEqual(cache.get('singleflight:lock:key'), 'next-leader')
+
+    def test_lock_is_released_after_the_call(self):
+        shared_call('key', lambda: 'result')
+        self.assertIsNone(cache.get('singleflight:lock:key'))
+
+
+class OutfitCacheTests(TestCase):
+    def setUp(self):
+        outfit_cache._unrecorded_hits.clear()
+        self.signature, self.fields = outfit_cache.outfit_signature('Paris', 70, 'Clear', 'Summer')
+
+    def test_store_replaces_the_entry(self):
+        outfit_cache.store_outfit(self.signature, self.fields, '- Old')
+        outfit_cache.store_outfit(self.signature, self.fields, '- New')
+        self.assertEqual(OutfitResponseCache.objects.get().outfit_description, '- New')
+
+    def test_hits_are_written_back_once_per_touch_interval(self):
+        outfit_cache.store_outfit(self.signature, self.fields, '- Outfit')
+        # Just the lookups, no writes
+        with self.assertNumQueries(2):
+            self.assertEqual(outfit_cache.get_cached_outfit(self.signature), '- Outfit')
+            self.assertEqual(outfit_cache.get_cached_outfit(self.signature), '- Outfit')
+
+        with override_settings(OUTFIT_CACHE_TOUCH_INTERVAL=0), self.assertNumQueries(2):
+            outfit_cache.get_cached_outfit(self.signature)
+        self.assertEqual(OutfitResponseCache.objects.get().hit_count, 3)
+
+    @override_settings(OUTFIT_CACHE_MAX_ENTRIES=1)
+    def test_prefetch_cron_job_prunes_the_cache(self):
+        for temp in (40, 60, 80):
+            signature, fields = outfit_cache.outfit_signature('Paris', temp, 'Clear', 'Summer')
+            outfit_cache.store_outfit(signature, fields, f'- Outfit for {temp}')
+        self.assertEqual(OutfitResponseCache.objects.count(), 3)
+
+        prefetch_forecasts()
+        self.assertEqual(OutfitResponseCache.objects.count(), 1)
+
+
+def http_response(status):
+    response = requests.Response()
+    response.status_code = status
+    response.url = 'http://upstream.invalid/'
+    return response
+
+
+@mock.patch('trips.api_client.acquire', return_value=0)
+class APIClientFailureTests(SimpleTestCase):
+    def make_client(self, *responses):
+        client = APIClient('Test', max_retries=1, failure_threshold=2)
+        client.backoff = lambda attempt: 0.2
+        mock.patch.object(client.session, 'get', side_effect=responses).start()
+        self.addCleanup(mock.patch.stopall)
+        return client
+
+    @mock.patch('trips.api_client.track_call', fake_track_call)
+    def test_client_errors_leave_the_circuit_closed(self, acquire):
+        client = self.make_client(*(http_response(404) for _ in range(3)))
+        for _ in range(3):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                client.get('http://upstream.invalid/')
+        self.assertEqual(client.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(client.session.get.call_count, 3)
+
+    @mock.patch('trips.api_client.track_call', fake_track_call)
+    def test_server_errors_open_the_circuit(self, acquire):
+        client = self.make_client(*(http_response(503) for _ in range(4)))
+        client.backoff = lambda attempt: 0
+        for _ in range(2):
+            with self.assertRaises(requests.exceptions.HTTPError):
+                client.get('http://upstream.invalid/')
+        self.assertEqual(client.breaker.state, CircuitBreaker.OPEN)
+
+    def test_backoff_is_not_recorded_as_latency(self, acquire):
+        client = self.make_client(http_response(503), http_response(200))
+        with mock.patch('trips.metrics.recorder.record') as record:
+            self.assertEqual(client.get('http://upstream.invalid/').status_code, 200)
+
+        self.assertEqual([recorded.args[3] for recorded in record.call_args_list], [503, 200])
+        for recorded in record.call_args_list:
+            self.assertLess(recorded.args[2], 100)
+
+
+class SaveOutfitsTests(TestCase):
+    def test_saving_a_day_twice_replaces_it(self):
+        trip = make_trip(User.objects.create(username='traveller'))
+        batch = [(trip.start_date, 70, 'Clear')]
+        # A job reclaimed from a stalled worker saves the same day again
+        _save_outfits(trip, batch, {trip.start_date: '- T-shirt\n- Shorts'}, '')
+        _save_outfits(trip, batch, {trip.start_date: '- Sweater'}, '')
+
+        recommendation = OutfitRecommendation.objects.get(trip=trip)
+        self.assertEqual(recommendation.outfit_description, '- Sweater')
+        self.assertEqual(list(recommendation.items.values_list('name', flat=True)), ['Sweater'])
+
+
+class MigrationTestCase(TransactionTestCase):
+    """Migrate trips back to ``migrate_from``, let the test add rows, then migrate forward"""
+    migrate_from = None
+    migrate_to = None
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([('trips', target)])
+        return executor.loader.project_state([('trips', target)]).apps
+
+    def setUp(self):
+        self.old_apps = self.migrate(self.migrate_from)
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes('trips')[0][1])
+
+    def make_old_trip(self):
+        user = self.old_apps.get_model('auth', 'User').objects.create(username='traveller')
+        return self.old_apps.get_model('trips', 'Trip').objects.create(
+            user=user, destination='Paris', latitude=0, longitude=0,
+            start_date=date(2025, 6, 1), end_date=date(2025, 6, 3),
+        )
+
+
+class PackingListItemUniqueMigrationTests(MigrationTestCase):
+    migrate_from = '0014_externalcallstats_queue_wait'
+    migrate_to = '0015_packinglistitem_unique'
+
+    def test_duplicate_items_are_merged_into_the_oldest(self):
+        trip = self.make_old_trip()
+        OldItem = self.old_apps.get_model('trips', 'PackingListItem')
+        first = OldItem.objects.create(trip=trip, name='Hat', category='Accessories', quantity=1, is_auto_generated=True)
+        OldItem.objects.create(trip=trip, name='Hat', category='Accessories', quantity=3, is_packed=True, is_auto_generated=True)
+        OldItem.objects.create(trip=trip, name='Hat', category='Accessories', quantity=2, must_have=True)
+        other = OldItem.objects.create(trip=trip, name='Hat', category='Clothing', quantity=5)
+
+        apps = self.migrate(self.migrate_to)
+
+        items = list(apps.get_model('trips', 'PackingListItem').objects.order_by('id'))
+        self.assertEqual([item.id for item in items], [first.id, other.id])
+        merged = items[0]
+        self.assertEqual(merged.quantity, 3)
+        self.assertTrue(merged.is_packed)
+        self.assertTrue(merged.must_have)
+        self.assertFalse(merged.is_auto_generated)
+        self.assertEqual(items[1].quantity, 5)
+
+
+class OutfitRecommendationUniqueMigrationTests(MigrationTestCase):
+    migrate_from = '0015_packinglistitem_unique'
+    migrate_to = '0016_hot_lookup_indexes'
+
+    def test_one_outfit_is_kept_per_trip_day(self):
+        trip = self.make_old_trip()
+        OldRecommendation = self.old_apps.get_model('trips', 'OutfitRecommendation')
+
+        def recommend(day, description, **fields):
+            return OldRecommendation.objects.create(
+                trip=trip, day=day, weather_condition='Clear', temperature=70,
+                outfit_description=description, **fields,
+            ).id
+
+        first, second = date(2025, 6, 1), date(2025, 6, 2)
+        kept_first = recommend(first, 'oldest')
+        recommend(first, 'newer')
+        recommend(second, 'oldest')
+        kept_second = recommend(second, 'customized', is_customized=True)
+        recommend(second, 'newest')
+
+        apps = self.migrate(self.migrate_to)
+
+        kept = apps.get_model('trips', 'OutfitRecommendation').objects.order_by('day')
+        self.assertEqual(
+            list(kept.values_list('id', 'outfit_description')),
+            [(kept_first, 'oldest'), (kept_second, 'customized')],
+        )
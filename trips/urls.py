@@ -17,7 +17,9 @@ urlpatterns = [
     path('packing-list/<int:trip_id>/toggle/<int:item_id>/', views.toggle_packed_status, name='toggle_packed_status'),
     path('packing-list/<int:trip_id>/update-quantity/<int:item_id>/', views.update_item_quantity, name='update_item_quantity'),
     path('packing-list/<int:trip_id>/stats/', views.packing_list_stats, name='packing_list_stats'),
+    path('packing-list/<int:trip_id>/batch/', views.packing_list_batch, name='packing_list_batch'),
     path('outfits/<int:id>/', views.view_outfit_recommendations, name='view_outfit_recommendations'),
+    path('outfits/<int:id>/stream/', views.stream_outfit_recommendations, name='stream_outfit_recommendations'),
     path('outfits/<int:trip_id>/customize/<int:recommendation_id>/', views.customize_outfit, name='customize_outfit'),
     path('outfits/<int:trip_id>/regenerate/<int:recommendation_id>/', views.regenerate_outfit, name='regenerate_outfit'),
     path('outfits/<int:trip_id>/add-item/<int:recommendation_id>/', views.add_outfit_item, name='add_outfit_item'),
@@ -27,4 +29,7 @@ urlpatterns = [
     path('all-outfits/', views.all_outfits, name='all_outfits'),
     path('generate-all-outfits/', views.generate_all_outfits, name='generate_all_outfits'),
     path('outfit-detail/<int:recommendation_id>/', views.view_outfit_detail, name='view_outfit_detail'),
+    path('forecast-cache/stats/', views.forecast_cache_stats, name='forecast_cache_stats'),
+    path('metrics/external-calls/', views.external_call_metrics, name='external_call_metrics'),
+    path('jobs/<int:job_id>/status/', views.generation_job_status, name='generation_job_status'),
 ] 
\ No newline at end of file
@@ -1,33 +1,38 @@
-from datetime import datetime
 import json
+import time
+from datetime import date
+from urllib.parse import urlencode
+
 import requests
-from django.http import JsonResponse
+from django.conf import settings
+from django.db.models import Count, Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.template.loader import render_to_string
+from django.urls import reverse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
-from django.core.mail import send_mail
-import os
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib import messages
 from django.views.decorators.http import require_POST
-from django.contrib.auth.models import User
-import openai
 from django.utils import timezone
 from .models import OutfitRecommendation, OutfitItem
 
-from trips.models import Trip, PackingListItem
-
-def send_api_fail_email(api_name):
-    admin_users = User.objects.filter(is_staff=True)
-
-    # Get emails of all users who are staff or superusers
-    admin_emails = [user.email for user in list(admin_users)]
-
-    send_mail(
-        subject=f"{api_name} API Failure",
-        message=f"A request to {api_name} has failed",
-        from_email=None,
-        recipient_list=admin_emails,
-        fail_silently=False,
-    )
+from trips.models import Trip, PackingListItem, GenerationJob
+from trips.api_client import CircuitOpenError
+from trips.cultural_notes import get_cultural_notes
+from trips.geocoding import geocode
+from trips.jobs import enqueue_generation_job
+from trips.metrics import metrics_report
+from trips.outfits import (
+    add_outfit_items_to_packing_list,
+    extract_items_from_outfit_description,
+    get_season,
+    recommend_outfit,
+    sync_trip_outfits_to_packing_list,
+)
+from trips.packing import add_manual_item, build_packing_list
+from trips.packing_writes import apply_packing_batch, submit_packing_write
+from trips.weather import get_daily_forecasts, get_weather_icon, forecast_cache
 
 @login_required
 def trip_planner(request):
@@ -37,21 +42,14 @@ def trip_planner(request):
         end_date = request.POST.get('end_date')
         
         try:
-            # Get coordinates using OpenWeatherMap Geocoding API
-            api_key = os.environ['OPENWEATHER_API_KEY']
-            geocoding_url = f"http://api.openweathermap.org/geo/1.0/direct?q={destination}&limit=1&appid={api_key}"
-            
-            response = requests.get(geocoding_url)
-            response.raise_for_status()
-            location_data = response.json()
+            # Get coordinates from the local geocoding table, falling back to OpenWeather
+            coordinates = geocode(destination)
             
-            if not location_data:
+            if coordinates is None:
                 messages.error(request, f'Could not find coordinates for {destination}')
                 return render(request, 'trips/trip_planner.html')
             
-            # Extract coordinates from the first result
-            latitude = location_data[0]['lat']
-            longitude = location_data[0]['lon']
+            latitude, longitude = coordinates
             
             trip = Trip.objects.create(
                 user=request.user,
@@ -77,69 +75,30 @@ def my_trips(request):
 
 @login_required
 def view_weather(request, id):
-    api_key = os.environ['OPENWEATHER_API_KEY']
-
     trip = get_object_or_404(Trip, id=id, user=request.user)
     
     # Ensure trip dates are properly formatted strings in the context
     formatted_start_date = trip.start_date.strftime('%A, %B %d, %Y').lstrip('0')
     formatted_end_date = trip.end_date.strftime('%A, %B %d, %Y').lstrip('0')
 
-    # Using the 2.5 version of the API which is more stable
-    url = f"https://api.openweathermap.org/data/2.5/forecast?lat={trip.latitude}&lon={trip.longitude}&units=imperial&appid={api_key}"
-    
     try:
-        response = requests.get(url)
-        response.raise_for_status()  # Raise an exception for bad status codes
-        weather_data = response.json()
-        
-        if 'list' not in weather_data:
-            raise ValueError("Unexpected API response format")
-
-        processed_days = []
-        current_date = None
-        daily_data = {}
-
-        # Process the 3-hour forecast data into daily data
-        for forecast in weather_data['list']:
-            forecast_time = datetime.fromtimestamp(forecast['dt'])
-            forecast_date = forecast_time.date()
-            
-            if forecast_date < trip.start_date:
-                continue
-                
-            if forecast_date > trip.end_date:
-                break
-
-            if current_date != forecast_date:
-                if current_date is not None:
-                    processed_days.append(daily_data)
-                current_date = forecast_date
-                daily_data = {
-                    'day': forecast_time.strftime('%a'),
-                    'date': forecast_time.strftime('%b %d').lstrip('0'),
-                    'temp': f"{round(forecast['main']['feels_like'])} °F",
-                    'wind_speed': f"{round(forecast['wind']['speed'])} mph",
-                    'humidity': f"{round(forecast['main']['humidity'])}%",
-                    'rain_chance': f"{round(forecast.get('pop', 0) * 100)}%",
-                    'cloud_cover': f"{round(forecast['clouds']['all'])}%",
-                    'description': forecast['weather'][0]['main'],
-                    'icon': get_weather_icon(forecast['weather'][0]['id'])
-                }
-            else:
-                # Update with the latest data for the day
-                daily_data.update({
-                    'temp': f"{round(forecast['main']['feels_like'])} °F",
-                    'wind_speed': f"{round(forecast['wind']['speed'])} mph",
-                    'humidity': f"{round(forecast['main']['humidity'])}%",
-                    'rain_chance': f"{round(forecast.get('pop', 0) * 100)}%",
-                    'cloud_cover': f"{round(forecast['clouds']['all'])}%",
-                    'description': forecast['weather'][0]['main'],
-                    'icon': get_weather_icon(forecast['weather'][0]['id'])
-                })
-
-        if daily_data:
-            processed_days.append(daily_data)
+        # Daily summaries are precomputed once per fetch (raises on API errors)
+        forecasts = get_daily_forecasts(trip.latitude, trip.longitude, trip.start_date, trip.end_date)
+
+        processed_days = [
+            {
+                'day': forecast.date.strftime('%a'),
+                'date': forecast.date.strftime('%b %d').lstrip('0'),
+                'temp': f"{round(forecast.feels_like_mean)} °F",
+                'wind_speed': f"{round(forecast.wind_speed_mean)} mph",
+                'humidity': f"{round(forecast.humidity_mean)}%",
+                'rain_chance': f"{round(forecast.pop_max * 100)}%",
+                'cloud_cover': f"{round(forecast.cloud_cover_mean)}%",
+                'description': forecast.condition,
+                'icon': get_weather_icon(forecast.condition_id)
+            }
+            for forecast in forecasts
+        ]
 
         context = {
             'weather': {
@@ -156,12 +115,16 @@ def view_weather(request, id):
         }
 
     except requests.exceptions.RequestException as e:
-        send_api_fail_email("OpenWeather")
+        # Admins are emailed by the circuit breaker when OpenWeather goes down
+        if isinstance(e, CircuitOpenError):
+            error = 'Weather service is temporarily unavailable. Please try again in a few minutes.'
+        else:
+            error = 'Failed to fetch weather data. Please try again later.'
 
         context = {
             'weather': {
                 'days': [],
-                'error': 'Failed to fetch weather data. Please try again later.'
+                'error': error
             },
             'trip': {
                 'destination': trip.destination,
@@ -188,27 +151,6 @@ def view_weather(request, id):
 
     return render(request, 'trips/view_weather.html', context)
 
-def get_weather_icon(weather_id):
-    weather_descriptions = {
-        2: 'fa-solid fa-bolt fa-fw',  # Thunderstorm
-        3: 'fa-solid fa-cloud-rain fa-fw',  # Drizzle
-        5: 'fa-solid fa-cloud-showers-heavy fa-fw',  # Rain
-        6: 'fa-solid fa-snowflake fa-fw',  # Snow
-        7: 'fa-solid fa-smog fa-fw',  # Atmosphere
-        8: 'fa-solid fa-cloud fa-fw',  # Clouds
-    }
-    
-    condition_group = int(weather_id / 100)
-    if condition_group == 8:
-        if weather_id % 100 == 0:
-            return 'fa-solid fa-sun fa-fw'
-        elif weather_id % 100 in [1, 2]:
-            return 'fa-solid fa-cloud-sun fa-fw'
-        else:
-            return 'fa-solid fa-cloud fa-fw'
-    
-    return weather_descriptions.get(condition_group, 'fa-solid fa-sun fa-fw')
-
 @login_required
 def edit_trip(request, id):
     trip = get_object_or_404(Trip, id=id, user=request.user)
@@ -221,21 +163,14 @@ def edit_trip(request, id):
         try:
             # Only update coordinates if destination has changed
             if destination != trip.destination:
-                # Get coordinates using OpenWeatherMap Geocoding API
-                api_key = os.environ['OPENWEATHER_API_KEY']
-                geocoding_url = f"http://api.openweathermap.org/geo/1.0/direct?q={destination}&limit=1&appid={api_key}"
+                # Get coordinates from the local geocoding table, falling back to OpenWeather
+                coordinates = geocode(destination)
                 
-                response = requests.get(geocoding_url)
-                response.raise_for_status()
-                location_data = response.json()
-                
-                if not location_data:
+                if coordinates is None:
                     messages.error(request, f'Could not find coordinates for {destination}')
                     return render(request, 'trips/edit_trip.html', {'trip': trip})
                 
-                # Extract coordinates from the first result
-                trip.latitude = location_data[0]['lat']
-                trip.longitude = location_data[0]['lon']
+                trip.latitude, trip.longitude = coordinates
             
             trip.destination = destination
             trip.start_date = start_date
@@ -275,19 +210,26 @@ def view_packing_list(request, id):
             categories[item.category] = []
         categories[item.category].append(item)
     
+    # A smart packing list still being generated in the background, if any
+    generation_job = GenerationJob.objects.filter(
+        trip=trip, kind=GenerationJob.SMART_PACKING, status__in=GenerationJob.ACTIVE_STATUSES
+    ).first()
+    
     context = {
         'trip': trip,
         'categories': categories,
+        'generation_job': generation_job,
     }
     return render(request, 'trips/view_packing_list.html', context)
 
 @login_required
 @require_POST
 def toggle_packed_status(request, trip_id, item_id):
-    item = get_object_or_404(PackingListItem, id=item_id, trip_id=trip_id, trip__user=request.user)
-    item.is_packed = not item.is_packed
-    item.save()
-    return JsonResponse({'status': 'success', 'is_packed': item.is_packed})
+    # Coalesced with other toggles arriving at the same time (trips.packing_writes)
+    item = submit_packing_write(trip_id, item_id, request.user.id, toggle=True)
+    if item is None:
+        raise Http404('No such packing list item.')
+    return JsonResponse({'status': 'success', 'is_packed': item['is_packed']})
 
 @login_required
 @require_POST
@@ -302,15 +244,11 @@ def add_packing_item(request, trip_id):
         messages.error(request, 'Name and category are required.')
         return redirect('trips:view_packing_list', id=trip_id)
     
-    PackingListItem.objects.create(
-        trip=trip,
-        name=name,
-        category=category,
-        quantity=quantity,
-        must_have=must_have,
-        is_auto_generated=False
-    )
-    messages.success(request, f'Added {name} to your packing list.')
+    item, created = add_manual_item(trip, name, category, int(quantity), must_have)
+    if created:
+        messages.success(request, f'Added {name} to your packing list.')
+    else:
+        messages.success(request, f'{name} is already on your packing list; updated its quantity.')
     return redirect('trips:view_packing_list', id=trip_id)
 
 @login_required
@@ -323,121 +261,43 @@ def delete_packing_item(request, trip_id, item_id):
 
 @login_required
 @require_POST
-def generate_packing_list(request, trip_id):
+def packing_list_batch(request, trip_id):
+    """
+    Apply the packing list page's queued toggles, quantity changes, adds and
+    deletes in one transaction (see trips.packing_writes.apply_packing_batch)
+    """
     trip = get_object_or_404(Trip, id=trip_id, user=request.user)
+    try:
+        payload = json.loads(request.body)
+        if not isinstance(payload, dict):
+            raise ValueError("Expected a JSON object with 'operations'")
+        results = apply_packing_batch(trip, payload.get('operations'))
+    except ValueError as e:
+        return JsonResponse({
+            'status': 'error',
+            'message': str(e)
+        }, status=400)
     
-    # Calculate trip duration
-    duration = (trip.end_date - trip.start_date).days + 1
+    for result in results:
+        if result['op'] == 'add':
+            # New rows are rendered here so the page can insert them as they are
+            item = result.pop('item')
+            result.update({
+                'item_id': item.id,
+                'category': item.category,
+                'quantity': item.quantity,
+                'html': render_to_string('trips/packing_item_row.html', {'trip': trip, 'item': item}, request=request),
+            })
     
-    # Get weather data for the trip
-    api_key = os.environ['OPENWEATHER_API_KEY']
-    weather_url = f"https://api.openweathermap.org/data/2.5/forecast?lat={trip.latitude}&lon={trip.longitude}&units=imperial&appid={api_key}"
+    return JsonResponse({'status': 'success', 'results': results})
+
+@login_required
+@require_POST
+def generate_packing_list(request, trip_id):
+    trip = get_object_or_404(Trip, id=trip_id, user=request.user)
     
     try:
-        weather_response = requests.get(weather_url)
-        weather_response.raise_for_status()
-        weather_data = weather_response.json()
-        
-        # Basic items everyone needs (with must-have items marked)
-        basic_items = [
-            ('Toiletries', [
-                {'name': 'Toothbrush', 'must_have': True},
-                {'name': 'Toothpaste', 'must_have': True},
-                {'name': 'Deodorant', 'must_have': True},
-                {'name': 'Shampoo', 'must_have': False},
-                {'name': 'Soap', 'must_have': True}
-            ]),
-            ('Documents', [
-                {'name': 'Passport', 'must_have': True},
-                {'name': 'ID', 'must_have': True},
-                {'name': 'Travel Insurance', 'must_have': True},
-                {'name': 'Boarding Pass', 'must_have': True}
-            ]),
-            ('Electronics', [
-                {'name': 'Phone Charger', 'must_have': True},
-                {'name': 'Power Bank', 'must_have': False},
-                {'name': 'Adapter', 'must_have': True}
-            ]),
-            ('Miscellaneous', [
-                {'name': 'Wallet', 'must_have': True},
-                {'name': 'Keys', 'must_have': True},
-                {'name': 'Medications', 'must_have': True}
-            ]),
-        ]
-        
-        # Add basic items
-        for category, items in basic_items:
-            for item in items:
-                item_name = item['name'] if isinstance(item, dict) else item
-                must_have = item.get('must_have', False) if isinstance(item, dict) else False
-                
-                PackingListItem.objects.get_or_create(
-                    trip=trip,
-                    name=item_name,
-                    category=category,
-                    is_auto_generated=True,
-                    defaults={'must_have': must_have}
-                )
-        
-        # Add weather-specific items
-        weather_items = []
-        if any(forecast['main']['temp'] < 60 for forecast in weather_data['list']):
-            weather_items.extend([
-                ('Clothing', {'name': 'Warm Jacket', 'must_have': True}),
-                ('Clothing', {'name': 'Sweater', 'must_have': False}),
-                ('Accessories', {'name': 'Scarf', 'must_have': False}),
-                ('Accessories', {'name': 'Gloves', 'must_have': False}),
-            ])
-        
-        if any(forecast['main']['temp'] > 75 for forecast in weather_data['list']):
-            weather_items.extend([
-                ('Clothing', {'name': 'Sunglasses', 'must_have': True}),
-                ('Toiletries', {'name': 'Sunscreen', 'must_have': True}),
-                ('Clothing', {'name': 'Hat', 'must_have': False}),
-                ('Clothing', {'name': 'Shorts', 'must_have': False}),
-            ])
-        
-        if any(forecast.get('rain', {}).get('3h', 0) > 0 for forecast in weather_data['list']):
-            weather_items.extend([
-                ('Accessories', {'name': 'Umbrella', 'must_have': True}),
-                ('Clothing', {'name': 'Rain Jacket', 'must_have': True}),
-                ('Accessories', {'name': 'Waterproof Bag', 'must_have': False}),
-            ])
-        
-        # Add weather-specific items
-        for category, item in weather_items:
-            item_name = item['name'] if isinstance(item, dict) else item
-            must_have = item.get('must_have', False) if isinstance(item, dict) else False
-            
-            PackingListItem.objects.get_or_create(
-                trip=trip,
-                name=item_name,
-                category=category,
-                is_auto_generated=True,
-                defaults={'must_have': must_have}
-            )
-        
-        # Add clothing based on duration
-        clothing_items = [
-            ('Clothing', {'name': 'T-shirt', 'must_have': True}, duration),
-            ('Clothing', {'name': 'Underwear', 'must_have': True}, duration),
-            ('Clothing', {'name': 'Socks', 'must_have': True}, duration),
-            ('Clothing', {'name': 'Pants', 'must_have': True}, (duration // 2) + 1),
-        ]
-        
-        for category, item, count in clothing_items:
-            item_name = item['name'] if isinstance(item, dict) else item
-            must_have = item.get('must_have', False) if isinstance(item, dict) else False
-            
-            PackingListItem.objects.get_or_create(
-                trip=trip,
-                name=item_name,
-                category=category,
-                quantity=count,
-                is_auto_generated=True,
-                defaults={'must_have': must_have}
-            )
-        
+        build_packing_list(trip)
         messages.success(request, 'Packing list generated successfully!')
         
     except requests.exceptions.RequestException as e:
@@ -445,40 +305,6 @@ def generate_packing_list(request, trip_id):
     
     return redirect('trips:view_packing_list', id=trip_id)
 
-def extract_items_from_outfit_description(outfit_description):
-    """Helper function to extract and categorize outfit items from description text"""
-    items = []
-    lines = outfit_description.split('\n')
-    
-    for line in lines:
-        line = line.strip()
-        # Look for bullet points or similar indicators
-        if line and (line.startswith('-') or line.startswith('•') or line.startswith('*')):
-            item_text = line.lstrip('-•* ').strip()
-            # Skip empty items or items that look like section headings
-            if not item_text or item_text.endswith(':') or "cultural" in item_text.lower():
-                continue
-                
-            # Simple category determination
-            category = 'other'
-            if any(word in item_text.lower() for word in ['shirt', 'top', 'tee', 't-shirt', 'blouse', 'sweater', 'polo']):
-                category = 'top'
-            elif any(word in item_text.lower() for word in ['pants', 'jeans', 'shorts', 'skirt', 'trouser']):
-                category = 'bottom'
-            elif any(word in item_text.lower() for word in ['jacket', 'coat', 'hoodie', 'cardigan', 'blazer']):
-                category = 'outerwear'
-            elif any(word in item_text.lower() for word in ['shoes', 'boots', 'sandals', 'sneakers', 'footwear']):
-                category = 'footwear'
-            elif any(word in item_text.lower() for word in ['hat', 'cap', 'sunglasses', 'scarf', 'gloves', 'umbrella']):
-                category = 'accessory'
-                
-            items.append({
-                'name': item_text,
-                'category': category
-            })
-    
-    return items
-
 @login_required
 def view_outfit_recommendations(request, id):
     trip = get_object_or_404(Trip, id=id, user=request.user)
@@ -487,134 +313,13 @@ def view_outfit_recommendations(request, id):
     recommendations = OutfitRecommendation.objects.filter(trip=trip).order_by('day')
     
     if not recommendations.exists():
-        # Generate new recommendations using weather data and OpenAI
-        api_key = os.environ['OPENWEATHER_API_KEY']
-        weather_url = f"https://api.openweathermap.org/data/2.5/forecast?lat={trip.latitude}&lon={trip.longitude}&units=imperial&appid={api_key}"
-        
-        try:
-            weather_response = requests.get(weather_url)
-            weather_response.raise_for_status()
-            weather_data = weather_response.json()
-            
-            for forecast in weather_data['list']:
-                forecast_time = datetime.fromtimestamp(forecast['dt'])
-                forecast_date = forecast_time.date()
-                
-                if forecast_date < trip.start_date:
-                    continue
-                    
-                if forecast_date > trip.end_date:
-                    break
-                
-                # Only create one recommendation per day
-                if not OutfitRecommendation.objects.filter(trip=trip, day=forecast_date).exists():
-                    temp = forecast['main']['feels_like']
-                    weather_desc = forecast['weather'][0]['main']
-                    
-                    # Determine season based on the month and hemisphere
-                    month = forecast_date.month
-                    # Rough approximation of seasons
-                    northern_seasons = {
-                        (12, 1, 2): 'Winter',
-                        (3, 4, 5): 'Spring',
-                        (6, 7, 8): 'Summer',
-                        (9, 10, 11): 'Fall'
-                    }
-                    southern_seasons = {
-                        (12, 1, 2): 'Summer',
-                        (3, 4, 5): 'Fall',
-                        (6, 7, 8): 'Winter',
-                        (9, 10, 11): 'Spring'
-                    }
-                    
-                    # Determine hemisphere based on latitude
-                    is_northern = float(trip.latitude) >= 0
-                    seasons = northern_seasons if is_northern else southern_seasons
-                    
-                    season = next((s for months, s in seasons.items() if month in months), 'Unknown')
-                    
-                    # Generate outfit recommendation and cultural notes using OpenAI
-                    openai.api_key = os.environ.get('OPENAI_API_KEY')
-                    
-                    # First, get the outfit recommendations only
-                    outfit_prompt = f"""For a day in {trip.destination} with temperature {temp}°F and {weather_desc} weather in {season} season, suggest a practical outfit.
-                    Format your response as a simple list of clothing items ONLY, each on a separate line with a dash prefix.
-                    Example:
-                    - Item 1
-                    - Item 2
-                    - Item 3"""
-                    
-                    try:
-                        # Get outfit recommendations
-                        outfit_response = openai.completions.create(
-                            model="gpt-3.5-turbo-instruct",
-                            prompt=outfit_prompt,
-                            max_tokens=150,
-                            temperature=0.5
-                        )
-                        outfit_description = outfit_response.choices[0].text.strip()
-                        
-                        # If the outfit doesn't start with a dash, format it
-                        if not outfit_description.strip().startswith('-'):
-                            items = outfit_description.split('\n')
-                            formatted_items = []
-                            for item in items:
-                                item = item.strip()
-                                if item and not item.startswith('-'):
-                                    formatted_items.append(f"- {item}")
-                                elif item:
-                                    formatted_items.append(item)
-                            outfit_description = '\n'.join(formatted_items)
-                        
-                        # Now get cultural notes in a separate call
-                        cultural_prompt = f"""Provide very brief cultural dress tips for visitors to {trip.destination} in 2-3 bullet points max.
-                        Format as bullet points with dash prefix."""
-                        
-                        cultural_response = openai.completions.create(
-                            model="gpt-3.5-turbo-instruct",
-                            prompt=cultural_prompt,
-                            max_tokens=100,
-                            temperature=0.5
-                        )
-                        cultural_notes = cultural_response.choices[0].text.strip()
-                    except Exception as e:
-                        send_api_fail_email("OpenAI")
-                        outfit_description = f"Default recommendation for {weather_desc} weather at {temp}°F"
-                        cultural_notes = "Cultural information not available."
-                    
-                    recommendation = OutfitRecommendation.objects.create(
-                        trip=trip,
-                        day=forecast_date,
-                        weather_condition=weather_desc,
-                        temperature=temp,
-                        outfit_description=outfit_description,
-                        cultural_notes=cultural_notes
-                    )
-                    
-                    # Extract and create individual outfit items
-                    try:
-                        # Use the helper function to extract items
-                        outfit_items = extract_items_from_outfit_description(outfit_description)
-                        
-                        # Create the items in the database
-                        for item in outfit_items:
-                            OutfitItem.objects.create(
-                                outfit=recommendation,
-                                name=item['name'],
-                                category=item['category']
-                            )
-                    except Exception as e:
-                        # If parsing fails, don't worry - we still have the full outfit description
-                        pass
-            
-            recommendations = OutfitRecommendation.objects.filter(trip=trip).order_by('day')
-            messages.success(request, 'Outfit recommendations generated successfully!')
-            
-        except requests.exceptions.RequestException:
-            send_api_fail_email("OpenWeather")
-            messages.error(request, 'Failed to fetch weather data. Please try again later.')
-        except Exception as e:
-            messages.error(request, f'Error generating outfit recommendations: {str(e)}')
+        # Generation runs in a background worker; the page streams each day in as it's saved
+        generation_job = enqueue_generation_job(trip, GenerationJob.OUTFITS)
+    else:
+        # A retry may still be filling in days that timed out
+        generation_job = GenerationJob.objects.filter(
+            trip=trip, kind=GenerationJob.OUTFITS, status__in=GenerationJob.ACTIVE_STATUSES
+        ).first()
     
     # Get category choices from the model for the template
     category_choices = OutfitItem.CATEGORY_CHOICES
@@ -623,9 +328,64 @@ def view_outfit_recommendations(request, id):
         'trip': trip,
         'recommendations': recommendations,
         'category_choices': category_choices,
+        'generation_job': generation_job,
+        # The stream only needs to send days newer than the ones already on the page
+        'last_recommendation_id': max((r.id for r in recommendations), default=0),
     }
     return render(request, 'trips/view_outfit_recommendations.html', context)
 
+def _sse_event(event, data, event_id=None):
+    message = f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return f"id: {event_id}\n{message}" if event_id is not None else message
+
+
+def _outfit_recommendation_events(request, trip, last_id):
+    """Server-Sent Events with the trip's outfit cards saved after ``last_id``, then ``done``"""
+    deadline = time.monotonic() + settings.OUTFIT_STREAM_TIMEOUT
+    yield f"retry: {settings.OUTFIT_STREAM_RETRY_MS}\n\n"
+    while True:
+        # Check the job before reading rows so days saved just before it finished aren't missed
+        job = GenerationJob.objects.filter(trip=trip, kind=GenerationJob.OUTFITS).order_by('-id').first()
+        active = job is not None and job.is_active
+
+        for recommendation in OutfitRecommendation.objects.filter(trip=trip, id__gt=last_id).order_by('id'):
+            last_id = recommendation.id
+            yield _sse_event('recommendation', {
+                'id': recommendation.id,
+                'day': recommendation.day.isoformat(),
+                'html': render_to_string('trips/outfit_card.html', {'recommendation': recommendation}, request=request),
+            }, event_id=recommendation.id)
+
+        if not active:
+            yield _sse_event('done', {
+                'status': job.status if job else GenerationJob.SUCCEEDED,
+                'error': job.error if job and job.status == GenerationJob.FAILED else '',
+            })
+            return
+        if time.monotonic() > deadline:
+            return
+
+        # Comment line; keeps proxies from timing out the idle connection
+        yield ": waiting\n\n"
+        time.sleep(settings.OUTFIT_STREAM_POLL_INTERVAL)
+
+
+@login_required
+def stream_outfit_recommendations(request, id):
+    """Stream a trip's outfit recommendation cards as the background job saves them"""
+    trip = get_object_or_404(Trip, id=id, user=request.user)
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.GET.get('after') or 0)
+    except ValueError:
+        last_id = 0
+
+    response = StreamingHttpResponse(
+        _outfit_recommendation_events(request, trip, last_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
 @login_required
 @require_POST
 def customize_outfit(request, trip_id, recommendation_id):
@@ -650,37 +410,6 @@ def customize_outfit(request, trip_id, recommendation_id):
     else:
         return redirect('trips:view_outfit_recommendations', id=trip_id)
 
-def sync_outfit_items_to_packing_list(trip, outfit_recommendation):
-    """
-    Sync outfit items to the packing list, ensuring each item appears only once
-    with the appropriate quantity.
-    """
-    # Get all outfit items for this recommendation
-    outfit_items = outfit_recommendation.items.all()
-    
-    for outfit_item in outfit_items:
-        # Try to find an existing packing list item with the same name
-        existing_item = PackingListItem.objects.filter(
-            trip=trip,
-            name=outfit_item.name,
-            category='Clothing'  # All outfit items go to Clothing category
-        ).first()
-        
-        if existing_item:
-            # If item exists, ensure quantity is at least 1
-            if existing_item.quantity < 1:
-                existing_item.quantity = 1
-                existing_item.save()
-        else:
-            # Create new packing list item
-            PackingListItem.objects.create(
-                trip=trip,
-                name=outfit_item.name,
-                category='Clothing',
-                quantity=1,
-                is_auto_generated=True
-            )
-
 @login_required
 @require_POST
 def regenerate_outfit(request, trip_id, recommendation_id):
@@ -688,78 +417,19 @@ def regenerate_outfit(request, trip_id, recommendation_id):
     trip = recommendation.trip
     
     try:
-        # Determine season based on the month and hemisphere
-        month = recommendation.day.month
-        # Rough approximation of seasons
-        northern_seasons = {
-            (12, 1, 2): 'Winter',
-            (3, 4, 5): 'Spring',
-            (6, 7, 8): 'Summer',
-            (9, 10, 11): 'Fall'
-        }
-        southern_seasons = {
-            (12, 1, 2): 'Summer',
-            (3, 4, 5): 'Fall',
-            (6, 7, 8): 'Winter',
-            (9, 10, 11): 'Spring'
-        }
-        
-        # Determine hemisphere based on latitude
-        is_northern = float(trip.latitude) >= 0
-        seasons = northern_seasons if is_northern else southern_seasons
-        
-        season = next((s for months, s in seasons.items() if month in months), 'Unknown')
-        
-        # Generate outfit recommendation and cultural notes using OpenAI
-        openai.api_key = os.environ.get('OPENAI_API_KEY')
-        
-        # Include activities in the prompt if they exist
-        activities_text = ""
-        if recommendation.activities:
-            activities_text = f"Planned Activities: {recommendation.activities}"
-        
-        # First, get the outfit recommendations only
-        outfit_prompt = f"""For a day in {trip.destination} with temperature {recommendation.temperature}°F and {recommendation.weather_condition} weather in {season} season, suggest a practical outfit.
-        Format your response as a simple list of clothing items ONLY, each on a separate line with a dash prefix.
-        Example:
-        - Item 1
-        - Item 2
-        - Item 3
-        {activities_text}"""
+        season = get_season(recommendation.day, trip.latitude)
         
         try:
-            # Get outfit recommendations
-            outfit_response = openai.completions.create(
-                model="gpt-3.5-turbo-instruct",
-                prompt=outfit_prompt,
-                max_tokens=150,
-                temperature=0.5
+            # Get outfit recommendations (including activities), skipping a cached
+            # answer identical to the outfit being replaced
+            outfit_description = recommend_outfit(
+                trip.destination, recommendation.temperature, recommendation.weather_condition,
+                season, activities=recommendation.activities,
+                exclude=recommendation.outfit_description,
             )
-            outfit_description = outfit_response.choices[0].text.strip()
-            
-            # If the outfit doesn't start with a dash, format it
-            if not outfit_description.strip().startswith('-'):
-                items = outfit_description.split('\n')
-                formatted_items = []
-                for item in items:
-                    item = item.strip()
-                    if item and not item.startswith('-'):
-                        formatted_items.append(f"- {item}")
-                    elif item:
-                        formatted_items.append(item)
-                outfit_description = '\n'.join(formatted_items)
             
-            # Now get cultural notes in a separate call
-            cultural_prompt = f"""Provide very brief cultural dress tips for visitors to {trip.destination} in 2-3 bullet points max.
-            Format as bullet points with dash prefix."""
-            
-            cultural_response = openai.completions.create(
-                model="gpt-3.5-turbo-instruct",
-                prompt=cultural_prompt,
-                max_tokens=100,
-                temperature=0.5
-            )
-            cultural_notes = cultural_response.choices[0].text.strip()
+            # Cultural notes come from the per-destination store
+            cultural_notes = get_cultural_notes(trip.destination)
             
             # Update the recommendation
             recommendation.outfit_description = outfit_description
@@ -776,15 +446,13 @@ def regenerate_outfit(request, trip_id, recommendation_id):
                 outfit_items = extract_items_from_outfit_description(outfit_description)
                 
                 # Create the items in the database
-                for item in outfit_items:
-                    OutfitItem.objects.create(
-                        outfit=recommendation,
-                        name=item['name'],
-                        category=item['category']
-                    )
+                OutfitItem.objects.bulk_create([
+                    OutfitItem(outfit=recommendation, name=item['name'], category=item['category'])
+                    for item in outfit_items
+                ])
                 
                 # Sync with packing list
-                sync_outfit_items_to_packing_list(trip, recommendation)
+                sync_trip_outfits_to_packing_list(trip)
                     
             except Exception as e:
                 # If parsing fails, don't worry - we still have the full outfit description
@@ -793,7 +461,6 @@ def regenerate_outfit(request, trip_id, recommendation_id):
             messages.success(request, 'Outfit recommendation regenerated successfully!')
             
         except Exception as e:
-            send_api_fail_email("OpenAI")
             messages.error(request, f'Error generating outfit recommendation: {str(e)}')
     
     except Exception as e:
@@ -826,21 +493,17 @@ def view_outfit_detail(request, recommendation_id):
 def packing_list_stats(request, trip_id):
     """API endpoint to get packing list statistics for AJAX updates"""
     trip = get_object_or_404(Trip, id=trip_id, user=request.user)
-    items = PackingListItem.objects.filter(trip=trip)
     
-    # Calculate overall stats
-    total_items = items.count()
-    packed_items = items.filter(is_packed=True).count()
-    
-    # Calculate per-category stats
-    categories = {}
-    for item in items:
-        if item.category not in categories:
-            categories[item.category] = {"total": 0, "packed": 0}
-        
-        categories[item.category]["total"] += 1
-        if item.is_packed:
-            categories[item.category]["packed"] += 1
+    # Per-category totals in one grouped query; the overall numbers are their sums
+    rows = (
+        PackingListItem.objects.filter(trip=trip)
+        .values('category')
+        .annotate(total=Count('id'), packed=Count('id', filter=Q(is_packed=True)))
+        .order_by()
+    )
+    categories = {row['category']: {"total": row['total'], "packed": row['packed']} for row in rows}
+    total_items = sum(stats['total'] for stats in categories.values())
+    packed_items = sum(stats['packed'] for stats in categories.values())
     
     return JsonResponse({
         'total_items': total_items,
@@ -853,88 +516,9 @@ def packing_list_stats(request, trip_id):
 def generate_smart_packing_list(request, trip_id):
     trip = get_object_or_404(Trip, id=trip_id, user=request.user)
     
-    try:
-        # Get weather data
-        api_key = os.environ['OPENWEATHER_API_KEY']
-        weather_url = f"https://api.openweathermap.org/data/2.5/forecast?lat={trip.latitude}&lon={trip.longitude}&units=imperial&appid={api_key}"
-        weather_response = requests.get(weather_url)
-        weather_data = weather_response.json()
-        
-        # Prepare weather summary
-        weather_summary = []
-        for forecast in weather_data['list']:
-            forecast_time = datetime.fromtimestamp(forecast['dt'])
-            if trip.start_date <= forecast_time.date() <= trip.end_date:
-                weather_summary.append({
-                    'date': forecast_time.strftime('%Y-%m-%d'),
-                    'temp': forecast['main']['feels_like'],
-                    'weather': forecast['weather'][0]['main']
-                })
-        
-        # Generate packing list using OpenAI
-        openai.api_key = os.environ.get('OPENAI_API_KEY')
-        
-        # More concise prompt to save tokens
-        prompt = f"""Trip: {trip.destination}, Days: {(trip.end_date - trip.start_date).days + 1}, Weather: {weather_summary[0]['weather'] if weather_summary else 'Unknown'}, Temp: {weather_summary[0]['temp'] if weather_summary else 'Unknown'}°F.
-        Create minimal packing list with categories: Clothing, Toiletries, Electronics, Miscellaneous.
-        Format: JSON object with category names as keys, item arrays as values."""
-        
-        response = openai.completions.create(
-            model="gpt-3.5-turbo-instruct",  # Cheaper model
-            prompt=prompt,
-            max_tokens=300,  # Limit response size
-            temperature=0.5  # Lower creativity for more predictable responses
-        )
-        
-        # Parse the response and create packing list items
-        try:
-            items_by_category = json.loads(response.choices[0].text)
-            
-            # Delete existing auto-generated items, except those from outfit recommendations
-            PackingListItem.objects.filter(
-                trip=trip,
-                is_auto_generated=True,
-                category__in=['Toiletries', 'Electronics', 'Miscellaneous']
-            ).delete()
-            
-            # Create new items
-            for category, items in items_by_category.items():
-                # Skip clothing category as it will be handled by outfit recommendations
-                if category.lower() == 'clothing':
-                    continue
-                    
-                for item in items:
-                    name = item
-                    quantity = 1
-                    
-                    # If item is a dict with name and quantity
-                    if isinstance(item, dict):
-                        name = item.get('name', '')
-                        quantity = item.get('quantity', 1)
-                    
-                    PackingListItem.objects.create(
-                        trip=trip,
-                        name=name,
-                        category=category,
-                        quantity=quantity,
-                        is_auto_generated=True
-                    )
-            
-            # Sync all outfit recommendations to the packing list
-            outfit_recommendations = OutfitRecommendation.objects.filter(trip=trip)
-            for recommendation in outfit_recommendations:
-                sync_outfit_items_to_packing_list(trip, recommendation)
-            
-            messages.success(request, 'Smart packing list generated successfully!')
-            
-        except json.JSONDecodeError:
-            messages.error(request, 'Error parsing AI response. Using fallback packing list.')
-            # Call the original generate_packing_list function as fallback
-            return generate_packing_list(request, trip_id)
-            
-    except Exception as e:
-        send_api_fail_email("OpenAI")
-        messages.error(request, f'Error generating smart packing list: {str(e)}')
+    # The LLM call runs in a background worker; the packing list page polls the job
+    enqueue_generation_job(trip, GenerationJob.SMART_PACKING)
+    messages.info(request, 'Generating your smart packing list. The page will refresh when it is ready.')
     
     return redirect('trips:view_packing_list', id=trip_id)
 
@@ -956,7 +540,7 @@ def add_outfit_item(request, trip_id, recommendation_id):
         recommendation.save()
         
         # Sync with packing list
-        sync_outfit_items_to_packing_list(recommendation.trip, recommendation)
+        sync_trip_outfits_to_packing_list(recommendation.trip)
         
         messages.success(request, f'Added {item_name} to your outfit!')
     else:
@@ -987,7 +571,7 @@ def remove_outfit_item(request, trip_id, recommendation_id, item_id):
     
     # Re-sync the outfit items with the packing list
     # This will ensure items are properly managed if they appear in multiple outfits
-    sync_outfit_items_to_packing_list(recommendation.trip, recommendation)
+    sync_trip_outfits_to_packing_list(recommendation.trip)
     
     messages.success(request, f'Removed {item_name} from your outfit.')
     
@@ -1018,106 +602,47 @@ def update_activities(request, trip_id, recommendation_id):
 
 @login_required
 def all_outfits(request):
+    """One keyset-paginated page of outfits across the user's trips, newest day first"""
+    recommendations = (
+        OutfitRecommendation.objects.filter(trip__user=request.user)
+        .select_related('trip')
+        .order_by('-day', '-id')
+    )
+    try:
+        before_day = date.fromisoformat(request.GET['before_day'])
+        before_id = int(request.GET['before_id'])
+    except (KeyError, ValueError):
+        before_day = before_id = None
+    if before_day is not None:
+        recommendations = recommendations.filter(
+            Q(day__lt=before_day) | Q(day=before_day, id__lt=before_id)
+        )
+
+    # One extra row tells us whether there's another page
+    page_size = settings.ALL_OUTFITS_PAGE_SIZE
+    page = list(recommendations[:page_size + 1])
+    next_page_url = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        last = page[-1]
+        next_page_url = f"{reverse('trips:all_outfits')}?{urlencode({'before_day': last.day.isoformat(), 'before_id': last.id})}"
+
+    context = {
+        'recommendations': page,
+        'next_page_url': next_page_url,
+    }
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return render(request, 'trips/all_outfits_page.html', context)
+
     user_trips = Trip.objects.filter(user=request.user)
-    all_recommendations = OutfitRecommendation.objects.filter(trip__in=user_trips).order_by('-day')
-    
-    # If there are no recommendations at all, generate them for all trips
-    if not all_recommendations.exists():
+    # If there are no recommendations at all, queue generation for all trips
+    if not page and before_day is None:
         for trip in user_trips:
-            # Only generate for trips that don't have recommendations
-            if not OutfitRecommendation.objects.filter(trip=trip).exists():
-                try:
-                    # Get weather data for the trip
-                    api_key = os.environ['OPENWEATHER_API_KEY']
-                    weather_url = f"https://api.openweathermap.org/data/2.5/forecast?lat={trip.latitude}&lon={trip.longitude}&units=imperial&appid={api_key}"
-                    
-                    weather_response = requests.get(weather_url)
-                    weather_response.raise_for_status()
-                    weather_data = weather_response.json()
-                    
-                    for forecast in weather_data['list']:
-                        forecast_time = datetime.fromtimestamp(forecast['dt'])
-                        forecast_date = forecast_time.date()
-                        
-                        if forecast_date < trip.start_date:
-                            continue
-                            
-                        if forecast_date > trip.end_date:
-                            break
-                        
-                        # Only create one recommendation per day
-                        if not OutfitRecommendation.objects.filter(trip=trip, day=forecast_date).exists():
-                            temp = forecast['main']['feels_like']
-                            weather_desc = forecast['weather'][0]['main']
-                            
-                            # Generate outfit recommendation using OpenAI
-                            openai.api_key = os.environ.get('OPENAI_API_KEY')
-                            
-                            # Simple outfit request
-                            outfit_prompt = f"""For a day in {trip.destination} with temperature {temp}°F and {weather_desc} weather, suggest a simple outfit.
-                            Format your response as a list of clothing items, each on a separate line with a dash prefix."""
-                            
-                            try:
-                                response = openai.completions.create(
-                                    model="gpt-3.5-turbo-instruct",
-                                    prompt=outfit_prompt,
-                                    max_tokens=100,
-                                    temperature=0.5
-                                )
-                                outfit_description = response.choices[0].text.strip()
-                                
-                                # Ensure proper formatting
-                                if not outfit_description.strip().startswith('-'):
-                                    items = outfit_description.split('\n')
-                                    formatted_items = []
-                                    for item in items:
-                                        item = item.strip()
-                                        if item and not item.startswith('-'):
-                                            formatted_items.append(f"- {item}")
-                                        elif item:
-                                            formatted_items.append(item)
-                                    outfit_description = '\n'.join(formatted_items)
-                            except Exception as e:
-                                send_api_fail_email("OpenAI")
-                                outfit_description = f"Default recommendation for {weather_desc} weather at {temp}°F"
-                            
-                            recommendation = OutfitRecommendation.objects.create(
-                                trip=trip,
-                                day=forecast_date,
-                                weather_condition=weather_desc,
-                                temperature=temp,
-                                outfit_description=outfit_description
-                            )
-                            
-                            # Extract and create individual outfit items
-                            try:
-                                # Use the helper function to extract items
-                                outfit_items = extract_items_from_outfit_description(outfit_description)
-                                
-                                # Create the items in the database
-                                for item in outfit_items:
-                                    OutfitItem.objects.create(
-                                        outfit=recommendation,
-                                        name=item['name'],
-                                        category=item['category']
-                                    )
-                                
-                                # Sync with packing list
-                                sync_outfit_items_to_packing_list(trip, recommendation)
-                            except Exception as e:
-                                # If parsing fails, don't worry - we still have the full outfit description
-                                pass
-                    
-                    messages.success(request, f'Outfit recommendations generated for {trip.destination}!')
-                except Exception as e:
-                    messages.error(request, f'Error generating recommendations for {trip.destination}: {str(e)}')
-        
-        # Refresh recommendations after generating
-        all_recommendations = OutfitRecommendation.objects.filter(trip__in=user_trips).order_by('-day')
+            enqueue_generation_job(trip, GenerationJob.OUTFITS)
     
-    context = {
-        'recommendations': all_recommendations,
-    }
+    context['generation_jobs'] = GenerationJob.objects.filter(
+        trip__in=user_trips, kind=GenerationJob.OUTFITS, status__in=GenerationJob.ACTIVE_STATUSES
+    ).select_related('trip')
     
     return render(request, 'trips/all_outfits.html', context)
 
@@ -1130,109 +655,11 @@ def generate_all_outfits(request):
         messages.info(request, "You don't have any trips yet. Create a trip first!")
         return redirect('trips:trip_planner')
     
-    generated_count = 0
-    error_count = 0
-    
+    # One job per trip, so each trip's page can follow its own; the worker runs
+    # a user's due outfits jobs together and skips days that already have recommendations
     for trip in user_trips:
-        try:
-            # Get weather data for the trip
-            api_key = os.environ['OPENWEATHER_API_KEY']
-            weather_url = f"https://api.openweathermap.org/data/2.5/forecast?lat={trip.latitude}&lon={trip.longitude}&units=imperial&appid={api_key}"
-            
-            weather_response = requests.get(weather_url)
-            weather_response.raise_for_status()
-            weather_data = weather_response.json()
-            
-            # Keep track of if we created any new recommendations for this trip
-            trip_generated = False
-            
-            for forecast in weather_data['list']:
-                forecast_time = datetime.fromtimestamp(forecast['dt'])
-                forecast_date = forecast_time.date()
-                
-                if forecast_date < trip.start_date:
-                    continue
-                    
-                if forecast_date > trip.end_date:
-                    break
-                
-                # Only create one recommendation per day
-                if not OutfitRecommendation.objects.filter(trip=trip, day=forecast_date).exists():
-                    temp = forecast['main']['feels_like']
-                    weather_desc = forecast['weather'][0]['main']
-                    
-                    # Generate outfit recommendation using OpenAI
-                    openai.api_key = os.environ.get('OPENAI_API_KEY')
-                    
-                    # Simple outfit request
-                    outfit_prompt = f"""For a day in {trip.destination} with temperature {temp}°F and {weather_desc} weather, suggest a simple outfit.
-                    Format your response as a list of clothing items, each on a separate line with a dash prefix."""
-                    
-                    try:
-                        response = openai.completions.create(
-                            model="gpt-3.5-turbo-instruct",
-                            prompt=outfit_prompt,
-                            max_tokens=100,
-                            temperature=0.5
-                        )
-                        outfit_description = response.choices[0].text.strip()
-                        
-                        # Ensure proper formatting
-                        if not outfit_description.strip().startswith('-'):
-                            items = outfit_description.split('\n')
-                            formatted_items = []
-                            for item in items:
-                                item = item.strip()
-                                if item and not item.startswith('-'):
-                                    formatted_items.append(f"- {item}")
-                                elif item:
-                                    formatted_items.append(item)
-                            outfit_description = '\n'.join(formatted_items)
-                    except Exception as e:
-                        send_api_fail_email("OpenAI")
-                        outfit_description = f"Default recommendation for {weather_desc} weather at {temp}°F"
-                    
-                    recommendation = OutfitRecommendation.objects.create(
-                        trip=trip,
-                        day=forecast_date,
-                        weather_condition=weather_desc,
-                        temperature=temp,
-                        outfit_description=outfit_description
-                    )
-                    
-                    # Extract and create individual outfit items
-                    try:
-                        # Use the helper function to extract items
-                        outfit_items = extract_items_from_outfit_description(outfit_description)
-                        
-                        # Create the items in the database
-                        for item in outfit_items:
-                            OutfitItem.objects.create(
-                                outfit=recommendation,
-                                name=item['name'],
-                                category=item['category']
-                            )
-                        
-                        # Sync with packing list
-                        sync_outfit_items_to_packing_list(trip, recommendation)
-                    except Exception as e:
-                        # If parsing fails, don't worry - we still have the full outfit description
-                        pass
-                        
-                    trip_generated = True
-            
-            if trip_generated:
-                generated_count += 1
-        except Exception:
-            error_count += 1
-    
-    if generated_count > 0:
-        messages.success(request, f'Generated outfit recommendations for {generated_count} trip(s)!')
-    elif error_count == 0:
-        messages.info(request, 'All trips already have outfit recommendations!')
-    
-    if error_count > 0:
-        messages.error(request, f'Failed to generate recommendations for {error_count} trip(s)')
+        enqueue_generation_job(trip, GenerationJob.OUTFITS)
+    messages.info(request, f'Generating outfit recommendations for {user_trips.count()} trip(s). The page will refresh when they are ready.')
     
     return redirect('trips:all_outfits')
 
@@ -1248,29 +675,8 @@ def sync_outfit_to_packing_list(request, trip_id, recommendation_id):
         # Extract items from the outfit description
         outfit_items = extract_items_from_outfit_description(recommendation.outfit_description)
         
-        # Add each item to the packing list
-        for item in outfit_items:
-            # Check if item already exists
-            existing_item = PackingListItem.objects.filter(
-                trip_id=trip_id,
-                name=item['name'],
-                category='Clothing'
-            ).first()
-            
-            if existing_item:
-                # If item exists, ensure quantity is at least 1
-                if existing_item.quantity < 1:
-                    existing_item.quantity = 1
-                    existing_item.save()
-            else:
-                # Create new packing list item
-                PackingListItem.objects.create(
-                    trip_id=trip_id,
-                    name=item['name'],
-                    category='Clothing',
-                    quantity=1,
-                    is_auto_generated=True
-                )
+        # Add the items missing from the packing list in one go
+        add_outfit_items_to_packing_list(recommendation.trip, [item['name'] for item in outfit_items])
         
         messages.success(request, 'Outfit items added to packing list successfully!')
     except Exception as e:
@@ -1285,24 +691,53 @@ def update_item_quantity(request, trip_id, item_id):
     """
     Update the quantity of a packing list item
     """
-    item = get_object_or_404(PackingListItem, id=item_id, trip_id=trip_id, trip__user=request.user)
     action = request.POST.get('action')
+    quantity_delta = {'increase': 1, 'decrease': -1}.get(action, 0)
     
     try:
-        if action == 'increase':
-            item.quantity += 1
-        elif action == 'decrease' and item.quantity > 1:
-            item.quantity -= 1
-        item.save()
-        
-        # Return JSON response for potential AJAX handling
-        return JsonResponse({
-            'status': 'success',
-            'quantity': item.quantity,
-            'can_decrease': item.quantity > 1
-        })
+        # Coalesced with other quantity changes and toggles (trips.packing_writes)
+        item = submit_packing_write(trip_id, item_id, request.user.id, quantity_delta=quantity_delta)
     except Exception as e:
         return JsonResponse({
             'status': 'error',
             'message': str(e)
         }, status=400)
+    
+    if item is None:
+        raise Http404('No such packing list item.')
+    
+    # Return JSON response for potential AJAX handling
+    return JsonResponse({
+        'status': 'success',
+        'quantity': item['quantity'],
+        'can_decrease': item['quantity'] > 1
+    })
+
+@staff_member_required
+def forecast_cache_stats(request):
+    """API endpoint exposing forecast cache hit/miss counters"""
+    return JsonResponse(forecast_cache.stats())
+
+@staff_member_required
+def external_call_metrics(request):
+    """API endpoint exposing OpenWeather/OpenAI latency percentiles and daily token spend"""
+    try:
+        hours = int(request.GET.get('hours', 24))
+        days = int(request.GET.get('days', 7))
+    except ValueError:
+        return JsonResponse({'error': 'hours and days must be integers'}, status=400)
+    return JsonResponse(metrics_report(hours=hours, days=days))
+
+@login_required
+def generation_job_status(request, job_id):
+    """API endpoint polled by pages waiting on a background generation job"""
+    job = get_object_or_404(GenerationJob, id=job_id, trip__user=request.user)
+    return JsonResponse({
+        'id': job.id,
+        'kind': job.kind,
+        'status': job.status,
+        'done': not job.is_active,
+        'attempts': job.attempts,
+        'message': (job.result or {}).get('message', ''),
+        'error': job.error if job.status == GenerationJob.FAILED else '',
+    })
@@ -0,0 +1,318 @@
+import contextvars
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from decimal import Decimal
+
+import numpy as np
+import requests
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from trips.api_client import openweather
+from trips.models import DailyForecast
+from trips.singleflight import SingleFlight, coalesced
+
+FORECAST_URL = f"{settings.OPENWEATHER_BASE_URL}/data/2.5/forecast"
+EPOCH = date(1970, 1, 1)
+
+
+def forecast_key(latitude, longitude):
+    """Round coordinates so nearby trips share one cache entry"""
+    precision = settings.WEATHER_CACHE_COORD_PRECISION
+    return (round(float(latitude), precision), round(float(longitude), precision))
+
+
+def get_weather_icon(weather_id):
+    weather_descriptions = {
+        2: 'fa-solid fa-bolt fa-fw',  # Thunderstorm
+        3: 'fa-solid fa-cloud-rain fa-fw',  # Drizzle
+        5: 'fa-solid fa-cloud-showers-heavy fa-fw',  # Rain
+        6: 'fa-solid fa-snowflake fa-fw',  # Snow
+        7: 'fa-solid fa-smog fa-fw',  # Atmosphere
+        8: 'fa-solid fa-cloud fa-fw',  # Clouds
+    }
+
+    condition_group = int(weather_id / 100)
+    if condition_group == 8:
+        if weather_id % 100 == 0:
+            return 'fa-solid fa-sun fa-fw'
+        elif weather_id % 100 in [1, 2]:
+            return 'fa-solid fa-cloud-sun fa-fw'
+        else:
+            return 'fa-solid fa-cloud fa-fw'
+
+    return weather_descriptions.get(condition_group, 'fa-solid fa-sun fa-fw')
+
+
+def fetch_forecast(latitude, longitude):
+    """Call the OpenWeather 5 day / 3 hour forecast endpoint"""
+    params = {
+        'lat': latitude,
+        'lon': longitude,
+        'units': 'imperial',
+        'appid': os.environ['OPENWEATHER_API_KEY'],
+    }
+    response = openweather.get(FORECAST_URL, params=params, endpoint='forecast')
+    weather_data = response.json()
+
+    if 'list' not in weather_data:
+        raise ValueError("Unexpected API response format")
+
+    return weather_data
+
+
+def aggregate_daily(weather_data):
+    """
+    Collapse the 3-hour forecast entries into one summary per local day.
+
+    The entries are loaded into column arrays once and every statistic is
+    computed with a single grouped reduction over them, instead of walking
+    the raw list per field and per view.
+    """
+    entries = weather_data['list']
+    if not entries:
+        return []
+
+    dt = np.array([entry['dt'] for entry in entries], dtype=np.int64)
+    order = np.argsort(dt, kind='stable')
+    dt = dt[order]
+
+    def column(values, dtype=float):
+        return np.array(values, dtype=dtype)[order]
+
+    temp = column([entry['main']['temp'] for entry in entries])
+    feels_like = column([entry['main']['feels_like'] for entry in entries])
+    humidity = column([entry['main']['humidity'] for entry in entries])
+    wind_speed = column([entry['wind']['speed'] for entry in entries])
+    cloud_cover = column([entry['clouds']['all'] for entry in entries])
+    pop = column([entry.get('pop', 0) for entry in entries])
+    rain = column([entry.get('rain', {}).get('3h', 0) for entry in entries])
+    condition_ids = column([entry['weather'][0]['id'] for entry in entries], dtype=np.int64)
+    conditions = column([entry['weather'][0]['main'] for entry in entries], dtype=object).astype(str)
+
+    # Group by the destination's local calendar day (entries are sorted, so groups are contiguous)
+    utc_offset = weather_data.get('city', {}).get('timezone', 0)
+    day_numbers = (dt + utc_offset) // 86400
+    days, starts, day_index = np.unique(day_numbers, return_index=True, return_inverse=True)
+    counts = np.diff(np.append(starts, len(dt)))
+
+    def mean(values):
+        return np.add.reduceat(values, starts) / counts
+
+    # Dominant condition: the most frequent 'main' per day, with the first
+    # matching entry's condition code used for the icon
+    names, condition_index = np.unique(conditions, return_inverse=True)
+    tally = np.zeros((len(days), len(names)), dtype=np.int64)
+    np.add.at(tally, (day_index, condition_index), 1)
+    dominant = tally.argmax(axis=1)
+    matching = np.flatnonzero(condition_index == dominant[day_index])
+    _, first_match = np.unique(day_index[matching], return_index=True)
+    dominant_ids = condition_ids[matching[first_match]]
+
+    columns = {
+        'temp_min': np.minimum.reduceat(temp, starts),
+        'temp_max': np.maximum.reduceat(temp, starts),
+        'temp_mean': mean(temp),
+        'feels_like_min': np.minimum.reduceat(feels_like, starts),
+        'feels_like_max': np.maximum.reduceat(feels_like, starts),
+        'feels_like_mean': mean(feels_like),
+        'humidity_mean': mean(humidity),
+        'wind_speed_mean': mean(wind_speed),
+        'cloud_cover_mean': mean(cloud_cover),
+        'pop_max': np.maximum.reduceat(pop, starts),
+        'rain_total': np.add.reduceat(rain, starts),
+    }
+
+    return [
+        dict(
+            {name: round(float(values[i]), 2) for name, values in columns.items()},
+            date=EPOCH + timedelta(days=int(day)),
+            condition=str(names[dominant[i]]),
+            condition_id=int(dominant_ids[i]),
+        )
+        for i, day in enumerate(days)
+    ]
+
+
+def store_daily_forecasts(key, weather_data):
+    """Aggregate a raw forecast payload and upsert its DailyForecast rows in one query"""
+    latitude, longitude = (Decimal(str(value)) for value in key)
+    fetched_at = timezone.now()
+    rows = [
+        DailyForecast(latitude=latitude, longitude=longitude, fetched_at=fetched_at, **day)
+        for day in aggregate_daily(weather_data)
+    ]
+    update_fields = [
+        field.name for field in DailyForecast._meta.concrete_fields
+        if field.name not in ('id', 'latitude', 'longitude', 'date')
+    ]
+    DailyForecast.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['latitude', 'longitude', 'date'],
+        update_fields=update_fields,
+    )
+    return rows
+
+
+def load_daily_forecasts(latitude, longitude):
+    """
+    Return the DailyForecast rows for a rounded location, calling OpenWeather
+    only if the stored rows are older than WEATHER_CACHE_TTL. This lets other
+    worker processes (and the prefetch cron job) share one fetch.
+    """
+    key = (latitude, longitude)
+    fresh_after = timezone.now() - timedelta(seconds=settings.WEATHER_CACHE_TTL)
+    rows = list(DailyForecast.objects.filter(
+        latitude=Decimal(str(latitude)),
+        longitude=Decimal(str(longitude)),
+        date__gte=timezone.localdate() - timedelta(days=1),
+    ).order_by('date'))
+
+    if rows and max(row.fetched_at for row in rows) >= fresh_after:
+        return rows
+
+    try:
+        weather_data = fetch_forecast(latitude, longitude)
+    except requests.exceptions.RequestException:
+        # Older rows are better than nothing while OpenWeather is down
+        if rows:
+            return rows
+        raise
+    return store_daily_forecasts(key, weather_data)
+
+
+class ForecastCache:
+    """
+    In-process LRU cache of daily forecasts keyed by rounded coordinates.
+
+    Entries younger than ``ttl`` are served as-is. Entries older than that but
+    still inside ``stale_ttl`` are served immediately while a background thread
+    refreshes them. Anything older is fetched synchronously; if that fetch
+    fails (e.g. the upstream circuit is open) the expired copy is served as
+    degraded content rather than failing the request.
+    """
+
+    def __init__(self, ttl, stale_ttl, max_entries, fetch=load_daily_forecasts):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.fetch = fetch
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.evictions = 0
+        self.degraded = 0
+        self.flight = SingleFlight()
+
+    def load(self, key):
+        # Workers that miss the same location at once share one fetch
+        return coalesced(self.flight, f'forecast:{key[0]}:{key[1]}', lambda: self.fetch(*key))
+
+    def get(self, latitude, longitude):
+        key = forecast_key(latitude, longitude)
+        now = time.monotonic()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                fetched_at, data = entry
+                age = now - fetched_at
+                if age < self.ttl:
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return data
+                if age < self.ttl + self.stale_ttl:
+                    self.stale_hits += 1
+                    self._entries.move_to_end(key)
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        threading.Thread(
+                            target=contextvars.copy_context().run, args=(self._refresh, key), daemon=True
+                        ).start()
+                    return data
+            self.misses += 1
+
+        try:
+            data = self.load(key)
+        except requests.exceptions.RequestException:
+            with self._lock:
+                if entry is not None and key in self._entries:
+                    self.degraded += 1
+                    return entry[1]
+            raise
+        self.set(key, data)
+        return data
+
+    def set(self, key, data):
+        with self._lock:
+            self._entries[key] = (time.monotonic(), data)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def _refresh(self, key):
+        try:
+            data = self.load(key)
+        except (requests.exceptions.RequestException, KeyError, ValueError):
+            # Keep serving the stale copy; the next miss will retry
+            return
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+            # Background threads get their own DB connection; don't leak it
+            connection.close()
+        self.set(key, data)
+        with self._lock:
+            self.refreshes += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'stale_ttl': self.stale_ttl,
+                'hits': self.hits,
+                'stale_hits': self.stale_hits,
+                'misses': self.misses,
+                'refreshes': self.refreshes,
+                'evictions': self.evictions,
+                'degraded': self.degraded,
+                'coalesced': self.flight.shared,
+                'hit_rate': (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            }
+
+
+forecast_cache = ForecastCache(
+    ttl=settings.WEATHER_CACHE_TTL,
+    stale_ttl=settings.WEATHER_CACHE_STALE_TTL,
+    max_entries=settings.WEATHER_CACHE_MAX_ENTRIES,
+)
+
+
+def get_daily_forecasts(latitude, longitude, start_date=None, end_date=None):
+    """
+    Return the precomputed DailyForecast rows for a location, optionally limited
+    to a date range. Raises RequestException if OpenWeather has to be called and fails.
+    """
+    forecasts = forecast_cache.get(latitude, longitude)
+    return [
+        forecast for forecast in forecasts
+        if (start_date is None or forecast.date >= start_date)
+        and (end_date is None or forecast.date <= end_date)
+    ]